@@ -2,5 +2,16 @@ from .qsim import QSim
 from .qsystem import QSystem
 from .quanta import Quanta
 from .hamiltonian import Hamiltonian
-from .pulse import Pulse
+from .pulse import Pulse, PulseSequence
 from .noise import Noise
+from .subspace import Subspace
+from .symmetric import SymmetricBasis
+from .matrix_free import MatrixFreeHamiltonian
+from .observables import Observables
+from .rotating import RotatingFrame
+from .optimize import PulseOptimizer
+from .cache import ResultCache
+from .jobs import SimulationJob, SimulationCancelled
+from .scheduler import JobScheduler, ScheduledJob, get_scheduler
+from .trajectory import TrajectoryStore
+from . import analysis
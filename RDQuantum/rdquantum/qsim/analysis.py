@@ -0,0 +1,80 @@
+import numpy as np
+
+from .trajectory import TrajectoryStore
+
+def stack_states(
+    states: list=None
+) -> np.ndarray:
+    """ Stack a state evolution into a contiguous complex array.
+
+    Parameters
+    ----------
+    states : list
+        A list of kets (:obj:`qutip.Qobj`), an array of shape (num_samples, dim) or a :obj:`TrajectoryStore`.
+
+    Returns
+    -------
+    states : :obj:`numpy.ndarray`
+        The states as a C-contiguous complex array of shape (num_samples, dim). The array of a
+        :obj:`TrajectoryStore` is returned without a copy.
+
+    """
+    if isinstance(states, TrajectoryStore):
+        return states.array
+    if isinstance(states, np.ndarray):
+        return np.ascontiguousarray(states, dtype=complex)
+
+    stacked = np.empty((len(states), states[0].shape[0]), dtype=complex)
+    for i, state in enumerate(states):
+        stacked[i] = state.full().ravel()
+
+    return stacked
+
+def overlaps(
+    states: list=None,
+    targets: list=None
+) -> tuple:
+    """ Compute the overlaps of a state evolution with target states.
+
+    Parameters
+    ----------
+    states : list
+        A list of kets (:obj:`qutip.Qobj`), an array of shape (num_samples, dim) or a :obj:`TrajectoryStore`.
+    targets : list
+        A list of target kets (:obj:`qutip.Qobj`).
+
+    Returns
+    -------
+    amplitude : :obj:`numpy.ndarray`
+        The amplitudes :math:`|\\braket{s|\\psi(t)}|` of shape (num_samples, num_targets).
+    phase : :obj:`numpy.ndarray`
+        The phases :math:`\\arg \\braket{s|\\psi(t)}` in radians of shape (num_samples, num_targets).
+    population : :obj:`numpy.ndarray`
+        The populations :math:`|\\braket{s|\\psi(t)}|^2` of shape (num_samples, num_targets).
+
+    """
+    states = stack_states(states)
+    targets = np.hstack([target.full() for target in targets])
+    _overlaps = states @ targets.conj()
+
+    amplitude = np.abs(_overlaps)
+    return amplitude, np.angle(_overlaps), amplitude**2
+
+def populations(
+    states: list=None
+) -> np.ndarray:
+    """ Compute the populations of all basis states of a state evolution.
+
+    Parameters
+    ----------
+    states : list
+        A list of kets (:obj:`qutip.Qobj`), an array of shape (num_samples, dim) or a :obj:`TrajectoryStore`.
+
+    Returns
+    -------
+    population : :obj:`numpy.ndarray`
+        The populations :math:`|\\psi_i(t)|^2` of shape (num_samples, dim).
+
+    """
+    states = stack_states(states)
+    return states.real**2 + states.imag**2
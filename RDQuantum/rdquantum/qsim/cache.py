@@ -0,0 +1,186 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy as np
+import qutip
+
+def _canonical(
+    value=None
+):
+    """ Convert a value into a JSON-serializable canonical form. """
+    if isinstance(value, qutip.Qobj):
+        data = np.ascontiguousarray(value.full(), dtype=complex)
+        return {"qobj": hashlib.sha256(data.tobytes()).hexdigest(), "dims": value.dims}
+    elif isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value)
+        return {
+            "array": hashlib.sha256(data.tobytes()).hexdigest(), "shape": list(data.shape), "dtype": str(data.dtype)
+        }
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, complex):
+        return [value.real, value.imag]
+    elif isinstance(value, dict):
+        return {str(key): _canonical(_value) for key, _value in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [_canonical(_value) for _value in value]
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError("The value of type %s cannot be hashed." %(type(value).__name__))
+
+def solver_options(
+    options: qutip.solver.Options=None
+) -> Optional[dict]:
+    """ Return the settings of :obj:`qutip.solver.Options` that affect the results. """
+    if options is None:
+        return None
+    return {
+        key: value for key, value in sorted(vars(options).items())
+        if value is None or isinstance(value, (bool, int, float, str))
+    }
+
+def experiment_hash(
+    recipe: dict=None,
+    **settings
+) -> str:
+    """ Return the canonical SHA-256 hash of an experiment.
+
+    Parameters
+    ----------
+    recipe : dict
+        The recipe of the simulator (see :meth:`QSim.to_recipe`).
+    **settings
+        The settings of the run, e.g. the initial state, `operation_time`, `num_samples` and solver options.
+        :obj:`qutip.Qobj` and :obj:`numpy.ndarray` are hashed by their data.
+
+    """
+    payload = json.dumps(
+        {"recipe": _canonical(recipe), "settings": _canonical(settings)},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResultCache:
+    """ A size-capped on-disk cache of simulation results stored as `.npy` files.
+
+    The results are loaded memory-mapped, so a hit costs neither a simulation nor a full read. The least recently
+    used results (by modification time, refreshed on every hit) are evicted when the cache exceeds `max_bytes`.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The cache directory. Defaults to the environment variable `RDQUANTUM_CACHE_DIR` or
+        `~/.cache/rdquantum`.
+    max_bytes : int
+        The maximum total size of the cached results in bytes.
+
+    Attributes
+    ----------
+    directory : str
+        The cache directory.
+    hits : int
+        The number of cache hits.
+    misses : int
+        The number of cache misses.
+
+    """
+    def __init__(
+        self,
+        directory: str=None,
+        max_bytes: int=1024**3
+    ):
+        if directory is None:
+            directory = os.environ.get(
+                "RDQUANTUM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rdquantum")
+            )
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def path(
+        self,
+        key: str=None
+    ) -> str:
+        """ Return the file of `key`, e.g. to write a :obj:`TrajectoryStore` that the cache evicts like its results. """
+        return os.path.join(self._directory, key + ".npy")
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(
+        self,
+        key: str=None
+    ) -> Optional[np.ndarray]:
+        """ Return the memory-mapped result of `key`, or `None` if it is not cached. """
+        path = self.path(key)
+        try:
+            result = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result
+
+    def put(
+        self,
+        key: str=None,
+        result: np.ndarray=None
+    ):
+        """ Store `result` under `key` and evict the least recently used results above the size cap. """
+        descriptor, temporary = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                np.save(file, np.ascontiguousarray(result))
+            # The rename is atomic, so concurrent readers never see a partial file.
+            os.replace(temporary, self.path(key))
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self.evict()
+
+    def clear(
+        self
+    ):
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(".npy"):
+                os.remove(entry.path)
+
+    @property
+    def nbytes(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self._directory) if entry.name.endswith(".npy"))
+
+    def evict(
+        self
+    ):
+        """ Remove the least recently used files until the cache is within `max_bytes`. """
+        entries = []
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        nbytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if nbytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            nbytes -= size
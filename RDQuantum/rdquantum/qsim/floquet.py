@@ -0,0 +1,171 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional, Callable
+
+from fractions import Fraction
+from math import gcd, lcm
+
+import numpy as np
+import scipy.linalg
+import qutip
+
+def common_period(
+    periods: list=None,
+    max_denominator: int=1000,
+    tol: float=1e-9
+) -> Optional[float]:
+    """ Find the common period of periodic functions.
+
+    Parameters
+    ----------
+    periods : list
+        The periods of the functions, 0.0 for a constant function or `None` for an aperiodic function.
+    max_denominator : int
+        The largest denominator of the ratios of the periods.
+    tol : float
+        The relative tolerance of the ratios of the periods.
+
+    Returns
+    -------
+    period : float
+        The least common multiple of the periods, 0.0 if all functions are constant, or `None` if there is no
+        common period.
+
+    """
+    if any(period is None for period in periods):
+        return None
+    periods = [period for period in periods if period > 0.0]
+    if not periods:
+        return 0.0
+
+    base = periods[0]
+    ratios = []
+    for period in periods:
+        ratio = Fraction(period / base).limit_denominator(max_denominator)
+        if abs(float(ratio) - period / base) > tol * period / base:
+            return None
+        ratios.append(ratio)
+
+    numerator = lcm(*[ratio.numerator for ratio in ratios])
+    denominator = gcd(*[ratio.denominator for ratio in ratios])
+
+    return base * numerator / denominator
+
+class FloquetPropagator:
+    """ The one-period propagator of a periodic hamiltonian and its eigendecomposition.
+
+    Parameters
+    ----------
+    H : list
+        The hamiltonian in the format required by QuTip.solver with callable coefficients, e.g. returned by
+        :meth:`Hamiltonian.compile` with `resolution='analytic'`.
+    period : float
+        The period of the hamiltonian.
+    taus : :obj:`numpy.ndarray`, optional
+        The times within the period at which the propagator is also needed.
+    options : :obj:`qutip.solver.Options`, optional
+        Options for the QuTip ODE solver.
+    progress_bar : :obj:`qutip.ui.progressbar.BaseProgressBar`, optional
+        The progress bar of the integration over the period.
+
+    Attributes
+    ----------
+    period : float
+        The period of the hamiltonian.
+    quasienergies : :obj:`numpy.ndarray`
+        The quasienergies in (-π/period, π/period].
+
+    Notes
+    -----
+    The propagator is integrated over a single period, so :math:`U(mT + \\tau) = U(\\tau) U(T)^m` costs an
+    eigendecomposition of :math:`U(T)` and a matrix product for any number of periods :math:`m`.
+
+    """
+    def __init__(
+        self,
+        H: list=None,
+        period: float=None,
+        taus: np.ndarray=None,
+        options: qutip.solver.Options=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ):
+        self._period = period
+        grid = np.unique(np.concatenate([[0.0, period], np.asarray(taus if taus is not None else [], dtype=float)]))
+        identity = qutip.qeye(H[0][0].dims[0])
+        results = qutip.sesolve(H, identity, grid, options=options, progress_bar=progress_bar)
+        self._taus = grid
+        self._propagators = np.array([U.full() for U in results.states])
+
+        # The Schur form of a unitary matrix is diagonal, which keeps the eigenvectors orthonormal for degenerate
+        # eigenvalues.
+        schur, vectors = scipy.linalg.schur(self._propagators[-1], output='complex')
+        if np.allclose(schur, np.diag(np.diag(schur))):
+            self._eigenvalues = np.diag(schur)
+            self._vectors = vectors
+            self._inverse = vectors.conj().T
+        else:
+            self._eigenvalues, self._vectors = np.linalg.eig(self._propagators[-1])
+            self._inverse = np.linalg.inv(self._vectors)
+
+    @property
+    def period(self):
+        return self._period
+
+    @property
+    def quasienergies(self):
+        return -np.angle(self._eigenvalues) / self._period
+
+    def _propagator(
+        self,
+        tau: float=None
+    ) -> np.ndarray:
+        index = np.searchsorted(self._taus, tau)
+        if index == len(self._taus) or not np.isclose(self._taus[index], tau, rtol=0.0, atol=1e-12 * self._period):
+            index = index - 1
+            if not np.isclose(self._taus[index], tau, rtol=0.0, atol=1e-12 * self._period):
+                raise ValueError("The propagator at %s was not computed." %(tau))
+        return self._propagators[index]
+
+    def evolve(
+        self,
+        init_state: np.ndarray=None,
+        tlist: np.ndarray=None,
+        observe: Callable=None
+    ) -> np.ndarray:
+        """ Evolve a flat state vector to the times `tlist`, whose offsets within the period must be among `taus`.
+
+        Parameters
+        ----------
+        init_state : :obj:`numpy.ndarray`
+            The flat initial state vector at t = 0.
+        tlist : :obj:`numpy.ndarray`
+            The output times.
+        observe : Callable, optional
+            A function mapping the states of shape (len(tlist), dim) to the values of observables, e.g.
+            :meth:`Observables.evaluate`.
+
+        Returns
+        -------
+        states : :obj:`numpy.ndarray`
+            The states at `tlist` of shape (len(tlist), dim), or the values of the observables with `observe`.
+
+        """
+        num_periods, taus = split_times(tlist, self._period)
+        amplitudes = self._inverse @ np.asarray(init_state, dtype=complex).ravel()
+        states = np.empty((len(tlist), len(amplitudes)), dtype=complex)
+        for i, (m, tau) in enumerate(zip(num_periods, taus)):
+            states[i] = self._propagator(tau) @ (self._vectors @ (self._eigenvalues**m * amplitudes))
+
+        if observe is not None:
+            return observe(states)
+        return states
+
+def split_times(
+    tlist: np.ndarray=None,
+    period: float=None
+) -> tuple:
+    """ Split the times `tlist` into the number of whole periods and the offsets within the period. """
+    tlist = np.asarray(tlist, dtype=float)
+    num_periods = np.floor(tlist / period + 1e-9).astype(int)
+    taus = np.clip(tlist - num_periods * period, 0.0, period)
+
+    return num_periods, taus
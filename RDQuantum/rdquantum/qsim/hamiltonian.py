@@ -1,11 +1,15 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Optional
+import hashlib
 
 import numpy as np
 import qutip
 
 from .operator import Operator
-from .pulse import Pulse
+from .pulse import Pulse, PulseSequence
+from .floquet import common_period
+from . import propagator
+from .rotating import RotatingFrame
 
 if TYPE_CHECKING:
     from .qsystem import QSystem
@@ -65,7 +69,8 @@ class Hamiltonian:
         target : list
             The  target subsystems of the operator represented by a list of index of the `qsystem`.
         pulse_recipe : dict
-            Pulse of the operator.
+            Pulse of the operator represented by a `dict` {"shape": str, "constant": float, "phase": float,
+            "kwargs": dict}, or {"segments": list} for a :obj:`PulseSequence`. A :obj:`Pulse` is used as is.
         dm_recipe : dict
             The `dict` representation of the operator with the key the index of the quantum subsystem and the value a
             tuple of symbols representing the energy level transition e.g. ("e","g") for the transition $\ket{e} \bra{g}$.
@@ -81,12 +86,21 @@ class Hamiltonian:
                 sub_op = dm_recipe["subop"],
                 constant = dm_recipe["constant"]
             )
-            self._pulses[key] = Pulse(
-                shape = pulse_recipe["shape"],
-                constant = pulse_recipe["constant"],
-                phase = pulse_recipe["phase"],
-                **pulse_recipe["kwargs"]
-            )
+            if isinstance(pulse_recipe, Pulse):
+                self._pulses[key] = pulse_recipe
+            elif "segments" in pulse_recipe:
+                self._pulses[key] = PulseSequence(
+                    segments = pulse_recipe["segments"],
+                    constant = pulse_recipe.get("constant", 1.0),
+                    phase = pulse_recipe.get("phase", 0.0)
+                )
+            else:
+                self._pulses[key] = Pulse(
+                    shape = pulse_recipe["shape"],
+                    constant = pulse_recipe["constant"],
+                    phase = pulse_recipe["phase"],
+                    **pulse_recipe["kwargs"]
+                )
 
     def get_operator(
         self,
@@ -124,18 +138,234 @@ class Hamiltonian:
         """
         return self._pulses[key]
 
-    def compile(
+    def to_recipe(
+        self
+    ) -> list:
+        """ Return the operators and pulses as a JSON-serializable list of recipes accepted by :meth:`add`. """
+        return [
+            {
+                "key": key,
+                "target": [list(_target) for _target in operator.target],
+                "pulse": self._pulses[key].recipe,
+                "dm": {
+                    "subdm": [list(_sub_dm) for _sub_dm in operator.sub_dm],
+                    "subop": list(operator.sub_op),
+                    "constant": operator.constant
+                }
+            }
+            for key, operator in self._operators.items()
+        ]
+
+    def fingerprint(
+        self,
+        operation_time: float=None,
+        num_samples: int=None
+    ) -> str:
+        """ Return a hash of the operators, the pulses, `operation_time` and `num_samples`.
+
+        Two hamiltonians with the same fingerprint compile to the same QuTip hamiltonian.
+
+        """
+        recipe = [
+            (key, self._operators[key].key, self._pulses[key].key) for key in self._operators.keys()
+        ]
+        recipe.append((float(operation_time), int(num_samples)))
+        return hashlib.sha256(repr(recipe).encode()).hexdigest()
+
+    @property
+    def is_piecewise_constant(self):
+        """ `True` if every pulse is piecewise constant (see :func:`propagator.is_piecewise_constant`). """
+        return propagator.is_piecewise_constant(list(self._pulses.values()))
+
+    def period(
+        self
+    ) -> Optional[float]:
+        """ Return the common period of the pulses, 0.0 if all pulses are constant, or `None` if the hamiltonian is
+        not periodic (see :func:`floquet.common_period`).
+
+        """
+        return common_period([pulse.period for pulse in self._pulses.values()])
+
+    def rotating_frame(
+        self,
+        operation_time: float=None,
+        num_samples: int=None,
+        frame: dict=None,
+        cutoff: float=None
+    ) -> RotatingFrame:
+        """ Compile the hamiltonian into a rotating frame set by the drive frequencies and drop the counter-rotating
+        terms (rotating wave approximation).
+
+        See :obj:`RotatingFrame` for `frame` and `cutoff`. The returned :obj:`RotatingFrame` holds the slowly
+        varying hamiltonian (:attr:`RotatingFrame.H`), an estimate of the error of the approximation and
+        :meth:`RotatingFrame.to_lab` transforming the results back.
+
+        """
+        return RotatingFrame(self, operation_time, num_samples, frame, cutoff)
+
+    def segments(
+        self,
+        operation_time: float=None
+    ) -> list:
+        """ Split the operation into windows in which every pulse plays a single segment.
+
+        Parameters
+        ----------
+        operation_time : float
+            The operation duration.
+
+        Returns
+        -------
+        windows : list
+            A list of tuples (start, stop, signature, pulses). `pulses` is a list of tuples (pulse, offset,
+            duration), one per key, of the segment played in the window starting `offset` after the start of the
+            segment. Windows with the same `signature` and length have the same propagator.
+
+        """
+        boundaries = {0.0, float(operation_time)}
+        for pulse in self._pulses.values():
+            if isinstance(pulse, PulseSequence):
+                boundaries.update(t for t in pulse.boundaries if 0.0 < t < operation_time)
+        boundaries = sorted(boundaries)
+
+        windows = []
+        for start, stop in zip(boundaries[:-1], boundaries[1:]):
+            pulses = []
+            signature = []
+            for key in self._operators.keys():
+                pulse, segment_start, duration = self._pulses[key].locate(start, operation_time)
+                offset = start - segment_start
+                pulses.append((pulse, offset, duration))
+                # A constant pulse is the same at every offset.
+                if pulse.is_constant:
+                    signature.append((key, pulse.key))
+                else:
+                    signature.append((key, pulse.key, round(offset, 12), round(duration, 12)))
+            windows.append((start, stop, tuple(signature), pulses))
+
+        return windows
+
+    def check_hermitian(
         self,
         operation_time: float=None,
         num_samples: int=None
+    ):
+        """ Check that the hamiltonian is Hermitian at the `num_samples` sample times.
+
+        A complex pulse, e.g. `drag`, on a Hermitian operator such as :math:`\\ket{r}\\bra{g} + \\ket{g}\\bra{r}`
+        is not Hermitian. It has to drive a one-sided operator :math:`\\ket{a}\\bra{b}`, paired with the conjugate
+        pulse on :math:`\\ket{b}\\bra{a}`.
+
+        Raises
+        ------
+        ValueError
+            If the hamiltonian is not Hermitian.
+
+        """
+        keys = self.keys
+        coeffs = np.array([self._pulses[key].generate_tlist(operation_time, num_samples) for key in keys])
+        operators = [self._operators[key].dm for key in keys]
+        if not np.iscomplexobj(coeffs) or not np.any(coeffs.imag):
+            if all(operator.isherm for operator in operators):
+                return
+
+        # The squared norm of H(t) - H(t)^† summed over the samples, from the inner products of the terms.
+        terms = [operator.data for operator in operators] + [operator.data.conj().T for operator in operators]
+        gram = np.array([[np.sum(_term.conj().multiply(term)) for term in terms] for _term in terms])
+        C = np.vstack([coeffs, -np.conj(coeffs)])
+        residual = np.real(np.einsum('it,ij,jt->', C.conj(), gram, C))
+        size = np.real(np.einsum('it,ij,jt->', C[:len(keys)].conj(), gram[:len(keys), :len(keys)], C[:len(keys)]))
+        if residual > 1e-20 * max(size, 1.0):
+            raise ValueError(
+                "The hamiltonian is not Hermitian. A complex pulse has to drive a one-sided operator |a><b| paired "
+                "with the conjugate pulse on |b><a|."
+            )
+
+    def compile(
+        self,
+        operation_time: float=None,
+        num_samples: int=None,
+        resolution: int|str=None,
+        fold: bool=False
     ) -> list:
         """ Return hamiltonian in the format required by QuTip.solver (H).
 
+        Parameters
+        ----------
+        operation_time : float
+            The operation duration.
+        num_samples : int
+            The number of samples of the pulses.
+        resolution : int or str, optional
+            If given, the pulses are not sampled on the `num_samples` output times but returned as cubic splines with
+            `resolution` samples, as exact callables with 'analytic', or as the switching times of piecewise
+            constant pulses with 'steps' (see :meth:`Pulse.coefficient`).
+        fold : bool
+            If `True`, the operators of identical pulses (the same :attr:`Pulse.key`) are summed into a single term
+            and the terms constant over the whole operation (see :meth:`Pulse.is_constant_over`) into a static
+            hamiltonian, the first element of `H` as a bare :obj:`qutip.Qobj`. The work per solver step then scales
+            with the number of distinct time dependences. Use :func:`unfold` for solvers requiring coefficients for
+            every term.
+
+        Raises
+        ------
+        ValueError
+            If the hamiltonian is not Hermitian (see :meth:`check_hermitian`).
+
         """
+        self.check_hermitian(operation_time, num_samples)
+        if fold:
+            return self._compile_folded(operation_time, num_samples, resolution)
+
         H = []
         for key in self._operators.keys():
             operator_dm = self._operators[key].dm
-            pulse_tlist = self._pulses[key].generate_tlist(operation_time, num_samples)
+            if resolution is None:
+                pulse_tlist = self._pulses[key].generate_tlist(operation_time, num_samples)
+            else:
+                pulse_tlist = self._pulses[key].coefficient(operation_time, resolution)
             H.append([operator_dm, pulse_tlist])
         
         return H
+
+    def _compile_folded(
+        self,
+        operation_time: float=None,
+        num_samples: int=None,
+        resolution: int|str=None
+    ) -> list:
+        """ Compile the hamiltonian with the terms grouped by their pulses (see :meth:`compile`). """
+        groups = {}
+        for key in self._operators.keys():
+            pulse = self._pulses[key]
+            if pulse.key in groups:
+                groups[pulse.key][1] = groups[pulse.key][1] + self._operators[key].dm
+            else:
+                groups[pulse.key] = [pulse, self._operators[key].dm]
+
+        H0 = None
+        H = []
+        for pulse, operator_dm in groups.values():
+            # Only a pulse constant over the whole operation can join the static hamiltonian.
+            if pulse.is_constant_over(operation_time):
+                amplitude = pulse.evaluate(np.zeros(1), operation_time)[0]
+                H0 = amplitude * operator_dm if H0 is None else H0 + amplitude * operator_dm
+            elif resolution is None:
+                H.append([operator_dm, pulse.generate_tlist(operation_time, num_samples)])
+            else:
+                H.append([operator_dm, pulse.coefficient(operation_time, resolution)])
+
+        return ([H0] if H0 is not None else []) + H
+
+def unfold(
+    H: list=None,
+    num_samples: int=None
+) -> list:
+    """ Expand the static terms (bare :obj:`qutip.Qobj`) of a compiled hamiltonian into terms with constant
+    coefficients of `num_samples` samples, the format returned by :meth:`Hamiltonian.compile` without `fold`.
+
+    """
+    return [
+        [term, np.ones(num_samples)] if isinstance(term, qutip.Qobj) else term
+        for term in H
+    ]
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional, Callable
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from qutip.ui.progressbar import BaseProgressBar
+
+if TYPE_CHECKING:
+    from .qsim import QSim
+
+# The worker pool running the jobs outside the (Streamlit) script thread, created on first use.
+_executor = None
+_executor_lock = threading.Lock()
+MAX_WORKERS = 2
+
+class SimulationCancelled(Exception):
+    """ Raised inside a running simulation when its job is cancelled. """
+
+def executor() -> ThreadPoolExecutor:
+    """ Return the worker pool shared by all jobs of the process. """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="rdquantum-job")
+    return _executor
+
+class JobProgressBar(BaseProgressBar):
+    """ A QuTip progress bar reporting the solver progress to a :obj:`SimulationJob`.
+
+    Every update checks the cancellation of the job and raises :obj:`SimulationCancelled` inside the solver, which
+    is the point where a running simulation stops cooperatively.
+
+    """
+    def __init__(
+        self,
+        job: SimulationJob=None
+    ):
+        self._job = job
+        self._iterations = 1
+
+    def start(self, iterations, **kwargs):
+        self._iterations = max(iterations, 1)
+        self._job._set_progress(0.0)
+
+    def update(self, n):
+        if self._job.cancel_requested:
+            raise SimulationCancelled("The simulation was cancelled.")
+        self._job._set_progress(n / self._iterations)
+
+    def finished(self):
+        self._job._set_progress(1.0)
+
+class SimulationJob:
+    """ A simulation running on the worker pool.
+
+    Parameters
+    ----------
+    target : Callable
+        A function of a :obj:`JobProgressBar` running the simulation.
+    qsim : :obj:`QSim`, optional
+        The simulator running the job.
+
+    Attributes
+    ----------
+    qsim : :obj:`QSim`
+        The simulator running the job.
+    progress : float
+        The solver progress as a fraction of `tlist`.
+    status : str
+        One of 'running', 'done', 'cancelled' and 'failed'.
+    cancel_requested : bool
+        Whether :meth:`cancel` was called.
+
+    """
+    def __init__(
+        self,
+        target: Callable=None,
+        qsim: QSim=None
+    ):
+        self.qsim = qsim
+        self._progress = 0.0
+        self._cancel = threading.Event()
+        self._future = executor().submit(self._run, target)
+
+    def _run(
+        self,
+        target: Callable=None
+    ):
+        if self._cancel.is_set():
+            raise SimulationCancelled("The simulation was cancelled.")
+        result = target(JobProgressBar(self))
+        self._progress = 1.0
+        return result
+
+    def _set_progress(
+        self,
+        progress: float=None
+    ):
+        self._progress = progress
+
+    @property
+    def progress(self):
+        return self._progress
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def future(self):
+        return self._future
+
+    def done(
+        self
+    ) -> bool:
+        return self._future.done()
+
+    @property
+    def status(self):
+        if not self._future.done():
+            return 'running'
+        elif self._future.cancelled() or isinstance(self._future.exception(), SimulationCancelled):
+            return 'cancelled'
+        elif self._future.exception() is not None:
+            return 'failed'
+        return 'done'
+
+    def cancel(
+        self
+    ):
+        """ Request the cancellation. A queued job never starts and a running job stops at the next solver step. """
+        self._cancel.set()
+        self._future.cancel()
+
+    def result(
+        self,
+        timeout: float=None
+    ):
+        """ Wait for and return the result of the simulation.
+
+        Raises
+        ------
+        SimulationCancelled
+            If the job was cancelled.
+
+        """
+        try:
+            return self._future.result(timeout)
+        except CancelledError:
+            raise SimulationCancelled("The simulation was cancelled.") from None
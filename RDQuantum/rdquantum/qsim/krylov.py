@@ -0,0 +1,158 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional, Callable
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import expm
+
+if TYPE_CHECKING:
+    import qutip
+
+def arnoldi_expm(
+    A: sp.csr_matrix=None,
+    psi: np.ndarray=None,
+    dt: float=None,
+    tol: float=1e-10,
+    max_dim: int=40,
+    hermitian: bool=True
+) -> tuple:
+    """ Approximate exp(-i A dt) psi in a Krylov subspace with an adaptive dimension.
+
+    Parameters
+    ----------
+    A : :obj:`scipy.sparse.csr_matrix`
+        The (hamiltonian) matrix.
+    psi : :obj:`numpy.ndarray`
+        The state vector.
+    dt : float
+        The time step.
+    tol : float
+        The tolerance of the a posteriori error estimate.
+    max_dim : int
+        The maximum dimension of the Krylov subspace.
+    hermitian : bool
+        If `True`, use the Lanczos recurrence instead of the full Arnoldi orthogonalization.
+
+    Returns
+    -------
+    psi : :obj:`numpy.ndarray`
+        The propagated state vector.
+    error : float
+        The a posteriori error estimate.
+    converged : bool
+        Whether the error estimate is within `tol`.
+
+    Notes
+    -----
+    The Krylov subspace grows until the error estimate
+    :math:`\\beta \\, dt \\, h_{m+1,m} \\, |e_m^T \\exp(-i H_m dt) e_1|` is below `tol` or an invariant subspace is
+    found (happy breakdown).
+
+    """
+    beta = np.linalg.norm(psi)
+    if beta == 0.0:
+        return psi, 0.0, True
+
+    dim = len(psi)
+    max_dim = min(max_dim, dim)
+    V = np.zeros((max_dim + 1, dim), dtype=complex)
+    H = np.zeros((max_dim + 1, max_dim), dtype=complex)
+    V[0] = psi / beta
+
+    error = np.inf
+    for m in range(max_dim):
+        w = A @ V[m]
+        first = max(0, m - 1) if hermitian else 0
+        for i in range(first, m + 1):
+            H[i, m] = np.vdot(V[i], w)
+            w = w - H[i, m] * V[i]
+        H[m + 1, m] = np.linalg.norm(w)
+
+        small = expm(-1j * dt * H[:m + 1, :m + 1])[:, 0]
+        if H[m + 1, m] < 1e-14 * beta:
+            # Happy breakdown: the Krylov subspace is invariant and the result is exact.
+            return beta * (V[:m + 1].T @ small), 0.0, True
+
+        error = beta * abs(H[m + 1, m] * dt * small[m])
+        if error < tol:
+            return beta * (V[:m + 1].T @ small), error, True
+        V[m + 1] = w / H[m + 1, m]
+
+    return beta * (V[:max_dim].T @ small), error, False
+
+def evolve_krylov(
+    H: list=None,
+    init_state: np.ndarray=None,
+    tlist: np.ndarray=None,
+    tol: float=1e-10,
+    max_dim: int=40,
+    observe: Callable=None,
+    progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+) -> np.ndarray:
+    """ Evolve a state with Krylov subspace exponentials between the samples of a compiled hamiltonian.
+
+    Parameters
+    ----------
+    H : list
+        The hamiltonian in the format returned by :meth:`Hamiltonian.compile`.
+    init_state : :obj:`numpy.ndarray`
+        The flat initial state vector.
+    tlist : :obj:`numpy.ndarray`
+        The times of the samples of the coefficients and the output states.
+    tol : float
+        The tolerance of the Krylov error estimate per step.
+    max_dim : int
+        The maximum dimension of the Krylov subspace. A step whose error estimate exceeds `tol` is split into
+        halves.
+    observe : Callable, optional
+        A function mapping states, an array of shape (num_states, dim), to the values of observables of shape
+        (num_states, num_targets), e.g. :meth:`Observables.evaluate`. Only the values are kept.
+    progress_bar : :obj:`qutip.ui.progressbar.BaseProgressBar`, optional
+        A QuTip progress bar updated with the number of finished samples, e.g. to report the progress or to stop a
+        job by raising in its `update`.
+
+    Returns
+    -------
+    states : :obj:`numpy.ndarray`
+        The states at `tlist` as an array of shape (len(tlist), dim). With `observe`, the values of the observables
+        of shape (len(tlist), num_targets).
+
+    Notes
+    -----
+    Between two samples the hamiltonian is frozen at the mean of the coefficients at both samples (exponential
+    midpoint rule), which is second order in the sample spacing. Each exponential is approximated in a truncated
+    Krylov basis, so even a constant hamiltonian is only propagated to within the error estimate `tol` per step.
+
+    """
+    operators = [sp.csr_matrix(operator.data) for operator, _ in H]
+    coeffs = [np.asarray(coeff) for _, coeff in H]
+    hermitian = all(abs(operator - operator.getH()).max() < 1e-12 for operator in operators) and all(
+        np.all(np.isreal(coeff)) for coeff in coeffs
+    )
+
+    if observe is None:
+        observe = lambda psi: psi
+
+    psi = np.asarray(init_state, dtype=complex).ravel()
+    value = observe(psi[None, :])[0]
+    states = np.empty((len(tlist), len(value)), dtype=complex)
+    states[0] = value
+    if progress_bar is not None:
+        progress_bar.start(len(tlist))
+    for k in range(len(tlist) - 1):
+        A = sum(operator * (0.5 * (coeff[k] + coeff[k+1])) for operator, coeff in zip(operators, coeffs))
+        steps = [tlist[k+1] - tlist[k]]
+        while steps:
+            dt = steps.pop()
+            _psi, _, converged = arnoldi_expm(A, psi, dt, tol, max_dim, hermitian)
+            if converged:
+                psi = _psi
+            else:
+                steps += [0.5 * dt, 0.5 * dt]
+        states[k+1] = observe(psi[None, :])[0]
+        if progress_bar is not None:
+            progress_bar.update(k + 2)
+
+    if progress_bar is not None:
+        progress_bar.finished()
+    return states
@@ -0,0 +1,241 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional, Callable
+
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.interpolate import CubicSpline
+from scipy.sparse.linalg import LinearOperator
+
+if TYPE_CHECKING:
+    import qutip
+    from .operator import Operator
+    from .hamiltonian import Hamiltonian
+
+class MatrixFreeOperator:
+    """ An operator stored as local factors on its target subsystems.
+
+    Parameters
+    ----------
+    operator : :obj:`Operator`
+        The operator.
+
+    Attributes
+    ----------
+    dims : list
+        The dimensions of the quantum subsystems.
+    terms : list
+        A list of tuples (axes, local) with `axes` the sorted indices of the target subsystems and `local` the dense
+        matrix of the operator on these subsystems.
+
+    """
+    def __init__(
+        self,
+        operator: Operator=None
+    ):
+        qsystem = operator.qsystem
+        self._dims = [
+            len(qsystem.get_species(index).energy_levels) for index in range(qsystem.num_quantas)
+        ]
+
+        terms = {}
+        for coefficient, transition in operator.transitions:
+            axes = tuple(sorted(transition.keys()))
+            local_dims = [self._dims[axis] for axis in axes]
+            if axes not in terms:
+                local_dim = int(np.prod(local_dims))
+                terms[axes] = np.zeros((local_dim, local_dim), dtype=complex)
+            row = np.ravel_multi_index(
+                [qsystem.get_species(axis).map_level_to_index(transition[axis][0]) for axis in axes], local_dims
+            )
+            col = np.ravel_multi_index(
+                [qsystem.get_species(axis).map_level_to_index(transition[axis][1]) for axis in axes], local_dims
+            )
+            terms[axes][row, col] += coefficient
+        self._terms = list(terms.items())
+
+    @property
+    def dims(self):
+        return self._dims
+
+    @property
+    def terms(self):
+        return self._terms
+
+    def apply(
+        self,
+        psi: np.ndarray=None
+    ) -> np.ndarray:
+        """ Apply the operator to a state tensor of shape `dims` by contracting only the target axes. """
+        out = np.zeros_like(psi)
+        for axes, local in self._terms:
+            num_axes = len(axes)
+            moved = np.moveaxis(psi, axes, range(num_axes))
+            shape = moved.shape
+            _out = (local @ moved.reshape(local.shape[1], -1)).reshape(shape)
+            out += np.moveaxis(_out, range(num_axes), axes)
+
+        return out
+
+class MatrixFreeHamiltonian:
+    """ A matrix-free representation of the hamiltonian applying H(t)·ψ without materializing any matrix.
+
+    Parameters
+    ----------
+    hamiltonian : :obj:`Hamiltonian`
+        The hamiltonian.
+    operation_time : float
+        The operation duration of the quantum dynamics.
+    num_samples : int
+        The number of samples of the pulses.
+
+    Notes
+    -----
+    The sampled pulses are interpolated by cubic splines, the same as the array coefficients of QuTip.
+
+    """
+    def __init__(
+        self,
+        hamiltonian: Hamiltonian=None,
+        operation_time: float=None,
+        num_samples: int=None
+    ):
+        qsystem = hamiltonian.qsystem
+        # The dims come from the system, so a hamiltonian without operators is the zero operator.
+        self._dims = [
+            len(qsystem.get_species(index).energy_levels) for index in range(qsystem.num_quantas)
+        ]
+        tlist = np.linspace(0.0, operation_time, num_samples)
+        self._operators = []
+        self._coefficients = []
+        for key in hamiltonian.keys:
+            self._operators.append(MatrixFreeOperator(hamiltonian.get_operator(key)))
+            pulse_tlist = hamiltonian.get_pulse(key).generate_tlist(operation_time, num_samples)
+            self._coefficients.append(CubicSpline(tlist, pulse_tlist))
+
+    @property
+    def dims(self):
+        return self._dims
+
+    @property
+    def dim(self):
+        return int(np.prod(self._dims))
+
+    def matvec(
+        self,
+        t: float=None,
+        psi: np.ndarray=None
+    ) -> np.ndarray:
+        """ Return H(t)·ψ for a flat state vector ψ. """
+        psi = psi.reshape(self._dims)
+        out = np.zeros_like(psi, dtype=complex)
+        for operator, coefficient in zip(self._operators, self._coefficients):
+            out += coefficient(t) * operator.apply(psi)
+
+        return out.ravel()
+
+    def check_hermitian(
+        self,
+        tlist: np.ndarray=None,
+        seed: int=0
+    ):
+        """ Check that H(t) is Hermitian at the times `tlist` by comparing <x|H y> and <H x|y> for random states,
+        which costs two products per time instead of a matrix.
+
+        Raises
+        ------
+        ValueError
+            If the hamiltonian is not Hermitian, e.g. with a complex pulse on a Hermitian operator (see
+            :meth:`Hamiltonian.check_hermitian`).
+
+        """
+        rng = np.random.default_rng(seed)
+        x = rng.normal(size=self.dim) + 1j * rng.normal(size=self.dim)
+        y = rng.normal(size=self.dim) + 1j * rng.normal(size=self.dim)
+        for t in tlist:
+            Hx = self.matvec(t, x)
+            Hy = self.matvec(t, y)
+            scale = max(np.linalg.norm(Hx) * np.linalg.norm(y), np.linalg.norm(Hy) * np.linalg.norm(x))
+            if abs(np.vdot(x, Hy) - np.vdot(Hx, y)) > 1e-10 * max(scale, 1.0):
+                raise ValueError(
+                    "The hamiltonian is not Hermitian. A complex pulse has to drive a one-sided operator |a><b| "
+                    "paired with the conjugate pulse on |b><a|."
+                )
+
+    def as_linear_operator(
+        self,
+        t: float=None
+    ) -> LinearOperator:
+        """ Return H(t) as a :obj:`scipy.sparse.linalg.LinearOperator`. """
+        return LinearOperator(
+            (self.dim, self.dim),
+            matvec=lambda psi: self.matvec(t, np.ravel(psi)),
+            dtype=complex
+        )
+
+    def evolve(
+        self,
+        init_state: np.ndarray=None,
+        tlist: np.ndarray=None,
+        method: str='DOP853',
+        rtol: float=1e-8,
+        atol: float=1e-10,
+        observe: Callable=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ) -> np.ndarray:
+        """ Integrate the Schrödinger equation with an explicit Runge-Kutta method.
+
+        Parameters
+        ----------
+        init_state : :obj:`numpy.ndarray`
+            The flat initial state vector.
+        tlist : :obj:`numpy.ndarray`
+            The times of the output states.
+        method : str
+            The Runge-Kutta method of :func:`scipy.integrate.solve_ivp`.
+        rtol : float
+            The relative tolerance.
+        atol : float
+            The absolute tolerance.
+        observe : Callable, optional
+            A function mapping states, an array of shape (num_states, dim), to the values of observables of shape
+            (num_states, num_targets), e.g. :meth:`Observables.evaluate`. Only the values are kept.
+        progress_bar : :obj:`qutip.ui.progressbar.BaseProgressBar`, optional
+            A QuTip progress bar updated with the number of finished samples, e.g. to report the progress or to stop a
+            job by raising in its `update`.
+
+        Returns
+        -------
+        states : :obj:`numpy.ndarray`
+            The states at `tlist` as an array of shape (len(tlist), dim). With `observe`, the values of the
+            observables of shape (len(tlist), num_targets).
+
+        """
+        if observe is None:
+            observe = lambda psi: psi
+
+        psi = np.asarray(init_state, dtype=complex).ravel()
+        value = observe(psi[None, :])[0]
+        states = np.empty((len(tlist), len(value)), dtype=complex)
+        states[0] = value
+        # Integrate sample by sample so only the current state is kept.
+        if progress_bar is not None:
+            progress_bar.start(len(tlist))
+        for k in range(len(tlist) - 1):
+            results = solve_ivp(
+                lambda t, psi: -1j * self.matvec(t, psi),
+                (tlist[k], tlist[k+1]),
+                psi,
+                method=method,
+                rtol=rtol,
+                atol=atol
+            )
+            if not results.success:
+                raise RuntimeError(results.message)
+            psi = results.y[:, -1]
+            states[k+1] = observe(psi[None, :])[0]
+            if progress_bar is not None:
+                progress_bar.update(k + 2)
+
+        if progress_bar is not None:
+            progress_bar.finished()
+        return states
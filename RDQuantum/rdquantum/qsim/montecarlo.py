@@ -0,0 +1,203 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.integrate import solve_ivp
+from scipy.interpolate import CubicSpline
+
+from .observables import Observables
+
+# The hamiltonian, collapse operators and observables shared by the trajectories, set once per worker process.
+_shared = {}
+
+def _init_worker(
+    shared: dict=None
+):
+    _shared.clear()
+    _shared.update(shared)
+
+def _expectations(
+    observables: Observables=None,
+    states: np.ndarray=None
+) -> np.ndarray:
+    """ Evaluate expectation values, i.e. populations for ket targets, of normalized state vectors. """
+    values = observables.evaluate(states)
+    for k, target in enumerate(observables.targets):
+        if target.isket:
+            values[:, k] = np.abs(values[:, k])**2
+
+    return values
+
+def _run_trajectory(
+    seed: np.random.SeedSequence=None
+) -> np.ndarray:
+    """ Run a single quantum trajectory with the waiting-time (jump) method. """
+    rng = np.random.default_rng(seed)
+    operators = _shared["operators"]
+    coefficients = _shared["coefficients"]
+    c_ops = _shared["c_ops"]
+    damping = _shared["damping"]
+    tlist = _shared["tlist"]
+    rtol, atol = _shared["tolerance"]
+
+    def rhs(t, psi):
+        out = damping @ psi
+        for operator, coefficient in zip(operators, coefficients):
+            out = out + coefficient(t) * (operator @ psi)
+        return -1j * out
+
+    psi = np.array(_shared["init_state"], dtype=complex)
+    t = tlist[0]
+    threshold = rng.random()
+    states = np.empty((len(tlist), len(psi)), dtype=complex)
+    states[0] = psi / np.linalg.norm(psi)
+    index = 1
+    while index < len(tlist):
+        event = lambda t, psi: np.vdot(psi, psi).real - threshold
+        event.terminal = True
+        event.direction = -1
+        results = solve_ivp(
+            rhs, (t, tlist[-1]), psi, method='DOP853', t_eval=tlist[index:], events=event, rtol=rtol, atol=atol
+        )
+        if not results.success:
+            raise RuntimeError(results.message)
+
+        # `y` is empty when the jump happens before the next output time.
+        y = np.asarray(results.y, dtype=complex).reshape(len(psi), -1)
+        num_outputs = y.shape[1]
+        states[index:index + num_outputs] = (y / np.linalg.norm(y, axis=0)).T
+        index += num_outputs
+
+        if results.status == 1:
+            # Quantum jump: apply a collapse operator with probability proportional to ||c psi||^2.
+            t = results.t_events[0][0]
+            psi = results.y_events[0][0]
+            jumped = [c_op @ psi for c_op in c_ops]
+            weights = np.array([np.vdot(_psi, _psi).real for _psi in jumped])
+            jump = rng.choice(len(c_ops), p=weights / weights.sum())
+            psi = jumped[jump] / np.sqrt(weights[jump])
+            threshold = rng.random()
+
+    return _expectations(_shared["observables"], states)
+
+def _run_batch(
+    seeds: list=None
+) -> tuple:
+    """ Run a batch of trajectories and return the sum and the sum of squared moduli of the values. """
+    values = np.array([_run_trajectory(seed) for seed in seeds])
+    return len(seeds), values.sum(axis=0), (np.abs(values)**2).sum(axis=0)
+
+def iter_trajectories(
+    H: list=None,
+    c_ops: list=None,
+    init_state: np.ndarray=None,
+    tlist: np.ndarray=None,
+    observables: Observables=None,
+    ntraj: int=500,
+    target_error: float=None,
+    seed: int=None,
+    max_workers: int=None,
+    batch_size: int=None,
+    tolerance: tuple=(1e-8, 1e-10)
+):
+    """ Run quantum trajectories in a process pool and yield the running averages of the observables.
+
+    Parameters
+    ----------
+    H : list
+        The hamiltonian in the format returned by :meth:`Hamiltonian.compile`.
+    c_ops : list
+        The collapse operators (:obj:`qutip.Qobj`).
+    init_state : :obj:`numpy.ndarray`
+        The flat initial state vector.
+    tlist : :obj:`numpy.ndarray`
+        The times of the samples of the coefficients and the output values.
+    observables : :obj:`Observables`
+        The targets. A ket target gives its population and an operator target its expectation value.
+    ntraj : int
+        The maximum number of trajectories.
+    target_error : float, optional
+        Stop when the standard error of every value is below `target_error`.
+    seed : int, optional
+        The seed of the :obj:`numpy.random.SeedSequence` spawning an independent stream for every trajectory.
+    max_workers : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+    batch_size : int, optional
+        The number of trajectories per task.
+    tolerance : tuple
+        The relative and absolute tolerance of the integrator.
+
+    Yields
+    ------
+    num_trajectories : int
+        The number of finished trajectories.
+    mean : :obj:`numpy.ndarray`
+        The running average of the values of shape (len(tlist), num_targets).
+    error : :obj:`numpy.ndarray`
+        The standard error of the running average.
+
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    batch_size = batch_size or max(1, min(16, ntraj // (4 * max_workers)))
+    seeds = np.random.SeedSequence(seed).spawn(ntraj)
+    batches = [seeds[i:i + batch_size] for i in range(0, ntraj, batch_size)]
+
+    c_ops = [sp.csr_matrix(c_op.data) for c_op in c_ops]
+    dim = np.size(init_state)
+    shared = {
+        "operators": [sp.csr_matrix(operator.data) for operator, _ in H],
+        "coefficients": [CubicSpline(tlist, coeff) for _, coeff in H],
+        "c_ops": c_ops,
+        "damping": -0.5j * sum((c_op.getH() @ c_op for c_op in c_ops), sp.csr_matrix((dim, dim), dtype=complex)),
+        "init_state": np.asarray(init_state, dtype=complex).ravel(),
+        "tlist": tlist,
+        "observables": observables,
+        "tolerance": tolerance
+    }
+
+    count = 0
+    total = 0.0
+    total_squared = 0.0
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(shared,)) as executor:
+        futures = [executor.submit(_run_batch, batch) for batch in batches]
+        try:
+            for future in as_completed(futures):
+                _count, _total, _total_squared = future.result()
+                count += _count
+                total = total + _total
+                total_squared = total_squared + _total_squared
+
+                mean = total / count
+                variance = np.maximum(total_squared / count - np.abs(mean)**2, 0.0)
+                error = np.sqrt(variance / max(count - 1, 1))
+                yield count, mean, error
+
+                if target_error is not None and count > 1 and np.all(error < target_error):
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+def mcsolve(
+    *args,
+    **kwargs
+) -> tuple:
+    """ Run quantum trajectories until `ntraj` or `target_error` is reached (see :func:`iter_trajectories`).
+
+    Returns
+    -------
+    mean : :obj:`numpy.ndarray`
+        The average of the values of shape (len(tlist), num_targets).
+    error : :obj:`numpy.ndarray`
+        The standard error of the average.
+
+    """
+    mean = error = None
+    for _, mean, error in iter_trajectories(*args, **kwargs):
+        pass
+
+    return mean, error
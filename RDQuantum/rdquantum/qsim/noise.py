@@ -1,19 +1,124 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Optional
 
+import numpy as np
+import qutip
+
+from .operator import Operator
+
 if TYPE_CHECKING:
     from .qsystem import QSystem
 
 class Noise:
+    """ The noise of the quantum system described by Lindblad collapse operators.
+
+    Attributes
+    ----------
+    qsystem : :obj:`QSystem`, optional
+        The quantum system.
+    keys : list
+        A list of keys of noise channels.
+    operators : dict
+        The jump operators of each channel represented by a `dict` {"key": [:obj:`Operator`]}, one operator per
+        target.
+    rates : dict
+        The rates of the channels represented by a `dict` {"key": float}.
+
+    """
     def __init__(
         self,
-        qsystem: Qsystem
+        qsystem: QSystem
     ):
-        pass
+        self._qsystem = qsystem
+        self._operators = {}
+        self._rates = {}
+        self._dissipator = None
+
+    @property
+    def qsystem(self):
+        return self._qsystem
 
     @property
     def keys(self):
-        return []
+        return list(self._operators.keys())
+
+    @property
+    def operators(self):
+        return self._operators
+
+    @property
+    def rates(self):
+        return self._rates
+
+    def add(
+        self,
+        key: str=None,
+        target: list=None,
+        rate: float=None,
+        dm_recipe: dict=None
+    ):
+        """ Add a noise channel, e.g. decay with the jump operator $\\ket{g}\\bra{e}$ or dephasing with
+        $\\ket{e}\\bra{e}$.
+
+        Parameters
+        ----------
+        key : str
+            The key of the channel.
+        target : list
+            The target subsystems represented by a list of index of the `qsystem`. Every target decays
+            independently with its own collapse operator.
+        rate : float
+            The rate of the channel.
+        dm_recipe : dict
+            The `dict` representation of the jump operator, the same as :meth:`Hamiltonian.add`. The "constant" is
+            optional.
+
+        """
+        if key in self.keys:
+            raise ValueError("The key already exist.")
+        elif rate < 0:
+            raise ValueError("The rate must be non-negative.")
+        else:
+            self._operators[key] = [
+                Operator(
+                    self._qsystem,
+                    [_target],
+                    sub_dm = dm_recipe["subdm"],
+                    sub_op = dm_recipe["subop"],
+                    constant = dm_recipe.get("constant", 1.0)
+                )
+                for _target in target
+            ]
+            self._rates[key] = rate
+            self._dissipator = None
+
+    def remove(
+        self,
+        key: str=None
+    ):
+        """ Remove the noise channel `key`. """
+        del self._operators[key]
+        del self._rates[key]
+        self._dissipator = None
+
+    def to_recipe(
+        self
+    ) -> list:
+        """ Return the noise channels as a JSON-serializable list of recipes accepted by :meth:`add`. """
+        recipes = []
+        for key, operators in self._operators.items():
+            recipes.append({
+                "key": key,
+                "target": [list(operator.target[0]) for operator in operators],
+                "rate": self._rates[key],
+                "dm": {
+                    "subdm": [list(_sub_dm) for _sub_dm in operators[0].sub_dm],
+                    "subop": list(operators[0].sub_op),
+                    "constant": operators[0].constant
+                }
+            })
+
+        return recipes
 
     def compile(
         self
@@ -21,4 +126,22 @@ class Noise:
         """ Return noise in the format required by QuTip.solver (c_ops).
 
         """
-        pass
+        c_ops = []
+        for key in self._operators.keys():
+            for operator in self._operators[key]:
+                c_ops.append(np.sqrt(self._rates[key]) * operator.dm)
+
+        return c_ops
+
+    def dissipator(
+        self
+    ) -> qutip.Qobj:
+        """ Return the time-independent dissipative part of the Liouvillian as a sparse superoperator.
+
+        The dissipator is cached until the noise channels change, so repeated runs only rebuild the coherent part.
+
+        """
+        if self._dissipator is None:
+            self._dissipator = sum(qutip.lindblad_dissipator(c_op) for c_op in self.compile())
+
+        return self._dissipator
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional, Callable
+
+import numpy as np
+import scipy.sparse as sp
+import qutip
+
+class Observables:
+    """ Target projections and expectation operators evaluated during the simulation.
+
+    Parameters
+    ----------
+    targets : list
+        A list of :obj:`qutip.Qobj`. A ket target gives the complex overlap :math:`\\braket{s|\\psi}` and an operator
+        target gives the expectation value :math:`\\braket{\\psi|O|\\psi}`. For density matrices, a ket target gives
+        the population :math:`\\braket{s|\\rho|s}` and an operator target gives :math:`\\mathrm{Tr}(O \\rho)`.
+
+    Attributes
+    ----------
+    targets : list
+        The targets.
+    num_targets : int
+        The number of targets.
+
+    """
+    def __init__(
+        self,
+        targets: list=None
+    ):
+        self._targets = list(targets)
+
+    @property
+    def targets(self):
+        return self._targets
+
+    @property
+    def num_targets(self):
+        return len(self._targets)
+
+    def transform(
+        self,
+        function: Callable=None
+    ) -> Observables:
+        """ Return the observables with `function` applied to every target, e.g. :meth:`Subspace.restrict`. """
+        return Observables([function(target) for target in self._targets])
+
+    def evaluate(
+        self,
+        states: np.ndarray=None
+    ) -> np.ndarray:
+        """ Evaluate the observables of a batch of state vectors.
+
+        Parameters
+        ----------
+        states : :obj:`numpy.ndarray`
+            The state vectors as an array of shape (num_states, dim).
+
+        Returns
+        -------
+        values : :obj:`numpy.ndarray`
+            The values of the observables as an array of shape (num_states, num_targets).
+
+        """
+        states = np.atleast_2d(states)
+        values = np.empty((states.shape[0], self.num_targets), dtype=complex)
+        for k, target in enumerate(self._targets):
+            if target.isket:
+                values[:, k] = states @ target.full().ravel().conj()
+            else:
+                values[:, k] = np.sum(states.conj() * (sp.csr_matrix(target.data) @ states.T).T, axis=1)
+
+        return values
+
+    def __call__(
+        self,
+        t: float=None,
+        state: qutip.Qobj=None
+    ) -> np.ndarray:
+        """ Evaluate the observables of a ket or density matrix, in the form of the QuTip `e_ops` callback. """
+        if state.isket:
+            return self.evaluate(state.full().ravel())[0]
+
+        rho = state.full()
+        values = np.empty(self.num_targets, dtype=complex)
+        for k, target in enumerate(self._targets):
+            if target.isket:
+                s = target.full().ravel()
+                values[k] = s.conj() @ rho @ s
+            else:
+                values[k] = np.sum(target.full().T * rho)
+
+        return values
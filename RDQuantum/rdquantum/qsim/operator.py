@@ -1,11 +1,121 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Optional
+import threading
+from collections import OrderedDict
 
+import numpy as np
+import scipy.sparse as sp
 import qutip
 
 if TYPE_CHECKING:
     from . import QSystem
 
+class OperatorCache:
+    """ A LRU cache of operator density matrices.
+
+    Operators are keyed by the signature of the quantum system and the recipe of the operator, so rebuilding an
+    unchanged Hamiltonian does not construct any matrix.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The memory budget of the cached sparse matrices in bytes.
+
+    Attributes
+    ----------
+    hits : int
+        The number of cache hits.
+    misses : int
+        The number of cache misses.
+    nbytes : int
+        The memory used by the cached sparse matrices in bytes.
+
+    Notes
+    -----
+    The cache is shared by all threads of the process, e.g. the sessions of the UI and the jobs of
+    :meth:`QSim.submit`, so every access holds a lock.
+
+    """
+    def __init__(
+        self,
+        max_bytes: int=256 * 1024**2
+    ):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(
+        self,
+        key: tuple=None
+    ) -> Optional[qutip.Qobj]:
+        """ Return the cached density matrix of `key`, or `None` if it is not cached. """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            else:
+                self.misses += 1
+                return None
+
+    def put(
+        self,
+        key: tuple=None,
+        dm: qutip.Qobj=None
+    ):
+        """ Cache the density matrix `dm` under `key` and evict the least recently used entries over budget. """
+        data = dm.data
+        nbytes = data.data.nbytes + data.indices.nbytes + data.indptr.nbytes
+        with self._lock:
+            if nbytes > self._max_bytes:
+                return
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (dm, nbytes)
+            self._nbytes += nbytes
+            self._evict()
+
+    def clear(
+        self
+    ):
+        """ Remove all entries and reset the counters. """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(
+        self
+    ):
+        """ Evict the least recently used entries over budget. The caller holds the lock. """
+        while self._nbytes > self._max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= nbytes
+
+
+operator_cache = OperatorCache()
+
 class Operator:
     def __init__(
         self,
@@ -17,12 +127,23 @@ class Operator:
     ):
         self._qsystem = qsystem
         self._target = target
-        self._dm = self._generate_dm(
-            target, 
+        self._sub_dm = sub_dm
+        self._sub_op = sub_op
+        self._constant = constant
+        self._key = (
+            qsystem.signature,
+            tuple(tuple(_target) for _target in target),
+            tuple(tuple(_sub_dm) for _sub_dm in sub_dm),
+            tuple(sub_op),
+            constant
+        )
+        self._transitions_list = self._transitions(
+            target,
             sub_dm,
             sub_op,
             constant
         )
+        self._dm = None
 
     @property
     def qsystem(self):
@@ -32,10 +153,100 @@ class Operator:
     def target(self):
         return self._target
 
+    @property
+    def sub_dm(self):
+        return self._sub_dm
+
+    @property
+    def sub_op(self):
+        return self._sub_op
+
+    @property
+    def constant(self):
+        return self._constant
+
+    @property
+    def key(self):
+        """ The hashable recipe of the operator including the signature of the `qsystem`. """
+        return self._key
+
+    @property
+    def transitions(self):
+        """ The operator expanded into a list of tuples (coefficient, transition).
+
+        The transition is a `dict` with the key the index of the quantum subsystem and the value a tuple of symbols
+        representing the energy level transition.
+
+        """
+        return self._transitions_list
+
     @property
     def dm(self):
+        """ The density matrix of the operator on the full Hilbert space, generated on first access. """
+        if self._dm is None:
+            self._dm = operator_cache.get(self._key)
+            if self._dm is None:
+                self._dm = self._generate_dm(
+                    self._target,
+                    self._sub_dm,
+                    self._sub_op,
+                    self._constant
+                )
+                operator_cache.put(self._key, self._dm)
         return self._dm
 
+    def _dims(
+        self
+    ) -> list:
+        """ Return the dimensions of the quantum subsystems. """
+        return [
+            len(self._qsystem.get_species(index).energy_levels)
+            for index in range(self._qsystem.num_quantas)
+        ]
+
+    def _transition_indices(
+        self,
+        transition: dict=None,
+    ) -> tuple:
+        """ Compute the nonzero entries of an embedded single transition.
+
+        Parameters
+        ----------
+        transition : dict
+            The `dict` representation of the operator with the key the index of the quantum subsystem and the value a
+            tuple of symbols representing the energy level transition e.g. ("e","g") for the transition $\ket{e} \bra{g}$.
+
+        Returns
+        -------
+        rows : :obj:`numpy.ndarray`
+            Row indices of the nonzero entries in the full Hilbert space.
+        cols : :obj:`numpy.ndarray`
+            Column indices of the nonzero entries in the full Hilbert space.
+
+        Notes
+        -----
+        The embedded transition has exactly one unit entry for every basis state of the untouched subsystems, so the
+        indices are the offset of the transition plus every combination of the strides of the untouched subsystems.
+
+        """
+        dims = self._dims()
+        strides = np.ones(len(dims), dtype=np.int64)
+        for index in range(len(dims) - 2, -1, -1):
+            strides[index] = strides[index + 1] * dims[index + 1]
+
+        row = 0
+        col = 0
+        offsets = np.zeros(1, dtype=np.int64)
+        for index in range(len(dims)):
+            if index in transition.keys():
+                quanta = self._qsystem.get_species(index)
+                row += quanta.map_level_to_index(transition[index][0]) * strides[index]
+                col += quanta.map_level_to_index(transition[index][1]) * strides[index]
+            else:
+                offsets = (offsets[:, None] + np.arange(dims[index]) * strides[index]).ravel()
+
+        return row + offsets, col + offsets
+
     def _generate_single_transition_dm(
         self,
         transition: dict=None,
@@ -59,44 +270,52 @@ class Operator:
 
         """
         # To Do: Check if the symbols is correct.
-        # Generate density matrix.
-        sub_dm = []
-        for index in range(self._qsystem.num_quantas):
-            quanta = self._qsystem.get_species(index)
-            dim = len(quanta.energy_levels)
-            if index in transition.keys():
-                level_ket = transition[index][0]
-                level_bra = transition[index][1]
-                sub_dm.append(
-                    qutip.basis(dim, quanta.map_level_to_index(level_ket))
-                    * qutip.basis(dim, quanta.map_level_to_index(level_bra)).dag()
-                )
-            else:
-                sub_dm.append(qutip.qeye(dim))
+        rows, cols = self._transition_indices(transition)
+        data = np.ones(len(rows), dtype=complex)
+
+        return self._assemble(rows, cols, data)
+
+    def _assemble(
+        self,
+        rows: np.ndarray=None,
+        cols: np.ndarray=None,
+        data: np.ndarray=None
+    ) -> qutip.Qobj:
+        """ Assemble COO entries into a sparse (CSR) :obj:`qutip.Qobj` on the full Hilbert space.
 
-        dm = qutip.tensor(sub_dm)
+        Duplicated entries are summed.
 
-        return dm
+        """
+        dims = self._dims()
+        dim = int(np.prod(dims))
+        matrix = sp.coo_matrix((data, (rows, cols)), shape=(dim, dim)).tocsr()
+        matrix.eliminate_zeros()
 
-    def _generate_dm(
+        return qutip.Qobj(matrix, dims=[dims, dims])
+
+    def _transitions(
         self,
         target: list=None,
         sub_dm: list=None,
         sub_op: list=None,
         constant: float=None
-    ) -> qutip.Qobj:
-        """ Generate the density metrix of an operator.
+    ) -> list:
+        """ Expand the operator formula into its single transitions.
 
         Parameters
         ----------
-        qsystem : :obj:`QSystem`, optional
-            The quantum system.
         target : list
             The target subsystems of the operator represented by a list of tuples of index of the `qsystem`.
         sub_dm : list
         sub_op : list
         constant : float
 
+        Returns
+        -------
+        transitions : list
+            A list of tuples (coefficient, transition) where the transition is the `dict` representation used by
+            :meth:`_generate_single_transition_dm`.
+
         """
         num_sub_dm = len(sub_dm)
         num_sub_op = len(sub_op)
@@ -107,30 +326,66 @@ class Operator:
                 %(num_sub_dm, num_sub_op)
             )
 
-        _dm = []
-        # Calculate the density matrix for each target subsystem.
+        # The first `sub_dm` is always added, the others are combined with `sub_op`.
+        signs = [1.0]
+        for i in range(num_sub_op):
+            if sub_op[i] == "+":
+                signs.append(1.0)
+            elif sub_op[i] == "-":
+                signs.append(-1.0)
+            else:
+                signs.append(0.0)
+
+        transitions = []
         for _target in target:
-            for _sub_dm in sub_dm:
+            for _sign, _sub_dm in zip(signs, sub_dm):
                 if len(_target) != len(_sub_dm[0]):
                     raise ValueError(
                         "The operator must operate on %s subsystems, but %s subsystems are given in target."
                         %(len(_sub_dm[0]), len(_target))
                     )
-                else:
+                elif _sign != 0.0:
                     transition = {}
                     for i in range(len(_target)):
                         transition[_target[i]] = (_sub_dm[0][i], _sub_dm[1][i])
-                    _dm.append(self._generate_single_transition_dm(transition))
-
-        dm = _dm[0]
-        # Combine density matrices with `sub_op`.
-        for j in range(len(target)):
-            if j > 0:
-                dm = dm + _dm[j*(num_sub_op+1)]
-            for i in range(num_sub_op):
-                if sub_op[i] == "+":
-                    dm = dm + _dm[j*(num_sub_op+1)+i+1]
-                elif sub_op[i] == "-":
-                    dm = dm - _dm[j*(num_sub_op+1)+i+1]
-
-        return constant * dm
+                    transitions.append((_sign * constant, transition))
+
+        return transitions
+
+    def _generate_dm(
+        self,
+        target: list=None,
+        sub_dm: list=None,
+        sub_op: list=None,
+        constant: float=None
+    ) -> qutip.Qobj:
+        """ Generate the density metrix of an operator.
+
+        Parameters
+        ----------
+        qsystem : :obj:`QSystem`, optional
+            The quantum system.
+        target : list
+            The target subsystems of the operator represented by a list of tuples of index of the `qsystem`.
+        sub_dm : list
+        sub_op : list
+        constant : float
+
+        Notes
+        -----
+        All transitions are accumulated in a single COO buffer and converted to CSR once.
+
+        """
+        rows = []
+        cols = []
+        data = []
+        for coefficient, transition in self._transitions(target, sub_dm, sub_op, constant):
+            _rows, _cols = self._transition_indices(transition)
+            rows.append(_rows)
+            cols.append(_cols)
+            data.append(np.full(len(_rows), coefficient, dtype=complex))
+
+        if not rows:
+            raise ValueError("The operator has no target subsystem.")
+
+        return self._assemble(np.concatenate(rows), np.concatenate(cols), np.concatenate(data))
@@ -0,0 +1,287 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from scipy.optimize import minimize, OptimizeResult
+
+from .pulse import Pulse, PulseSequence
+
+if TYPE_CHECKING:
+    from .qsim import QSim
+
+def grape(
+    drift: np.ndarray=None,
+    controls: np.ndarray=None,
+    amplitudes: np.ndarray=None,
+    dt: float=None,
+    init_states: np.ndarray=None,
+    target_states: np.ndarray=None
+) -> tuple:
+    """ Compute the state transfer fidelity of piecewise constant controls and its exact gradient (GRAPE).
+
+    Parameters
+    ----------
+    drift : :obj:`numpy.ndarray`
+        The uncontrolled hamiltonian of every slice of shape (num_slices, dim, dim).
+    controls : :obj:`numpy.ndarray`
+        The control operators of shape (num_controls, dim, dim).
+    amplitudes : :obj:`numpy.ndarray`
+        The control amplitudes of shape (num_controls, num_slices).
+    dt : float
+        The duration of a slice.
+    init_states : :obj:`numpy.ndarray`
+        The initial states as the columns of an array of shape (dim, num_states).
+    target_states : :obj:`numpy.ndarray`
+        The target states as the columns of an array of shape (dim, num_states).
+
+    Returns
+    -------
+    fidelity : float
+        The average fidelity :math:`\\frac{1}{M} \\sum_m |\\braket{\\phi_m|U \\psi_m}|^2`.
+    gradient : :obj:`numpy.ndarray`
+        The gradient of the fidelity with respect to the amplitudes of shape (num_controls, num_slices).
+
+    Notes
+    -----
+    Every slice is diagonalized, :math:`H_j = V E V^\\dagger`, which gives the propagator and its exact derivative
+    :math:`\\partial U_j / \\partial u_{kj} = V (G \\circ V^\\dagger A_k V) V^\\dagger` with
+    :math:`G_{ab} = (e^{-i E_a dt} - e^{-i E_b dt}) / (E_a - E_b)` and :math:`G_{aa} = -i dt e^{-i E_a dt}`. The
+    states are propagated forward and the targets backward once, and the gradients of all controls and slices are
+    evaluated in batched contractions.
+
+    """
+    H = drift + np.einsum('kj,kab->jab', amplitudes, controls)
+    energies, vectors = np.linalg.eigh(H)
+    phases = np.exp(-1j * energies * dt)
+    propagators = np.einsum('jab,jb,jcb->jac', vectors, phases, vectors.conj())
+
+    num_slices = len(H)
+    forward = np.empty((num_slices + 1,) + init_states.shape, dtype=complex)
+    forward[0] = init_states
+    for j in range(num_slices):
+        forward[j + 1] = propagators[j] @ forward[j]
+    backward = np.empty_like(forward)
+    backward[-1] = target_states
+    for j in range(num_slices - 1, -1, -1):
+        backward[j] = propagators[j].conj().T @ backward[j + 1]
+
+    overlaps = np.einsum('am,am->m', target_states.conj(), forward[-1])
+    num_states = init_states.shape[1]
+    fidelity = np.sum(np.abs(overlaps)**2) / num_states
+
+    gaps = energies[:, :, None] - energies[:, None, :]
+    degenerate = np.abs(gaps) < 1e-12
+    G = np.where(
+        degenerate,
+        -1j * dt * phases[:, :, None],
+        (phases[:, :, None] - phases[:, None, :]) / np.where(degenerate, 1.0, gaps)
+    )
+    # Costates and states of slice j in its eigenbasis.
+    _backward = np.einsum('jab,jam->jbm', vectors.conj(), backward[1:])
+    _forward = np.einsum('jab,jam->jbm', vectors.conj(), forward[:-1])
+    _controls = np.einsum('jia,kil,jlb->kjab', vectors.conj(), controls, vectors)
+    derivatives = np.einsum('jam,kjab,jab,jbm->kjm', _backward.conj(), _controls, G, _forward)
+    gradient = 2 * np.real(overlaps.conj()[None, None, :] * derivatives).sum(axis=2) / num_states
+
+    return fidelity, gradient
+
+class PulseOptimizer:
+    """ Optimize the pulses of a :obj:`QSim` hamiltonian for state transfers with GRAPE and L-BFGS-B.
+
+    Parameters
+    ----------
+    qsim : :obj:`QSim`
+        The simulator. The pulses of the keys that are not controlled are kept.
+    operation_time : float
+        The operation duration.
+    num_slices : int
+        The number of piecewise constant slices.
+    controls : list
+        The keys of the hamiltonian whose pulses are optimized as piecewise constant amplitudes.
+    parameters : dict, optional
+        The pulse params optimized instead of the amplitudes, represented by a `dict` {"key": ["param"]}. The
+        gradient of the params is the gradient of the amplitudes times the Jacobian of the pulse shape, which is
+        evaluated by central differences of the shape at the slice midpoints.
+
+    Attributes
+    ----------
+    controls : list
+        The keys of the controlled pulses.
+    x : :obj:`numpy.ndarray`
+        The current control vector.
+
+    """
+    def __init__(
+        self,
+        qsim: QSim=None,
+        operation_time: float=None,
+        num_slices: int=100,
+        controls: list=None,
+        parameters: dict=None
+    ):
+        hamiltonian = qsim.hamiltonian
+        self._hamiltonian = hamiltonian
+        self._operation_time = operation_time
+        self._num_slices = num_slices
+        self._dt = operation_time / num_slices
+        self._midpoints = (np.arange(num_slices) + 0.5) * self._dt
+        self._parameters = parameters
+        self._controls = list(parameters.keys()) if parameters is not None else list(controls)
+        for key in self._controls:
+            if key not in hamiltonian.keys:
+                raise ValueError("The key `%s` is not in the hamiltonian." %(key))
+
+        drift = 0.0
+        for key in hamiltonian.keys:
+            if key in self._controls:
+                continue
+            values = hamiltonian.get_pulse(key).envelope(operation_time)(self._midpoints)
+            drift = drift + values[:, None, None] * hamiltonian.get_operator(key).dm.full()[None]
+        self._control_ops = np.array([hamiltonian.get_operator(key).dm.full() for key in self._controls])
+        if np.ndim(drift) == 0:
+            drift = np.zeros((num_slices,) + self._control_ops.shape[1:], dtype=complex)
+        self._drift = drift
+
+        if parameters is None:
+            self.x = np.concatenate([
+                hamiltonian.get_pulse(key).envelope(operation_time)(self._midpoints).real for key in self._controls
+            ])
+        else:
+            self.x = np.array([
+                hamiltonian.get_pulse(key).params[param] for key in self._controls for param in parameters[key]
+            ], dtype=float)
+
+    @property
+    def controls(self):
+        return self._controls
+
+    def _pulses(
+        self,
+        x: np.ndarray=None
+    ) -> dict:
+        """ Return the controlled pulses for the control vector `x`. """
+        pulses = {}
+        if self._parameters is None:
+            amplitudes = x.reshape(len(self._controls), self._num_slices)
+            for key, _amplitudes in zip(self._controls, amplitudes):
+                pulses[key] = PulseSequence([
+                    {"duration": self._dt, "shape": "square", "kwargs": {"amplitude": float(amplitude)}}
+                    for amplitude in _amplitudes
+                ])
+        else:
+            index = 0
+            for key in self._controls:
+                pulse = self._hamiltonian.get_pulse(key)
+                params = dict(pulse.params)
+                for param in self._parameters[key]:
+                    params[param] = float(x[index])
+                    index += 1
+                pulses[key] = Pulse(pulse.shape, **params)
+
+        return pulses
+
+    def _amplitudes(
+        self,
+        x: np.ndarray=None
+    ) -> tuple:
+        """ Return the slice amplitudes of shape (num_controls, num_slices) and their Jacobian with respect to `x`
+        of shape (num_controls, num_slices, len(x)), or `None` for piecewise constant controls.
+
+        """
+        if self._parameters is None:
+            return x.reshape(len(self._controls), self._num_slices), None
+
+        def amplitudes(_x):
+            pulses = self._pulses(_x)
+            return np.array([
+                pulses[key].evaluate(self._midpoints, self._operation_time).real for key in self._controls
+            ])
+
+        jacobian = np.empty((len(self._controls), self._num_slices, len(x)))
+        for i in range(len(x)):
+            step = 1e-6 * max(1.0, abs(x[i]))
+            dx = np.zeros(len(x))
+            dx[i] = step
+            jacobian[:, :, i] = (amplitudes(x + dx) - amplitudes(x - dx)) / (2 * step)
+
+        return amplitudes(x), jacobian
+
+    def fidelity(
+        self,
+        x: np.ndarray=None,
+        init_states: list=None,
+        target_states: list=None
+    ) -> tuple:
+        """ Return the fidelity of the state transfers for the control vector `x` and its gradient. """
+        kets = np.hstack([state.full() for state in init_states])
+        targets = np.hstack([state.full() for state in target_states])
+        amplitudes, jacobian = self._amplitudes(x)
+        fidelity, gradient = grape(self._drift, self._control_ops, amplitudes, self._dt, kets, targets)
+        if jacobian is None:
+            return fidelity, gradient.ravel()
+        return fidelity, np.einsum('kj,kjp->p', gradient, jacobian)
+
+    def optimize(
+        self,
+        init_states: list=None,
+        target_states: list=None,
+        x0: np.ndarray=None,
+        bounds: list=None,
+        maxiter: int=200,
+        tol: float=1e-8
+    ) -> OptimizeResult:
+        """ Maximize the average fidelity of the state transfers `init_states` to `target_states` with L-BFGS-B.
+
+        Parameters
+        ----------
+        init_states : list
+            The initial kets (:obj:`qutip.Qobj`).
+        target_states : list
+            The target kets (:obj:`qutip.Qobj`).
+        x0 : :obj:`numpy.ndarray`, optional
+            The initial control vector. Defaults to the current pulses.
+        bounds : list, optional
+            The bounds of the controls for :func:`scipy.optimize.minimize`, e.g. (-amax, amax) for all of them.
+        maxiter : int
+            The maximum number of iterations.
+        tol : float
+            The tolerance of the infidelity.
+
+        Returns
+        -------
+        result : :obj:`scipy.optimize.OptimizeResult`
+            The result with the optimal control vector `x` and the `fidelity`. The optimal pulses are returned by
+            :meth:`pulses`.
+
+        """
+        x0 = self.x if x0 is None else np.asarray(x0, dtype=float)
+        if bounds is not None and len(bounds) == 2 and np.ndim(bounds[0]) == 0:
+            bounds = [tuple(bounds)] * len(x0)
+
+        def objective(x):
+            fidelity, gradient = self.fidelity(x, init_states, target_states)
+            return 1.0 - fidelity, -gradient
+
+        result = minimize(
+            objective, x0, jac=True, method='L-BFGS-B', bounds=bounds, tol=tol, options={"maxiter": maxiter}
+        )
+        self.x = result.x
+        result.fidelity = 1.0 - result.fun
+
+        return result
+
+    def pulses(
+        self
+    ) -> dict:
+        """ Return the controlled pulses of the current control vector represented by a `dict` {"key": :obj:`Pulse`},
+        a :obj:`PulseSequence` of `square` slices for piecewise constant controls.
+
+        """
+        return self._pulses(self.x)
+
+    def apply(
+        self
+    ):
+        """ Replace the controlled pulses of the hamiltonian by the optimized pulses. """
+        for key, pulse in self.pulses().items():
+            self._hamiltonian.pulses[key] = pulse
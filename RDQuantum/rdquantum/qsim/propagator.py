@@ -0,0 +1,246 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional, Callable
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import scipy.linalg
+from scipy.sparse.linalg import expm_multiply
+import qutip
+
+def is_piecewise_constant(
+    pulses: list=None
+) -> bool:
+    """ Check if the pulses are piecewise constant, i.e. `square` or a :obj:`PulseSequence` of `square` segments.
+
+    The samples cannot tell a smooth pulse from a piecewise constant one, so the check uses the pulses themselves.
+
+    """
+    return all(pulse.is_piecewise_constant for pulse in pulses)
+
+def constant_windows(
+    H: list=None,
+    tlist: np.ndarray=None
+) -> list:
+    """ Find the windows of constant coefficients of a piecewise constant hamiltonian.
+
+    Parameters
+    ----------
+    H : list
+        The hamiltonian as a list of [operator, coefficient]. A coefficient is either the samples at `tlist`, each
+        held until the next sample, or a tuple (times, values) of steps switching at the exact times (see
+        :meth:`Pulse.steps`).
+    tlist : :obj:`numpy.ndarray`
+        The sample times.
+
+    Returns
+    -------
+    windows : list
+        A list of tuples (start, stop, values) with the values of the coefficients from `start` until `stop`.
+
+    """
+    steps = [coeff if isinstance(coeff, tuple) else (tlist, np.asarray(coeff)) for _, coeff in H]
+    times = np.unique(np.concatenate([tlist[:1]] + [np.asarray(_times, dtype=float) for _times, _ in steps]))
+    times = times[(times >= tlist[0]) & (times < tlist[-1])]
+    values = np.array([
+        np.asarray(_values)[np.maximum(np.searchsorted(_times, times, side='right') - 1, 0)]
+        for _times, _values in steps
+    ])
+    changes = [0] + [i for i in range(1, len(times)) if np.any(values[:, i] != values[:, i-1])]
+    starts = times[changes]
+    stops = np.append(starts[1:], tlist[-1])
+
+    return [(start, stop, values[:, i]) for start, stop, i in zip(starts, stops, changes)]
+
+def evolve_piecewise_constant(
+    H: list=None,
+    init_state: np.ndarray=None,
+    tlist: np.ndarray=None,
+    observe: Callable=None,
+    progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+) -> np.ndarray:
+    """ Evolve a state exactly under a hamiltonian with piecewise constant coefficients.
+
+    Parameters
+    ----------
+    H : list
+        The hamiltonian in the format returned by :meth:`Hamiltonian.compile`, with the coefficients sampled at
+        `tlist` or, to switch at the exact times, e.g. the boundaries of a :obj:`PulseSequence`, compiled with the
+        resolution 'steps' (see :func:`constant_windows`).
+    init_state : :obj:`numpy.ndarray`
+        The flat initial state vector, or a batch of initial states as the columns of an array of shape (dim, batch).
+    tlist : :obj:`numpy.ndarray`
+        The times of the output states.
+    observe : Callable, optional
+        A function mapping the states of a window, an array of shape (num_states, dim), to the values of
+        observables of shape (num_states, num_targets), e.g. :meth:`Observables.evaluate`. Only the values are kept.
+    progress_bar : :obj:`qutip.ui.progressbar.BaseProgressBar`, optional
+        A QuTip progress bar updated with the number of finished samples, e.g. to report the progress or to stop a
+        job by raising in its `update`.
+
+    Returns
+    -------
+    states : :obj:`numpy.ndarray`
+        The states at `tlist` as an array of shape (len(tlist), dim), or (len(tlist), dim, batch) for a batch of
+        initial states. With `observe`, the values of the observables of shape (len(tlist), num_targets).
+
+    Notes
+    -----
+    A sampled coefficient is held from its sample until the next sample. A Hermitian window is diagonalized once and
+    every sample of the window is obtained by multiplying the eigenphases. Otherwise,
+    :func:`scipy.sparse.linalg.expm_multiply` is used.
+
+    """
+    batch = np.ndim(init_state) == 2 and np.shape(init_state)[1] > 1
+    psi = np.asarray(init_state, dtype=complex)
+    psi = psi if batch else psi.ravel()
+
+    _states = psi[None]
+    if observe is not None:
+        _states = observe(_states)
+    states = np.empty((len(tlist),) + _states.shape[1:], dtype=complex)
+    states[0] = _states[0]
+
+    if progress_bar is not None:
+        progress_bar.start(len(tlist))
+    for start, stop, values in constant_windows(H, tlist):
+        # The samples inside the window, followed by its end to carry the state over the switch.
+        indices = np.flatnonzero((tlist > start) & (tlist <= stop))
+        times = np.append(tlist[indices], stop) - start
+        H_window = sum(operator.full() * value for (operator, _), value in zip(H, values))
+
+        if np.allclose(H_window, H_window.conj().T):
+            energies, vectors = np.linalg.eigh(H_window)
+            amplitudes = vectors.conj().T @ psi
+            phases = np.exp(-1j * np.outer(times, energies))
+            if batch:
+                _states = np.einsum('ij,tj,jb->tib', vectors, phases, amplitudes)
+            else:
+                _states = (phases * amplitudes) @ vectors.T
+        else:
+            _states = []
+            _psi = psi
+            for dt in np.diff(np.append(0.0, times)):
+                _psi = expm_multiply(-1j * dt * H_window, _psi)
+                _states.append(_psi)
+            _states = np.array(_states)
+
+        psi = _states[-1]
+        if len(indices):
+            states[indices] = observe(_states[:-1]) if observe is not None else _states[:-1]
+            if progress_bar is not None:
+                progress_bar.update(indices[-1] + 1)
+
+    if progress_bar is not None:
+        progress_bar.finished()
+    return states
+
+def segment_propagators(
+    operators: list=None,
+    pulses: list=None,
+    times: np.ndarray=None,
+    options: qutip.solver.Options=None
+) -> np.ndarray:
+    """ Compute the propagators of a window of a pulse sequence at `times` after its start.
+
+    Parameters
+    ----------
+    operators : list
+        The operators (:obj:`qutip.Qobj`) of the hamiltonian.
+    pulses : list
+        The segment played by each operator in the window represented by a list of tuples (pulse, offset,
+        duration) (see :meth:`Hamiltonian.segments`).
+    times : :obj:`numpy.ndarray`
+        The non-negative times after the start of the window.
+    options : :obj:`qutip.solver.Options`
+        Options for the QuTip ODE solver.
+
+    Returns
+    -------
+    propagators : :obj:`numpy.ndarray`
+        The propagators as an array of shape (len(times), dim, dim).
+
+    Notes
+    -----
+    When every pulse of the window is constant, the hamiltonian is exponentiated exactly. Otherwise, the pulses are
+    evaluated by their envelopes (see :meth:`Pulse.envelope`) in :func:`qutip.sesolve`.
+
+    """
+    grid, indices = np.unique(np.concatenate([[0.0], times]), return_inverse=True)
+    if all(pulse.is_constant for pulse, _, _ in pulses):
+        H = sum(
+            operator.full() * pulse.evaluate(np.zeros(1), duration)[0]
+            for operator, (pulse, _, duration) in zip(operators, pulses)
+        )
+        if np.allclose(H, H.conj().T):
+            energies, vectors = np.linalg.eigh(H)
+            propagators = np.einsum('ij,tj,kj->tik', vectors, np.exp(-1j * np.outer(grid, energies)), vectors.conj())
+        else:
+            propagators = np.array([scipy.linalg.expm(-1j * t * H) for t in grid])
+    else:
+        H = [
+            [operator, lambda t, args, envelope=pulse.envelope(duration), offset=offset: envelope(t + offset)]
+            for operator, (pulse, offset, duration) in zip(operators, pulses)
+        ]
+        identity = qutip.qeye(operators[0].dims[0])
+        if len(grid) == 1:
+            propagators = identity.full()[None]
+        else:
+            results = qutip.sesolve(H, identity, grid, options=options)
+            propagators = np.array([U.full() for U in results.states])
+
+    return propagators[indices[1:]]
+
+class PropagatorCache:
+    """ A LRU cache of the propagators U(t_k) at the sample times of compiled hamiltonians.
+
+    Parameters
+    ----------
+    max_entries : int
+        The maximum number of cached propagators. Each propagator takes num_samples * dim**2 complex numbers.
+
+    Notes
+    -----
+    The cache is thread-safe, so the simulators of a session and of its jobs (see :meth:`QSim.submit`) can share it.
+
+    """
+    def __init__(
+        self,
+        max_entries: int=4
+    ):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(
+        self,
+        key: str=None
+    ) -> Optional[np.ndarray]:
+        """ Return the cached propagators of `key`, or `None` if they are not cached. """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            return None
+
+    def put(
+        self,
+        key: str=None,
+        propagators: np.ndarray=None
+    ):
+        """ Cache the `propagators` under `key`. """
+        with self._lock:
+            self._entries[key] = propagators
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(
+        self
+    ):
+        with self._lock:
+            self._entries.clear()
@@ -1 +1,2 @@
 from .pulse import Pulse
+from .sequence import PulseSequence
@@ -1,10 +1,19 @@
 from typing import Callable
+import inspect
+import threading
 from copy import deepcopy
+from collections import OrderedDict
 
 import numpy as np
+import qutip
 
 from .pulse_shape import *
 
+# The LRU cache of pulse samples {(pulse key, total_t, resolution): samples}.
+_samples = OrderedDict()
+_samples_lock = threading.Lock()
+_MAX_SAMPLES = 256
+
 class Pulse():
     def __init__(
         self,
@@ -14,35 +23,203 @@ class Pulse():
         **kwargs
     ):
         self._shape = shape
+        self._constant = constant
+        self._phase = phase
         self.params = deepcopy(kwargs)
 
     @property
     def shape(self):
         return self._shape
 
+    @property
+    def key(self):
+        """ The hashable recipe of the pulse. """
+        return (self._shape, tuple(sorted(self.params.items())))
+
+    @property
+    def recipe(self):
+        """ The `dict` recipe of the pulse accepted by :meth:`Hamiltonian.add`. """
+        return {"shape": self._shape, "constant": self._constant, "phase": self._phase, "kwargs": dict(self.params)}
+
+    @property
+    def is_constant(self):
+        """ `True` if the pulse does not depend on time. """
+        return self._shape == 'square'
+
+    def is_constant_over(
+        self,
+        total_t: float=None
+    ) -> bool:
+        """ `True` if the pulse is constant over the whole operation duration `total_t`. """
+        return self.is_constant
+
+    @property
+    def is_piecewise_constant(self):
+        """ `True` if the pulse is constant between a finite number of switching times. """
+        return self.is_constant
+
+    @property
+    def period(self):
+        """ The period of the pulse, 0.0 for a constant pulse or `None` for an aperiodic pulse. """
+        if self.is_constant:
+            return 0.0
+        elif self._shape in ('cos', 'sin'):
+            a = abs(self.params["a"])
+            return 2 * np.pi / a if a else 0.0
+        return None
+
+    def components(
+        self
+    ) -> list:
+        """ Decompose the pulse into components :math:`c \\, f(t) \\, e^{i \\omega t}`.
+
+        Returns
+        -------
+        components : list
+            A list of tuples (c, omega, envelope) with a complex amplitude `c`, a frequency `omega` and a slowly
+            varying envelope :obj:`Pulse` `f`, or `None` for f = 1. A `cos` or `sin` pulse has the components
+            :math:`\\pm a`, any other pulse is its own envelope.
+
+        """
+        if self._shape == 'square':
+            return [(complex(self.params["amplitude"]), 0.0, None)]
+        elif self._shape in ('cos', 'sin'):
+            amplitude = self.params["amplitude"]
+            a = self.params["a"]
+            b = self.params["b"]
+            if self._shape == 'cos':
+                return [(amplitude / 2 * np.exp(1j * b), a, None), (amplitude / 2 * np.exp(-1j * b), -a, None)]
+            return [(amplitude / 2j * np.exp(1j * b), a, None), (-amplitude / 2j * np.exp(-1j * b), -a, None)]
+        return [(1.0 + 0.0j, 0.0, self)]
+
+    def locate(
+        self,
+        t: float=None,
+        total_t: float=None
+    ) -> tuple:
+        """ Return the segment of the pulse active at time `t` as a tuple (pulse, start, duration).
+
+        A single pulse is one segment spanning the whole operation duration `total_t`.
+
+        """
+        return self, 0.0, total_t
+
     def generate_tlist(
         self,
         total_t: float=None,
         num_samples: int=None,
-    ) -> Callable:
+    ) -> np.ndarray:
         """ Generate a numpy.array tlist for the pulse.
-        
+
+        The samples are shared by identical pulses (see :meth:`sample`) and must not be modified.
+
+        """
+        return self.sample(total_t, num_samples)
+
+    def envelope(
+        self,
+        total_t: float=None
+    ) -> Callable:
+        """ Return the envelope of the pulse over the operation duration `total_t` as a vectorized callable of time.
+
+        """
+        def _envelope(t):
+            values = self.evaluate(np.atleast_1d(np.asarray(t, dtype=float)), total_t)
+            return values if np.ndim(t) else values[0]
+
+        return _envelope
+
+    def evaluate(
+        self,
+        tlist: np.ndarray=None,
+        total_t: float=None,
+        out: np.ndarray=None
+    ) -> np.ndarray:
+        """ Evaluate the pulse at the times `tlist` of an operation of duration `total_t`, optionally into a
+        preallocated buffer `out`.
+
         """
-        tlist = np.linspace(0.0, total_t, num_samples)
         pulse = self._pulse_map(self._shape)
-        return pulse(tlist, **self.params)
+        params = dict(self.params)
+        if "total_t" in inspect.getfullargspec(pulse).args:
+            params["total_t"] = total_t
+        return pulse(tlist, out=out, **params)
+
+    def sample(
+        self,
+        total_t: float=None,
+        resolution: int=None
+    ) -> np.ndarray:
+        """ Sample the pulse on `resolution` equally spaced points from 0 to `total_t`.
+
+        The samples are cached per (shape, params, total_t, resolution) and must not be modified.
+
+        """
+        key = (self.key, float(total_t), int(resolution))
+        with _samples_lock:
+            if key in _samples:
+                _samples.move_to_end(key)
+                return _samples[key]
+
+        samples = np.asarray(self.evaluate(np.linspace(0.0, total_t, resolution), total_t))
+        samples.setflags(write=False)
+        # The cache is shared by the threads of the UI sessions and of the jobs.
+        with _samples_lock:
+            _samples[key] = samples
+            _samples.move_to_end(key)
+            while len(_samples) > _MAX_SAMPLES:
+                _samples.popitem(last=False)
+
+        return samples
+
+    def steps(
+        self,
+        total_t: float=None
+    ) -> tuple:
+        """ Return a piecewise constant pulse as its values between switching times.
+
+        Returns
+        -------
+        steps : tuple
+            A tuple (times, values) of arrays. The pulse is `values[i]` from `times[i]` until `times[i+1]`, or until
+            `total_t` for the last value.
+
+        """
+        if not self.is_constant:
+            raise ValueError("The pulse shape `%s` is not piecewise constant." %(self._shape))
+        return np.zeros(1), self.evaluate(np.zeros(1), total_t)
+
+    def coefficient(
+        self,
+        total_t: float=None,
+        resolution: int|str=None
+    ) -> Callable:
+        """ Return the pulse as a time-dependent coefficient for QuTip.solver.
+
+        Parameters
+        ----------
+        total_t : float
+            The operation duration.
+        resolution : int or str
+            The number of samples of a cubic spline (:obj:`qutip.Cubic_Spline`) of the pulse, 'analytic' for
+            a callable evaluating the envelope exactly, or 'steps' for the switching times of a piecewise constant
+            pulse (see :meth:`steps`), which only :func:`propagator.evolve_piecewise_constant` accepts.
+
+        Returns
+        -------
+        coefficient : :obj:`qutip.Cubic_Spline`, Callable or tuple
+
+        """
+        if resolution == 'analytic':
+            envelope = self.envelope(total_t)
+            return lambda t, args: envelope(t)
+        elif resolution == 'steps':
+            return self.steps(total_t)
+        else:
+            return qutip.Cubic_Spline(0.0, total_t, self.sample(total_t, resolution))
 
     def _pulse_map(
         self,
         pulse_shape: str=None
     ) -> Callable:
-        if pulse_shape == 'square':
-            return square
-        elif pulse_shape == 'cos':
-            return cos
-        elif pulse_shape == 'sin':
-            return sin
-        """
-        elif pulse_shape == 'SuperGaussian':
-            return super_gaussian
-        """
+        return get_shape(pulse_shape)
@@ -1,50 +1,196 @@
+import inspect
+from typing import Callable
+
 import numpy as np
 
+# The registry of pulse shapes {"name": function}. Every shape takes the sample times `tlist` first and may write into a
+# preallocated buffer `out`. Shapes defined on a window, e.g. :func:`gaussian`, also take the operation duration
+# `total_t`, which is supplied by :class:`Pulse`.
+PULSE_SHAPES = {}
+# The shapes returning complex values for a real amplitude, e.g. :func:`drag`. A complex pulse keeps the hamiltonian
+# Hermitian only on a one-sided operator, c(t) |a><b|, paired with the conjugate pulse on |b><a|.
+COMPLEX_SHAPES = set()
+
+def register(
+    name: str=None,
+    is_complex: bool=False
+) -> Callable:
+    """ Register a pulse shape under `name`, in :data:`COMPLEX_SHAPES` if `is_complex`. """
+    def _register(pulse: Callable) -> Callable:
+        PULSE_SHAPES[name] = pulse
+        if is_complex:
+            COMPLEX_SHAPES.add(name)
+        return pulse
+
+    return _register
+
+def get_shape(
+    name: str=None
+) -> Callable:
+    """ Return the registered pulse shape `name`. """
+    if name not in PULSE_SHAPES:
+        raise ValueError("Unknown pulse shape `%s`. Available shapes: %s." %(name, ", ".join(PULSE_SHAPES)))
+
+    return PULSE_SHAPES[name]
+
+def shape_params(
+    name: str=None
+) -> dict:
+    """ Return the user parameters of the pulse shape `name` represented by a `dict` {"param": annotation}. """
+    params = dict(inspect.getfullargspec(get_shape(name)).annotations)
+    for param in ("tlist", "total_t", "out", "return"):
+        params.pop(param, None)
+
+    return params
+
+def _buffer(
+    tlist: np.ndarray,
+    out: np.ndarray=None,
+    amplitude: complex=0.0
+) -> np.ndarray:
+    """ Return `out`, or a new buffer shaped like `tlist`, complex for a complex `amplitude`. """
+    if out is None:
+        return np.empty(np.shape(tlist), dtype=np.result_type(amplitude, float))
+    return out
+
+@register("square")
 def square(
-    tlist: list, 
-    amplitude: float
+    tlist: np.ndarray,
+    amplitude: float,
+    out: np.ndarray=None
 ) -> np.ndarray:
-    return np.array([amplitude] * len(tlist))
+    out = _buffer(tlist, out, amplitude)
+    out[...] = amplitude
+    return out
 
+@register("cos")
 def cos(
     tlist: np.ndarray,
     amplitude: float,
     a: float,
-    b: float
+    b: float,
+    out: np.ndarray=None
 ) -> np.ndarray:
     """ cos pules
 
     amplitude * cos(ax+b)
 
     """
-    _tlist = a * tlist + b
-    return amplitude * np.cos(_tlist)
+    out = _buffer(tlist, out, amplitude)
+    np.multiply(tlist, a, out=out)
+    out += b
+    np.cos(out, out=out)
+    out *= amplitude
+    return out
 
+@register("sin")
 def sin(
-    tlist: list,
+    tlist: np.ndarray,
     amplitude: float,
     a: float,
-    b: float
+    b: float,
+    out: np.ndarray=None
 ) -> np.ndarray:
     """ sin pules
 
     amplitude * sin(ax+b)
 
     """
-    _tlist = a * tlist + b
-    return amplitude * np.sin(_tlist)
-
-"""def super_gaussian(
-    tlist: list=None, 
-    param: list=None
-) -> list:
-    t_total = tlist[-1]
-    t_middle = t_total / 2
-    amp = param[0]
-    tau = param[1]
-    def _super_gaussian(t):
-        t = t % t_total
-        a = np.exp(- t_middle**2 / tau**2)
-        return amp * (np.exp(-(t-t_middle)**2 / tau**2) - a) / (1-a) 
-    return np.array(list(map(_super_gaussian, tlist)))
-"""
+    out = _buffer(tlist, out, amplitude)
+    np.multiply(tlist, a, out=out)
+    out += b
+    np.sin(out, out=out)
+    out *= amplitude
+    return out
+
+@register("super_gaussian")
+def super_gaussian(
+    tlist: np.ndarray,
+    total_t: float,
+    amplitude: float,
+    tau: float,
+    out: np.ndarray=None
+) -> np.ndarray:
+    """ super gaussian pules
+
+    Gaussian of width tau centred in the window, shifted and rescaled to vanish at t = 0 and total_t
+
+    amplitude * (exp(-(t-total_t/2)^2/tau^2) - c) / (1-c), c = exp(-(total_t/2)^2/tau^2)
+
+    """
+    t_middle = total_t / 2
+    edge = np.exp(-t_middle**2 / tau**2)
+    out = _buffer(tlist, out, amplitude)
+    np.subtract(tlist, t_middle, out=out)
+    np.square(out, out=out)
+    out *= -1 / tau**2
+    np.exp(out, out=out)
+    out -= edge
+    out *= amplitude / (1 - edge)
+    return out
+
+@register("gaussian")
+def gaussian(
+    tlist: np.ndarray,
+    total_t: float,
+    amplitude: float,
+    sigma: float,
+    out: np.ndarray=None
+) -> np.ndarray:
+    """ gaussian pules
+
+    amplitude * exp(-(t-total_t/2)^2/(2 sigma^2))
+
+    """
+    out = _buffer(tlist, out, amplitude)
+    np.subtract(tlist, total_t / 2, out=out)
+    np.square(out, out=out)
+    out *= -1 / (2 * sigma**2)
+    np.exp(out, out=out)
+    out *= amplitude
+    return out
+
+@register("blackman")
+def blackman(
+    tlist: np.ndarray,
+    total_t: float,
+    amplitude: float,
+    out: np.ndarray=None
+) -> np.ndarray:
+    """ blackman pules
+
+    amplitude * (0.42 - 0.5 cos(2 pi t/total_t) + 0.08 cos(4 pi t/total_t))
+
+    """
+    phase = np.multiply(tlist, 2 * np.pi / total_t)
+    out = _buffer(tlist, out, amplitude)
+    np.cos(phase, out=out)
+    out *= -0.5
+    out += 0.42
+    phase *= 2
+    np.cos(phase, out=phase)
+    phase *= 0.08
+    out += phase
+    out *= amplitude
+    return out
+
+@register("drag", is_complex=True)
+def drag(
+    tlist: np.ndarray,
+    total_t: float,
+    amplitude: float,
+    sigma: float,
+    beta: float,
+    out: np.ndarray=None
+) -> np.ndarray:
+    """ DRAG pules
+
+    gaussian(t) + i beta d/dt gaussian(t), a complex pulse suppressing leakage to a nearby level
+
+    """
+    out = _buffer(tlist, out, complex(amplitude))
+    np.subtract(tlist, total_t / 2, out=out)
+    out *= -1j * beta / sigma**2
+    out += 1
+    out *= gaussian(tlist, total_t, amplitude, sigma)
+    return out
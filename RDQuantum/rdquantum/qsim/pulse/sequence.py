@@ -0,0 +1,168 @@
+import numpy as np
+
+from .pulse import Pulse
+
+class PulseSequence(Pulse):
+    """ A pulse built from timed segments, each with its own shape and params, e.g. π/2 - wait - π - wait - π/2.
+
+    The segments are played back to back from t = 0. A window shape (see :mod:`pulse_shape`) of a segment is defined
+    over the duration of the segment. After the last segment the pulse is zero.
+
+    Parameters
+    ----------
+    segments : list
+        The segments represented by a list of `dict` {"duration": float, "shape": str, "kwargs": dict}.
+
+    Attributes
+    ----------
+    segments : list
+        The segments represented by a list of tuples (duration, :obj:`Pulse`).
+    duration : float
+        The total duration of the segments.
+    boundaries : :obj:`numpy.ndarray`
+        The start times of the segments followed by the end of the sequence.
+
+    """
+    def __init__(
+        self,
+        segments: list=None,
+        constant: float|None=1.0,
+        phase: float|None=0.0
+    ):
+        super().__init__('sequence', constant, phase)
+        self._segments = []
+        for segment in segments or []:
+            self.append(segment["duration"], segment["shape"], **segment.get("kwargs", {}))
+
+    @property
+    def segments(self):
+        return self._segments
+
+    @property
+    def key(self):
+        """ The hashable recipe of the pulse. """
+        return (self._shape, tuple((duration, pulse.key) for duration, pulse in self._segments))
+
+    @property
+    def recipe(self):
+        return {
+            "segments": [
+                {"duration": duration, "shape": pulse.shape, "kwargs": dict(pulse.params)}
+                for duration, pulse in self._segments
+            ],
+            "constant": self._constant,
+            "phase": self._phase
+        }
+
+    @property
+    def is_constant(self):
+        """ `False`: the sequence is zero after its last segment, so it depends on time even when every segment is
+        the same `square`.
+
+        """
+        return False
+
+    def is_constant_over(
+        self,
+        total_t: float=None
+    ) -> bool:
+        """ `True` if the segments played before `total_t` are the same constant pulse and the sequence lasts until
+        `total_t`.
+
+        """
+        if self.duration < total_t:
+            return False
+        played = [pulse for start, (_, pulse) in zip(self.boundaries, self._segments) if start < total_t]
+        return len(set(pulse.key for pulse in played)) == 1 and played[0].is_constant
+
+    @property
+    def is_piecewise_constant(self):
+        return all(pulse.is_constant for _, pulse in self._segments)
+
+    @property
+    def period(self):
+        return None
+
+    @property
+    def duration(self):
+        return float(sum(duration for duration, _ in self._segments))
+
+    @property
+    def boundaries(self):
+        return np.concatenate([[0.0], np.cumsum([duration for duration, _ in self._segments])])
+
+    def append(
+        self,
+        duration: float=None,
+        shape: str=None,
+        **kwargs
+    ):
+        """ Append a segment of `duration` with the pulse `shape` and its params. """
+        if duration <= 0:
+            raise ValueError("The duration of a segment must be positive.")
+        self._segments.append((float(duration), Pulse(shape, **kwargs)))
+
+    def steps(
+        self,
+        total_t: float=None
+    ) -> tuple:
+        """ Return the segments as their values between the exact boundaries (see :meth:`Pulse.steps`), followed by
+        zero until `total_t`.
+
+        """
+        if not self.is_piecewise_constant:
+            raise ValueError("The pulse sequence has segments which are not piecewise constant.")
+        boundaries = self.boundaries
+        times = list(boundaries[:-1])
+        values = [pulse.evaluate(np.zeros(1), duration)[0] for duration, pulse in self._segments]
+        if boundaries[-1] < total_t:
+            times.append(boundaries[-1])
+            values.append(0.0)
+
+        return np.array(times), np.array(values)
+
+    def locate(
+        self,
+        t: float=None,
+        total_t: float=None
+    ) -> tuple:
+        """ Return the segment active at time `t` as a tuple (pulse, start, duration).
+
+        After the last segment, a zero pulse lasting until `total_t` is returned.
+
+        """
+        boundaries = self.boundaries
+        index = int(np.searchsorted(boundaries, t, side='right')) - 1
+        if index >= len(self._segments):
+            return Pulse('square', amplitude=0.0), boundaries[-1], max(total_t - boundaries[-1], 0.0)
+        duration, pulse = self._segments[index]
+        return pulse, boundaries[index], duration
+
+    def evaluate(
+        self,
+        tlist: np.ndarray=None,
+        total_t: float=None,
+        out: np.ndarray=None
+    ) -> np.ndarray:
+        """ Evaluate the sequence at the times `tlist`, optionally into a preallocated buffer `out`. The samples
+        at a boundary belong to the following segment, except at the end of the sequence.
+
+        """
+        tlist = np.asarray(tlist, dtype=float)
+        boundaries = self.boundaries
+        indices = np.searchsorted(boundaries, tlist, side='right') - 1
+        indices[tlist == boundaries[-1]] = len(self._segments) - 1
+
+        values = [
+            pulse.evaluate(tlist[indices == i] - boundaries[i], duration)
+            for i, (duration, pulse) in enumerate(self._segments)
+        ]
+        dtype = np.result_type(float, *values)
+        if out is None:
+            out = np.zeros(tlist.shape, dtype=dtype)
+        else:
+            out[...] = 0.0
+        for i, _values in enumerate(values):
+            out[indices == i] = _values
+
+        return out
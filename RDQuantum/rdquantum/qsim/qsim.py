@@ -5,8 +5,25 @@ import numpy as np
 import qutip
 
 from .qsystem import QSystem
-from .hamiltonian import Hamiltonian
+from .quanta import Quanta
+from .hamiltonian import Hamiltonian, unfold
 from .noise import Noise
+from .subspace import Subspace
+from .symmetric import SymmetricBasis
+from .matrix_free import MatrixFreeHamiltonian
+from . import propagator
+from . import krylov
+from . import floquet as _floquet
+from .observables import Observables
+from . import sweep as _sweep
+from . import montecarlo
+from .cache import ResultCache, experiment_hash, solver_options
+from .jobs import SimulationJob
+from .trajectory import TrajectoryStore
+
+# Above this size (dim**2 times the number of Liouvillian terms) the density matrix is too expensive and noisy
+# simulations with `method='auto'` use quantum trajectories.
+_MESOLVE_MAX_SIZE = 2**20
 
 class QSim:
     """ The simulator is designed for composing, simulating and executing quantum dynamics.
@@ -31,11 +48,19 @@ class QSim:
             raise TypeError("`qsystem` must be a :obj:`RDQuantum.QSystem`.")
         self.hamiltonian = Hamiltonian(self._qsystem)
         self.noise = Noise(self._qsystem)
+        self._propagators = propagator.PropagatorCache()
+        self._segment_propagators = propagator.PropagatorCache(max_entries=64)
+        self._rotating_frame = None
 
     @property
     def qsystem(self):
         return self._qsystem
 
+    @property
+    def rotating_frame(self):
+        """ The :obj:`RotatingFrame` of the last simulation with `rwa`, e.g. for its error estimate. """
+        return self._rotating_frame
+
     def add_operator(
         self,
         key: str=None,
@@ -72,35 +97,210 @@ class QSim:
 
     def add_noise(
         self,
+        key: str=None,
+        target: list=None,
+        rate: float=None,
+        dm_info: dict=None
     ):
-        """ Add noise.
+        """ Add a noise channel.
+
+        Parameters
+        ----------
+        key : str
+            The key of the noise channel.
+        target : list
+            The target subsystems of the jump operator represented by a list of tuple of index of the `qsystem`.
+        rate : float
+            The rate of the noise channel.
+        dm_info : dict
+            Density matrix information of the jump operator, e.g. $\ket{g}\bra{e}$ for decay.
+
+        """
+        if not target:
+            pass
+        else:
+            self.noise.add(key, target, rate, dm_info)
+
+    def to_recipe(
+        self
+    ) -> dict:
+        """ Return the quantum system, the hamiltonian and the noise as a JSON-serializable `dict`, from which
+        :meth:`from_recipe` rebuilds the simulator.
+
+        """
+        return {
+            "qsystem": [
+                [self._qsystem.get_species(index).name, list(self._qsystem.get_species(index).energy_levels)]
+                for index in range(self._qsystem.num_quantas)
+            ],
+            "hamiltonian": self.hamiltonian.to_recipe(),
+            "noise": self.noise.to_recipe()
+        }
+
+    @classmethod
+    def from_recipe(
+        cls,
+        recipe: dict=None,
+        propagators: propagator.PropagatorCache=None,
+        segment_propagators: propagator.PropagatorCache=None
+    ) -> QSim:
+        """ Build a simulator from the `dict` returned by :meth:`to_recipe`.
+
+        The propagator caches are keyed by the fingerprint of the hamiltonian (see :meth:`Hamiltonian.fingerprint`),
+        so the caches `propagators` (see :meth:`propagator`) and `segment_propagators` (see :meth:`_run_segments`) of
+        another simulator can be shared with the new one.
+
+        """
+        species = {}
+        quantas = []
+        for name, energy_levels in recipe["qsystem"]:
+            if (name, tuple(energy_levels)) not in species:
+                species[(name, tuple(energy_levels))] = Quanta(name, list(energy_levels))
+            quantas.append(species[(name, tuple(energy_levels))])
+
+        qsim = cls(QSystem(quantas))
+        for operator in recipe["hamiltonian"]:
+            qsim.add_operator(operator["key"], operator["target"], operator["pulse"], operator["dm"])
+        for channel in recipe.get("noise", []):
+            qsim.add_noise(channel["key"], channel["target"], channel["rate"], channel["dm"])
+        if propagators is not None:
+            qsim._propagators = propagators
+        if segment_propagators is not None:
+            qsim._segment_propagators = segment_propagators
+
+        return qsim
+
+    def experiment_hash(
+        self,
+        init_state: qutip.Qobj=None,
+        operation_time: float=None,
+        num_samples: int=100,
+        options: qutip.solver.Options=None,
+        **settings
+    ) -> str:
+        """ Return the canonical hash of an experiment, the arguments of :meth:`run_expt`, on this simulator.
+
+        Two experiments with the same hash have the same results (see :func:`cache.experiment_hash`).
+
+        """
+        return experiment_hash(
+            self.to_recipe(),
+            init_state = init_state,
+            operation_time = operation_time,
+            num_samples = num_samples,
+            options = solver_options(options),
+            **settings
+        )
+
+    def reachable_subspace(
+        self,
+        init_state: qutip.Qobj=None
+    ) -> Subspace:
+        """ Find the subspace reachable from `init_state` through the operators of the hamiltonian and the noise.
+
+        Parameters
+        ----------
+        init_state : :obj:`qutip.Qobj`
+            Initial state vector (ket), e.g. generated by :meth:`QSystem.generate_state`.
+
+        Returns
+        -------
+        subspace : :obj:`Subspace`
 
         """
-        pass
+        operators = [self.hamiltonian.get_operator(key).dm for key in self.hamiltonian.keys]
+        if self.noise.keys:
+            operators += self.noise.compile()
+
+        return Subspace.reachable(operators, init_state)
 
     def run_expt(
         self,
         init_state: qutip.Qobj=None,
         operation_time: float=None,
         num_samples: int=100,
-        options: qutip.solver.Options=None
+        options: qutip.solver.Options=None,
+        subspace: bool=False,
+        symmetric: bool=False,
+        method: str='ode',
+        targets: list=None,
+        resolution: int|str=None,
+        rwa: bool=False,
+        cache: ResultCache=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None,
+        store: TrajectoryStore|str=None
     ) -> list:
         """ Execute the simulation of quantum dynamics.
 
         Parameters
         ----------
         init_state : :obj:`qutip.Qobj`
-            Initial state vector (ket).
+            Initial state vector (ket). With `symmetric`, it can also be a string of energy level symbols or a ket
+            in the symmetric basis.
         operation_time : float
             The operation duration of the quantum dynamics.
         num_samples : int
             The number of samples
         options : :obj:`qutip.solver.Options`
             Options for the QuTip ODE solver.
+        subspace : bool
+            If `True`, evolve only inside the subspace reachable from `init_state` (see
+            :meth:`reachable_subspace`) and embed the results back into the full Hilbert space.
+        symmetric : bool
+            If `True`, evolve in the permutation-symmetric basis (see :obj:`SymmetricBasis`) of a permutation
+            invariant hamiltonian. The states are returned in the symmetric basis.
+        method : str
+            The solver of the closed system dynamics.
+
+            - 'ode': :func:`qutip.sesolve` (or :func:`qutip.mesolve` with noise).
+            - 'matrix_free': Runge-Kutta integration with the matrix-free :obj:`MatrixFreeHamiltonian`, whose
+              memory is O(dim) instead of O(nnz).
+            - 'exact': Exact propagation of piecewise constant pulses, e.g. `square`, by diagonalizing the
+              hamiltonian once per constant segment (see :func:`propagator.evolve_piecewise_constant`).
+            - 'krylov': Krylov subspace exponentials of the sparse operators between the samples with adaptive
+              Krylov dimension and error control (see :func:`krylov.evolve_krylov`). The tolerance per step is
+              `options.atol`.
+            - 'segments': Solve a pulse sequence (see :obj:`PulseSequence`) window by window with cached window
+              propagators, so repeated segments, e.g. the π pulses of a dynamical-decoupling train, are computed
+              once (see :meth:`_run_segments`).
+            - 'floquet': For periodic pulses, e.g. `cos` and `sin` with commensurate frequencies, integrate the
+              propagator over a single common period and reach any time by powers of its eigendecomposition (see
+              `floquet.FloquetPropagator`), so the cost does not grow with the number of periods.
+            - 'propagator': Apply the cached propagators of :meth:`propagator`, so a new initial state for the
+              same hamiltonian only costs a matrix product.
+            - 'trajectories': Parallel quantum trajectories for noisy simulations (see :meth:`iter_trajectories`)
+              with `options.ntraj` trajectories. Requires `targets`, whose populations or expectation values are
+              returned.
+            - 'auto': 'trajectories' when the noisy simulation is too large for :func:`qutip.mesolve` and `targets`
+              are given, otherwise 'ode'.
+        targets : list, optional
+            Target kets or expectation operators (see :obj:`Observables`). If given, the states are not stored and
+            only the values of the targets are returned.
+        resolution : int or str, optional
+            With method 'ode', evaluate the pulses by cubic splines with their own `resolution` or exactly with
+            'analytic' instead of interpolating the `num_samples` samples (see :meth:`Hamiltonian.compile`), so the
+            output grid can be coarse while the pulses stay exact.
+        rwa : bool
+            If `True`, solve in the rotating frame of the drives without the counter-rotating terms (see
+            :meth:`Hamiltonian.rotating_frame`) with the methods 'ode', 'exact' or 'krylov'. The states are
+            transformed back to the lab frame and the error estimate is kept in :attr:`rotating_frame`.
+        cache : :obj:`ResultCache`, optional
+            Look up the result by the hash of the experiment (see :meth:`experiment_hash`) and store it after a
+            miss. A cached result is returned memory-mapped.
+        progress_bar : :obj:`qutip.ui.progressbar.BaseProgressBar`, optional
+            The progress bar of the solver, updated with the finished samples of `tlist`, or the finished
+            trajectories with 'trajectories'. An exception raised in its `update` stops the simulation.
+        store : :obj:`TrajectoryStore` or str, optional
+            Write the kets into the store, or a new store at the given path, chunk by chunk (see :meth:`stream_expt`)
+            and return it instead of a list, so at most one chunk of :obj:`qutip.Qobj` is alive. The file appears at
+            the path only once the simulation is complete (see :meth:`TrajectoryStore.save`). Requires the method
+            'ode' without noise, `targets`, `subspace`, `symmetric`, `rwa` or `cache`.
 
         Returns
         -------
         state_evolution : list
+            The states at each sample, or with `targets` a :obj:`numpy.ndarray` of shape (num_samples, num_targets),
+            or with `store` the :obj:`TrajectoryStore`.
 
         Notes
         -----
@@ -108,15 +308,671 @@ class QSim:
         used.
 
         """
-        H = self.hamiltonian.compile(operation_time, num_samples)
+        if store is not None:
+            if (
+                method != 'ode' or self.noise.keys or targets is not None or subspace or symmetric or rwa
+                or cache is not None
+            ):
+                raise ValueError(
+                    "The trajectory store requires the method 'ode' without noise, `targets`, `subspace`, "
+                    "`symmetric`, `rwa` or `cache`."
+                )
+            if isinstance(store, str):
+                store = TrajectoryStore(num_samples, init_state.shape[0], store)
+            try:
+                if progress_bar is not None:
+                    progress_bar.start(num_samples)
+                chunks = self.stream_expt(init_state, operation_time, num_samples, options, resolution=resolution)
+                for _, states in chunks:
+                    store.append(states)
+                    if progress_bar is not None:
+                        progress_bar.update(len(store))
+                if progress_bar is not None:
+                    progress_bar.finished()
+            except BaseException:
+                store.discard()
+                raise
+            store.save()
+            return store
+
+        if cache is not None:
+            settings = {
+                "subspace": subspace, "symmetric": symmetric, "method": method, "targets": targets,
+                "resolution": resolution, "rwa": rwa
+            }
+            key = self.experiment_hash(init_state, operation_time, num_samples, options, **settings)
+            result = cache.get(key)
+            if result is not None:
+                if rwa:
+                    # Keep the frame and its error estimate as after a simulation.
+                    self._rotating_frame = self.hamiltonian.rotating_frame(operation_time, num_samples)
+                return result if targets is not None else self._from_array(result)
+            result = self.run_expt(
+                init_state, operation_time, num_samples, options, progress_bar=progress_bar, **settings
+            )
+            cache.put(key, self._to_array(result))
+            return result
+
         tlist = np.linspace(0.0, operation_time, num_samples)
+        noise = self.noise.compile() if self.noise.keys else []
+        dissipator = self.noise.dissipator() if self.noise.keys else None
+        observables = Observables(targets) if targets is not None else None
+        if resolution is not None and method not in ('ode', 'auto'):
+            raise ValueError("The method `%s` does not support `resolution`." %(method))
 
-        if not self.noise.keys:
-            results = qutip.sesolve(H, init_state, tlist, options=options)
+        if rwa:
+            if method not in ('ode', 'exact', 'krylov') or subspace or symmetric or resolution is not None:
+                raise ValueError(
+                    "The rotating frame supports the methods 'ode', 'exact' and 'krylov' without `subspace`, "
+                    "`symmetric` or `resolution`."
+                )
+            frame = self.hamiltonian.rotating_frame(operation_time, num_samples)
+            self._rotating_frame = frame
+            if method == 'exact' and not frame.is_piecewise_constant:
+                raise ValueError(
+                    "The method `exact` requires piecewise constant pulses, `square` or sequences of `square` "
+                    "segments, resonant with the rotating frame."
+                )
+            H = frame.H_steps if method == 'exact' else frame.H
+            states = QSim._solve(H, init_state, tlist, noise, options, method, None, dissipator, progress_bar)
+            state_evolution = frame.to_lab(states, tlist)
+            if observables is not None:
+                return np.array([observables(t, state) for t, state in zip(tlist, state_evolution)])
+            return state_evolution
+
+        if method == 'auto':
+            dim = int(np.prod([
+                len(self._qsystem.get_species(index).energy_levels) for index in range(self._qsystem.num_quantas)
+            ]))
+            if noise and targets is not None and dim**2 * (len(self.hamiltonian.keys) + len(noise)) > _MESOLVE_MAX_SIZE:
+                method = 'trajectories'
+            else:
+                method = 'ode'
+
+        if method == 'trajectories':
+            if subspace or symmetric or targets is None:
+                raise ValueError("The trajectories do not support `subspace` or `symmetric`, and require `targets`.")
+            if not noise:
+                raise ValueError("The trajectories require noise. Use a closed system method, e.g. 'ode', without it.")
+            ntraj = options.ntraj if options is not None else 500
+            seed = options.seeds if options is not None and isinstance(options.seeds, int) else None
+            trajectories = montecarlo.iter_trajectories(
+                self.hamiltonian.compile(operation_time, num_samples), noise, init_state.full(), tlist,
+                observables, ntraj=ntraj, seed=seed
+            )
+            if progress_bar is not None:
+                progress_bar.start(ntraj)
+            for count, mean, _ in trajectories:
+                if progress_bar is not None:
+                    progress_bar.update(count)
+            if progress_bar is not None:
+                progress_bar.finished()
+            return mean
+        elif method == 'matrix_free':
+            if subspace or symmetric or noise:
+                raise ValueError("The matrix-free solver does not support `subspace`, `symmetric` or noise.")
+            return self._run_matrix_free(
+                init_state, operation_time, num_samples, options, observables, progress_bar
+            )
+        elif method == 'segments':
+            if subspace or symmetric or noise:
+                raise ValueError("The segment-wise solver does not support `subspace`, `symmetric` or noise.")
+            return self._run_segments(
+                init_state, operation_time, num_samples, options, observables, progress_bar
+            )
+        elif method == 'floquet':
+            if subspace or symmetric or noise:
+                raise ValueError("The Floquet solver does not support `subspace`, `symmetric` or noise.")
+            return self._run_floquet(
+                init_state, operation_time, num_samples, options, observables, progress_bar
+            )
+        elif method == 'propagator':
+            if subspace or symmetric or noise:
+                raise ValueError("The propagator does not support `subspace`, `symmetric` or noise.")
+            state_evolution = self.evolve([init_state], operation_time, num_samples, options, progress_bar)[0]
+            if observables is not None:
+                return observables.evaluate(np.array([state.full().ravel() for state in state_evolution]))
+            return state_evolution
+        elif method not in ('ode', 'exact', 'krylov'):
+            raise ValueError("Unknown method `%s`." %(method))
+        elif method == 'exact' and not self.hamiltonian.is_piecewise_constant:
+            raise ValueError(
+                "The method `exact` requires piecewise constant pulses, `square` or sequences of `square` segments."
+            )
+
+        if method == 'exact':
+            # Switch the pulses at their exact times, e.g. the boundaries of a sequence, instead of at the samples.
+            resolution = 'steps'
+        if symmetric:
+            if subspace or noise:
+                raise ValueError("The symmetric basis does not support `subspace` or noise.")
+            basis = SymmetricBasis(self._qsystem)
+            H = basis.compile(self.hamiltonian, operation_time, num_samples, resolution)
+            if isinstance(init_state, str):
+                init_state = basis.generate_state(init_state)
+            elif init_state.shape[0] != basis.dim:
+                init_state = basis.project(init_state)
+            if observables is not None:
+                observables = observables.transform(
+                    lambda target: basis.project(target) if target.shape[0] != basis.dim else target
+                )
         else:
-            noise = self.noise.compile()
-            results = qutip.mesolve(H, init_state, tlist, c_ops=noise, options=options)
+            # The ODE solvers evaluate one coefficient per distinct time dependence of the folded hamiltonian.
+            H = self.hamiltonian.compile(operation_time, num_samples, resolution, fold=(method == 'ode'))
 
-        state_evolution = results.states
+        if subspace:
+            _subspace = self.reachable_subspace(init_state)
+            H = [
+                _subspace.restrict(term) if isinstance(term, qutip.Qobj) else [_subspace.restrict(term[0]), term[1]]
+                for term in H
+            ]
+            noise = [_subspace.restrict(c_op) for c_op in noise]
+            dissipator = None
+            init_state = _subspace.restrict(init_state)
+            if observables is not None:
+                observables = observables.transform(_subspace.restrict)
+
+        state_evolution = QSim._solve(
+            H, init_state, tlist, noise, options, method, observables, dissipator, progress_bar
+        )
+        if observables is not None:
+            return state_evolution
+        if subspace:
+            state_evolution = [_subspace.embed(state) for state in state_evolution]
 
         return state_evolution
+
+    @staticmethod
+    def _to_array(
+        result: list=None
+    ) -> np.ndarray:
+        """ Stack the result of :meth:`run_expt` into an array, kets of shape (num_samples, dim) and density matrices
+        of shape (num_samples, dim, dim).
+
+        """
+        if isinstance(result, np.ndarray):
+            return result
+        if result[0].isket:
+            return np.array([state.full().ravel() for state in result])
+        return np.array([state.full() for state in result])
+
+    def _from_array(
+        self,
+        result: np.ndarray=None
+    ):
+        """ Rebuild the states of the result of :meth:`run_expt` stored by :meth:`_to_array`. """
+        dims = [len(self._qsystem.get_species(index).energy_levels) for index in range(self._qsystem.num_quantas)]
+        dim = result.shape[1]
+        dims = dims if int(np.prod(dims)) == dim else [dim]
+        if result.ndim == 2:
+            return [qutip.Qobj(state[:, None], dims=[dims, [1] * len(dims)]) for state in result]
+        return [qutip.Qobj(state, dims=[dims, dims]) for state in result]
+
+    def submit(
+        self,
+        **kwargs
+    ) -> SimulationJob:
+        """ Run :meth:`run_expt` on the worker pool and return the :obj:`SimulationJob` immediately.
+
+        The simulation runs on a snapshot of the simulator (see :meth:`to_recipe`), so the hamiltonian can be edited
+        while the job is in flight. The snapshot shares the propagator caches, so a job changing only the initial
+        state reuses the propagators of the previous jobs. The job reports the progress of the QuTip solver as a
+        fraction of `tlist` and stops at the next solver step after :meth:`SimulationJob.cancel`.
+
+        Parameters
+        ----------
+        **kwargs
+            The arguments of :meth:`run_expt`.
+
+        """
+        snapshot = QSim.from_recipe(self.to_recipe(), self._propagators, self._segment_propagators)
+        return SimulationJob(lambda progress_bar: snapshot.run_expt(progress_bar=progress_bar, **kwargs), snapshot)
+
+    def stream_expt(
+        self,
+        init_state: qutip.Qobj=None,
+        operation_time: float=None,
+        num_samples: int=100,
+        options: qutip.solver.Options=None,
+        targets: list=None,
+        chunk_size: int=None,
+        resolution: int|str=None
+    ):
+        """ Execute the simulation like :meth:`run_expt` (method 'ode') and yield the results chunk by chunk as the
+        solver advances through `tlist`.
+
+        The hamiltonian is compiled once with pulse splines over the whole operation (see :meth:`Hamiltonian.compile`)
+        and the solver restarts from the last state of the previous chunk, so only one chunk is held at a time.
+        Closing the generator, e.g. leaving a `for` loop, aborts the simulation.
+
+        Parameters
+        ----------
+        init_state : :obj:`qutip.Qobj`
+            Initial state vector (ket), e.g. generated by :meth:`QSystem.generate_state`.
+        operation_time : float
+            The operation duration of the quantum dynamics.
+        num_samples : int
+            The number of samples
+        options : :obj:`qutip.solver.Options`
+            Options for the QuTip ODE solver.
+        targets : list, optional
+            Target kets or expectation operators (see :obj:`Observables`). If given, the values of the targets are
+            yielded instead of the states.
+        chunk_size : int, optional
+            The number of samples per chunk. Defaults to a tenth of `num_samples`.
+        resolution : int or str, optional
+            The resolution of the pulse splines, or 'analytic'. Defaults to `num_samples`.
+
+        Yields
+        ------
+        times : :obj:`numpy.ndarray`
+            The sample times of the chunk.
+        values : list
+            The states at `times`, or with `targets` a :obj:`numpy.ndarray` of shape (len(times), num_targets).
+
+        """
+        tlist = np.linspace(0.0, operation_time, num_samples)
+        if chunk_size is None:
+            chunk_size = max(-(-num_samples // 10), 1)
+        elif chunk_size < 1:
+            raise ValueError("`chunk_size` must be positive.")
+        noise = self.noise.compile() if self.noise.keys else []
+        dissipator = self.noise.dissipator() if self.noise.keys else None
+        observables = Observables(targets) if targets is not None else None
+        # The splines cover the whole operation, so every chunk sees the same pulses.
+        H = self.hamiltonian.compile(
+            operation_time, num_samples, resolution if resolution is not None else num_samples, fold=True
+        )
+
+        state = init_state
+        start = 0
+        while start < num_samples:
+            stop = min(start + chunk_size, num_samples)
+            if start == 0:
+                times = tlist[:stop]
+                states = [init_state] if stop == 1 else QSim._solve(
+                    H, init_state, times, noise, options, 'ode', None, dissipator
+                )
+            else:
+                times = tlist[start:stop]
+                states = QSim._solve(
+                    H, state, tlist[start - 1:stop], noise, options, 'ode', None, dissipator
+                )[1:]
+            state = states[-1]
+            start = stop
+            if observables is not None:
+                yield times, np.array([observables(t, _state) for t, _state in zip(times, states)])
+            else:
+                yield times, states
+
+    def iter_trajectories(
+        self,
+        init_state: qutip.Qobj=None,
+        operation_time: float=None,
+        num_samples: int=100,
+        targets: list=None,
+        ntraj: int=500,
+        target_error: float=None,
+        seed: int=None,
+        max_workers: int=None
+    ):
+        """ Simulate the noisy dynamics with quantum trajectories and yield the running averages of the targets.
+
+        The trajectories run in a process pool with independent seeded random streams and stop early once the
+        standard error of every value is below `target_error`. See :func:`montecarlo.iter_trajectories`.
+
+        Parameters
+        ----------
+        init_state : :obj:`qutip.Qobj`
+            Initial state vector (ket).
+        operation_time : float
+            The operation duration of the quantum dynamics.
+        num_samples : int
+            The number of samples
+        targets : list
+            Target kets, whose populations are averaged, or expectation operators.
+        ntraj : int
+            The maximum number of trajectories.
+        target_error : float, optional
+            The target standard error.
+        seed : int, optional
+            The seed of the random streams.
+        max_workers : int, optional
+            The number of worker processes.
+
+        Yields
+        ------
+        num_trajectories : int
+            The number of finished trajectories.
+        mean : :obj:`numpy.ndarray`
+            The running average of shape (num_samples, num_targets).
+        error : :obj:`numpy.ndarray`
+            The standard error of the running average.
+
+        """
+        if not self.noise.keys:
+            raise ValueError("The trajectories require noise. Use a closed system method, e.g. 'ode', without it.")
+        yield from montecarlo.iter_trajectories(
+            self.hamiltonian.compile(operation_time, num_samples),
+            self.noise.compile(),
+            init_state.full(),
+            np.linspace(0.0, operation_time, num_samples),
+            Observables(targets),
+            ntraj=ntraj,
+            target_error=target_error,
+            seed=seed,
+            max_workers=max_workers
+        )
+
+    def propagator(
+        self,
+        operation_time: float=None,
+        num_samples: int=100,
+        options: qutip.solver.Options=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ) -> np.ndarray:
+        """ Compute the propagators U(t_k) of the hamiltonian at every sample time.
+
+        The propagators are cached by the fingerprint of the hamiltonian (see :meth:`Hamiltonian.fingerprint`), so
+        they are computed once for any number of initial states.
+
+        Parameters
+        ----------
+        operation_time : float
+            The operation duration of the quantum dynamics.
+        num_samples : int
+            The number of samples
+        options : :obj:`qutip.solver.Options`
+            Options for the QuTip ODE solver.
+        progress_bar : :obj:`qutip.ui.progressbar.BaseProgressBar`, optional
+            The progress bar of the integration.
+
+        Returns
+        -------
+        propagators : :obj:`numpy.ndarray`
+            The propagators as an array of shape (num_samples, dim, dim).
+
+        """
+        key = self.hamiltonian.fingerprint(operation_time, num_samples)
+        propagators = self._propagators.get(key)
+        if propagators is None:
+            tlist = np.linspace(0.0, operation_time, num_samples)
+            if self.hamiltonian.is_piecewise_constant:
+                H = self.hamiltonian.compile(operation_time, num_samples, 'steps')
+                identity = qutip.qeye(H[0][0].dims[0])
+                propagators = propagator.evolve_piecewise_constant(
+                    H, identity.full(), tlist, progress_bar=progress_bar
+                )
+            else:
+                H = self.hamiltonian.compile(operation_time, num_samples)
+                identity = qutip.qeye(H[0][0].dims[0])
+                results = qutip.sesolve(H, identity, tlist, options=options, progress_bar=progress_bar)
+                propagators = np.array([U.full() for U in results.states])
+            self._propagators.put(key, propagators)
+
+        return propagators
+
+    def evolve(
+        self,
+        init_states: list=None,
+        operation_time: float=None,
+        num_samples: int=100,
+        options: qutip.solver.Options=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ) -> list:
+        """ Evolve a batch of initial states with the cached propagators of :meth:`propagator`.
+
+        Parameters
+        ----------
+        init_states : list
+            A list of initial state vectors (kets).
+        operation_time : float
+            The operation duration of the quantum dynamics.
+        num_samples : int
+            The number of samples
+        options : :obj:`qutip.solver.Options`
+            Options for the QuTip ODE solver.
+        progress_bar : :obj:`qutip.ui.progressbar.BaseProgressBar`, optional
+            The progress bar of the integration.
+
+        Returns
+        -------
+        state_evolutions : list
+            The state evolution of each initial state.
+
+        """
+        propagators = self.propagator(operation_time, num_samples, options, progress_bar)
+        kets = np.hstack([init_state.full() for init_state in init_states])
+        states = propagators @ kets
+
+        return [
+            [qutip.Qobj(state[:, None], dims=init_state.dims) for state in states[:, :, i]]
+            for i, init_state in enumerate(init_states)
+        ]
+
+    def sweep(
+        self,
+        points: list=None,
+        init_state: qutip.Qobj=None,
+        operation_time: float=None,
+        num_samples: int=100,
+        options: qutip.solver.Options=None,
+        method: str='ode',
+        targets: list=None,
+        max_workers: int=None,
+        chunksize: int=None
+    ) -> np.ndarray:
+        """ Simulate a sweep over pulse parameters, operation times and initial states in a process pool.
+
+        The operators are built once and shared with the workers, only the pulses are regenerated per point.
+
+        Parameters
+        ----------
+        points : list
+            The overrides of each point represented by a `dict` with the optional keys "params"
+            ({"key": {"param": value}} updating :attr:`Pulse.params`), "operation_time" and "init_state". A grid of
+            points can be built with :func:`sweep.grid`.
+        init_state : :obj:`qutip.Qobj`
+            The default initial state vector (ket).
+        operation_time : float
+            The default operation duration of the quantum dynamics.
+        num_samples : int
+            The number of samples
+        options : :obj:`qutip.solver.Options`
+            Options for the QuTip ODE solver.
+        method : str
+            The solver, one of 'ode', 'exact' and 'krylov' (see :meth:`run_expt`).
+        targets : list, optional
+            Target kets or expectation operators (see :obj:`Observables`).
+        max_workers : int, optional
+            The number of worker processes. Defaults to the number of CPUs.
+        chunksize : int, optional
+            The number of points sent to a worker at once.
+
+        Returns
+        -------
+        results : :obj:`numpy.ndarray`
+            The states of shape (num_points, num_samples, dim), or with `targets` the values of shape
+            (num_points, num_samples, num_targets).
+
+        """
+        if method not in ('ode', 'exact', 'krylov'):
+            raise ValueError("The method `%s` does not support sweeps." %(method))
+        if method == 'exact' and not self.hamiltonian.is_piecewise_constant:
+            raise ValueError(
+                "The method `exact` requires piecewise constant pulses, `square` or sequences of `square` segments."
+            )
+
+        shared = {
+            "operators": [(key, self.hamiltonian.get_operator(key).dm) for key in self.hamiltonian.keys],
+            "pulses": dict(self.hamiltonian.pulses),
+            "noise": self.noise.compile() if self.noise.keys else [],
+            "dissipator": self.noise.dissipator() if self.noise.keys else None,
+            "init_state": init_state,
+            "operation_time": operation_time,
+            "num_samples": num_samples,
+            "options": options,
+            "method": method,
+            "observables": Observables(targets) if targets is not None else None
+        }
+
+        return _sweep.run_sweep(shared, points, max_workers, chunksize)
+
+    @staticmethod
+    def _solve(
+        H: list=None,
+        init_state: qutip.Qobj=None,
+        tlist: np.ndarray=None,
+        noise: list=None,
+        options: qutip.solver.Options=None,
+        method: str='ode',
+        observables: Observables=None,
+        dissipator: qutip.Qobj=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ) -> list:
+        """ Solve the dynamics of a compiled hamiltonian and return the states (or the observables) at `tlist`.
+
+        With `noise`, the Liouvillian is the (cached) `dissipator` plus the coherent part of `H`, which is the only
+        part rebuilt when the pulses change.
+
+        """
+        observe = observables.evaluate if observables is not None else None
+        if method in ('exact', 'krylov'):
+            H = unfold(H, len(tlist))
+        if method == 'exact':
+            if noise:
+                raise ValueError("The method `%s` does not support noise." %(method))
+            states = propagator.evolve_piecewise_constant(H, init_state.full(), tlist, observe, progress_bar)
+        elif method == 'krylov':
+            if noise:
+                raise ValueError("The method `%s` does not support noise." %(method))
+            tolerance = {}
+            if options is not None:
+                tolerance = {"tol": options.atol}
+            states = krylov.evolve_krylov(
+                H, init_state.full(), tlist, observe=observe, progress_bar=progress_bar, **tolerance
+            )
+        else:
+            e_ops = observables if observables is not None else []
+            if not noise:
+                results = qutip.sesolve(
+                    H, init_state, tlist, e_ops=e_ops, options=options, progress_bar=progress_bar
+                )
+            else:
+                if dissipator is None:
+                    dissipator = sum(qutip.lindblad_dissipator(c_op) for c_op in noise)
+                L = [dissipator] + [
+                    qutip.liouvillian(term) if isinstance(term, qutip.Qobj) else [qutip.liouvillian(term[0]), term[1]]
+                    for term in H
+                ]
+                results = qutip.mesolve(
+                    L, init_state, tlist, e_ops=e_ops, options=options, progress_bar=progress_bar
+                )
+            if observables is not None:
+                return np.array(results.expect)
+            return results.states
+
+        if observables is not None:
+            return states
+        return [qutip.Qobj(state[:, None], dims=init_state.dims) for state in states]
+
+    def _run_matrix_free(
+        self,
+        init_state: qutip.Qobj=None,
+        operation_time: float=None,
+        num_samples: int=None,
+        options: qutip.solver.Options=None,
+        observables: Observables=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ) -> list:
+        """ Execute the simulation with the matrix-free hamiltonian. """
+        H = MatrixFreeHamiltonian(self.hamiltonian, operation_time, num_samples)
+        tlist = np.linspace(0.0, operation_time, num_samples)
+        H.check_hermitian(tlist)
+        tolerance = {}
+        if options is not None:
+            tolerance = {"rtol": options.rtol, "atol": options.atol}
+        observe = observables.evaluate if observables is not None else None
+        states = H.evolve(init_state.full(), tlist, observe=observe, progress_bar=progress_bar, **tolerance)
+        if observables is not None:
+            return states
+
+        return [qutip.Qobj(state[:, None], dims=init_state.dims) for state in states]
+
+    def _run_segments(
+        self,
+        init_state: qutip.Qobj=None,
+        operation_time: float=None,
+        num_samples: int=None,
+        options: qutip.solver.Options=None,
+        observables: Observables=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ) -> list:
+        """ Execute the simulation window by window (see :meth:`Hamiltonian.segments`).
+
+        The propagators of a window are cached by the signature of the window, the operators and the sample times
+        relative to the start of the window. A repeated segment reuses them when it is aligned with the samples in
+        the same way, e.g. when the segment durations are multiples of the sample spacing.
+
+        """
+        self.hamiltonian.check_hermitian(operation_time, num_samples)
+        tlist = np.linspace(0.0, operation_time, num_samples)
+        keys = self.hamiltonian.keys
+        operators = [self.hamiltonian.get_operator(key).dm for key in keys]
+        operator_keys = tuple(self.hamiltonian.get_operator(key).key for key in keys)
+
+        psi = init_state.full().ravel()
+        states = np.empty((num_samples, len(psi)), dtype=complex)
+        states[0] = psi
+        if progress_bar is not None:
+            progress_bar.start(num_samples)
+        for start, stop, signature, pulses in self.hamiltonian.segments(operation_time):
+            indices = np.flatnonzero((tlist > start) & (tlist <= stop))
+            times = np.append(tlist[indices] - start, stop - start)
+            key = (operator_keys, signature, tuple(np.round(times, 12)))
+            propagators = self._segment_propagators.get(key)
+            if propagators is None:
+                propagators = propagator.segment_propagators(operators, pulses, times, options)
+                self._segment_propagators.put(key, propagators)
+            states[indices] = propagators[:-1] @ psi
+            psi = propagators[-1] @ psi
+            if progress_bar is not None and len(indices):
+                progress_bar.update(indices[-1] + 1)
+        if progress_bar is not None:
+            progress_bar.finished()
+
+        if observables is not None:
+            return observables.evaluate(states)
+        return [qutip.Qobj(state[:, None], dims=init_state.dims) for state in states]
+
+    def _run_floquet(
+        self,
+        init_state: qutip.Qobj=None,
+        operation_time: float=None,
+        num_samples: int=None,
+        options: qutip.solver.Options=None,
+        observables: Observables=None,
+        progress_bar: qutip.ui.progressbar.BaseProgressBar=None
+    ) -> list:
+        """ Execute the simulation with the cached one-period propagator of a periodic hamiltonian. """
+        period = self.hamiltonian.period()
+        if period is None:
+            raise ValueError("The method `floquet` requires pulses with a common period.")
+        tlist = np.linspace(0.0, operation_time, num_samples)
+        if period == 0.0:
+            # A constant hamiltonian is periodic with any period.
+            period = operation_time
+
+        key = self.hamiltonian.fingerprint(operation_time, num_samples) + ":floquet"
+        floquet = self._propagators.get(key)
+        if floquet is None:
+            _, taus = _floquet.split_times(tlist, period)
+            H = self.hamiltonian.compile(operation_time, num_samples, 'analytic')
+            floquet = _floquet.FloquetPropagator(H, period, taus, options, progress_bar)
+            self._propagators.put(key, floquet)
+
+        observe = observables.evaluate if observables is not None else None
+        states = floquet.evolve(init_state.full(), tlist, observe)
+        if observables is not None:
+            return states
+        return [qutip.Qobj(state[:, None], dims=init_state.dims) for state in states]
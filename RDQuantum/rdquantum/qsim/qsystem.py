@@ -38,6 +38,13 @@ class QSystem:
 
         return _info
 
+    @property
+    def signature(self):
+        """ The ordered species and energy levels of the qsystem as a hashable tuple. """
+        return tuple(
+            (_qsystem.name, tuple(_qsystem.energy_levels)) for _qsystem in self._qsystem
+        )
+
     @property
     def num_quantas(self):
         return len(self._qsystem)
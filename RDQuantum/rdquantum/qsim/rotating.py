@@ -0,0 +1,260 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+import scipy.sparse as sp
+import qutip
+
+if TYPE_CHECKING:
+    from .hamiltonian import Hamiltonian
+
+class RotatingFrame:
+    """ A hamiltonian compiled into a rotating frame with the rotating wave approximation (RWA).
+
+    The frame is :math:`U(t) = e^{i H_0 t}` with :math:`H_0 = \\sum_j \\sum_l E_{j,l} \\ket{l}_j \\bra{l}`, so a
+    transition :math:`\\ket{a}\\bra{b}` rotates with the frequency :math:`E_a - E_b`. A pulse component
+    :math:`c \\, f(t) \\, e^{i \\omega t}` (see :meth:`Pulse.components`) of the transition oscillates with
+    :math:`\\nu = E_a - E_b + \\omega` in the frame and is dropped when :math:`|\\nu|` is not below the cutoff.
+
+    Parameters
+    ----------
+    hamiltonian : :obj:`Hamiltonian`
+        The hamiltonian in the lab frame.
+    operation_time : float
+        The operation duration.
+    num_samples : int
+        The number of samples.
+    frame : dict, optional
+        The frame energies of the energy levels represented by a `dict` {"level": float}, the same for every
+        subsystem. Defaults to the energies set by the drive frequencies (see :meth:`drive_energies`).
+    cutoff : float, optional
+        Components with a frame frequency :math:`|\\nu|` of at least `cutoff` are dropped. Defaults to the smallest
+        drive frequency.
+
+    Attributes
+    ----------
+    H : list
+        The hamiltonian in the rotating frame in the format required by QuTip.solver (H).
+    H_steps : list
+        The hamiltonian in the rotating frame with the coefficients as steps switching at the exact times (see
+        :meth:`Pulse.steps`) for :func:`propagator.evolve_piecewise_constant`, or `None` if it is not piecewise
+        constant.
+    energies : list
+        The frame energies of each subsystem represented by a list of `dict` {"level": float}.
+    error : float
+        An estimate of the error introduced by the dropped components,
+        :math:`\\sum |c| \\max|f| \\, \\|\\ket{a}\\bra{b}\\| / |\\nu|`, the first-order bound of their effect on the
+        state.
+    dropped : int
+        The number of dropped transition components.
+    is_piecewise_constant : bool
+        Whether the hamiltonian in the frame is piecewise constant, e.g. for the method 'exact'.
+
+    """
+    def __init__(
+        self,
+        hamiltonian: Hamiltonian=None,
+        operation_time: float=None,
+        num_samples: int=None,
+        frame: dict=None,
+        cutoff: float=None
+    ):
+        qsystem = hamiltonian.qsystem
+        num_quantas = qsystem.num_quantas
+        if frame is None:
+            self._energies = self.drive_energies(hamiltonian)
+        else:
+            self._energies = [
+                {level: frame.get(level, 0.0) for level in qsystem.get_species(index).energy_levels}
+                for index in range(num_quantas)
+            ]
+        if cutoff is None:
+            frequencies = [
+                abs(omega)
+                for pulse in hamiltonian.pulses.values()
+                for _, omega, _ in pulse.components()
+                if omega != 0.0
+            ]
+            cutoff = min(frequencies) if frequencies else np.inf
+        self._cutoff = cutoff
+
+        tlist = np.linspace(0.0, operation_time, num_samples)
+        self._tlist = tlist
+        self._error = 0.0
+        self._dropped = 0
+        self._piecewise_constant = True
+        self.H = []
+        self.H_steps = []
+        for key in hamiltonian.keys:
+            operator = hamiltonian.get_operator(key)
+            pulse = hamiltonian.get_pulse(key)
+            for amplitude, omega, envelope in pulse.components():
+                values = envelope.generate_tlist(operation_time, num_samples) if envelope is not None else None
+                scale = np.max(np.abs(values)) if values is not None else 1.0
+
+                # Group the transitions by their frequency in the frame.
+                groups = {}
+                for coefficient, transition in operator.transitions:
+                    nu = omega + sum(
+                        self._energies[index][ket] - self._energies[index][bra]
+                        for index, (ket, bra) in transition.items()
+                    )
+                    if abs(nu) >= cutoff:
+                        self._error += abs(amplitude * coefficient) * scale / abs(nu)
+                        self._dropped += 1
+                    else:
+                        groups.setdefault(round(nu, 12), []).append((coefficient, transition))
+
+                # A kept component is piecewise constant in the frame when it is resonant and its envelope is.
+                if groups and (
+                    any(nu != 0.0 for nu in groups)
+                    or (envelope is not None and not envelope.is_piecewise_constant)
+                ):
+                    self._piecewise_constant = False
+                if self._piecewise_constant and groups:
+                    times, steps = envelope.steps(operation_time) if envelope is not None else (np.zeros(1), np.ones(1))
+                for nu, transitions in groups.items():
+                    rows = []
+                    cols = []
+                    data = []
+                    for coefficient, transition in transitions:
+                        _rows, _cols = operator._transition_indices(transition)
+                        rows.append(_rows)
+                        cols.append(_cols)
+                        data.append(np.full(len(_rows), coefficient, dtype=complex))
+                    operator_dm = operator._assemble(
+                        np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+                    )
+                    coeff = amplitude * np.exp(1j * nu * tlist)
+                    if values is not None:
+                        coeff = coeff * values
+                    if nu == 0.0 and np.all(coeff.imag == 0.0):
+                        coeff = coeff.real
+                    self.H.append([operator_dm, coeff])
+                    if self._piecewise_constant:
+                        self.H_steps.append([operator_dm, (times, amplitude * steps)])
+
+        # The frame itself contributes -H_0.
+        self._diagonal = self._frame_diagonal(qsystem)
+        if np.any(self._diagonal):
+            dims = [len(qsystem.get_species(index).energy_levels) for index in range(num_quantas)]
+            H0 = qutip.Qobj(sp.diags(-self._diagonal.astype(complex), format='csr'), dims=[dims, dims])
+            self.H.append([H0, np.ones(num_samples)])
+            self.H_steps.append([H0, (np.zeros(1), np.ones(1))])
+        if not self._piecewise_constant:
+            self.H_steps = None
+
+    @property
+    def energies(self):
+        return self._energies
+
+    @property
+    def cutoff(self):
+        return self._cutoff
+
+    @property
+    def error(self):
+        return self._error
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    @property
+    def is_piecewise_constant(self):
+        """ `True` if every kept component is resonant with a piecewise constant envelope. """
+        return self._piecewise_constant
+
+    @staticmethod
+    def drive_energies(
+        hamiltonian: Hamiltonian=None
+    ) -> list:
+        """ Derive the frame energies from the drive frequencies.
+
+        Every single-subsystem operator with a periodic pulse of frequency :math:`a` sets
+        :math:`E_{ket} - E_{bra} = |a|` for the first transition of its recipe, e.g. ("r","g"). The constraints are
+        propagated from the lowest listed level of each subsystem, which has zero energy. Conflicting constraints
+        keep the first value, the remaining detuning stays in the hamiltonian.
+
+        """
+        qsystem = hamiltonian.qsystem
+        energies = [{} for _ in range(qsystem.num_quantas)]
+        constraints = []
+        for key in hamiltonian.keys:
+            operator = hamiltonian.get_operator(key)
+            frequencies = [abs(omega) for _, omega, _ in hamiltonian.get_pulse(key).components() if omega != 0.0]
+            kets, bras = operator.sub_dm[0]
+            if not frequencies or len(kets) != 1 or kets == bras:
+                continue
+            for _target in operator.target:
+                constraints.append((_target[0], kets[0], bras[0], frequencies[0]))
+
+        changed = True
+        while changed:
+            changed = False
+            for index, ket, bra, frequency in constraints:
+                _energies = energies[index]
+                if bra in _energies and ket not in _energies:
+                    _energies[ket] = _energies[bra] + frequency
+                elif ket in _energies and bra not in _energies:
+                    _energies[bra] = _energies[ket] - frequency
+                elif ket not in _energies and bra not in _energies:
+                    _energies[bra] = 0.0
+                    _energies[ket] = frequency
+                else:
+                    continue
+                changed = True
+
+        for index in range(qsystem.num_quantas):
+            for level in qsystem.get_species(index).energy_levels:
+                energies[index].setdefault(level, 0.0)
+
+        return energies
+
+    def _frame_diagonal(
+        self,
+        qsystem
+    ) -> np.ndarray:
+        """ Return the diagonal of :math:`H_0` on the full Hilbert space. """
+        diagonal = np.zeros(1)
+        for index in range(qsystem.num_quantas):
+            levels = qsystem.get_species(index).energy_levels
+            local = np.array([self._energies[index][level] for level in levels])
+            diagonal = (diagonal[:, None] + local[None, :]).ravel()
+
+        return diagonal
+
+    def to_lab(
+        self,
+        states: list=None,
+        tlist: np.ndarray=None
+    ) -> list:
+        """ Transform states of the rotating frame back to the lab frame.
+
+        Parameters
+        ----------
+        states : list
+            The kets or density matrices (:obj:`qutip.Qobj`) in the rotating frame, or an array of flat kets of
+            shape (len(tlist), dim).
+        tlist : :obj:`numpy.ndarray`, optional
+            The times of the states. Defaults to the samples of the compiled hamiltonian.
+
+        Returns
+        -------
+        states : list
+            The states :math:`e^{-i H_0 t} \\psi(t)` in the same format as `states`.
+
+        """
+        tlist = self._tlist if tlist is None else tlist
+        phases = np.exp(-1j * np.outer(tlist, self._diagonal))
+        if isinstance(states, np.ndarray):
+            return states * phases
+
+        lab_states = []
+        for state, phase in zip(states, phases):
+            if state.isket:
+                lab_states.append(qutip.Qobj(phase[:, None] * state.full(), dims=state.dims))
+            else:
+                lab_states.append(qutip.Qobj(phase[:, None] * state.full() * phase.conj()[None, :], dims=state.dims))
+
+        return lab_states
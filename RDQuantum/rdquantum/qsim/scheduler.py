@@ -0,0 +1,317 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import os
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, Future, CancelledError
+
+from qutip.ui.progressbar import BaseProgressBar
+
+from .jobs import SimulationCancelled
+from .propagator import PropagatorCache
+
+if TYPE_CHECKING:
+    from .qsim import QSim
+
+# The scheduler shared by all sessions of the process (see :func:`get_scheduler`).
+_scheduler = None
+_scheduler_lock = threading.Lock()
+# The propagator caches of a worker process, kept across its jobs and keyed by the fingerprint of the hamiltonian.
+_propagators = PropagatorCache()
+_segment_propagators = PropagatorCache(max_entries=64)
+
+class _RemoteProgressBar(BaseProgressBar):
+    """ A QuTip progress bar writing the progress to a shared value and checking a shared cancellation event. """
+    def __init__(
+        self,
+        progress=None,
+        cancel=None
+    ):
+        self._progress = progress
+        self._cancel = cancel
+        self._iterations = 1
+
+    def start(self, iterations, **kwargs):
+        self._iterations = max(iterations, 1)
+
+    def update(self, n):
+        if self._cancel.is_set():
+            raise SimulationCancelled("The simulation was cancelled.")
+        self._progress.value = n / self._iterations
+
+    def finished(self):
+        self._progress.value = 1.0
+
+def _run_recipe(
+    recipe: dict=None,
+    kwargs: dict=None,
+    progress=None,
+    cancel=None
+):
+    """ Rebuild the simulator from its recipe in a worker process and run the experiment.
+
+    The simulator shares the propagator caches of the worker, so a job changing only the initial state of a previous
+    job of the same worker reuses its propagators.
+
+    """
+    from .qsim import QSim
+
+    if cancel.is_set():
+        raise SimulationCancelled("The simulation was cancelled.")
+    qsim = QSim.from_recipe(recipe, _propagators, _segment_propagators)
+    return qsim.run_expt(progress_bar=_RemoteProgressBar(progress, cancel), **kwargs)
+
+class ScheduledJob:
+    """ An experiment queued on the :obj:`JobScheduler`, shared by all users who submitted the same experiment.
+
+    Attributes
+    ----------
+    key : str
+        The hash of the experiment (see :meth:`QSim.experiment_hash`).
+    users : set
+        The users waiting for the result.
+    progress : float
+        The solver progress as a fraction of `tlist`.
+    status : str
+        One of 'queued', 'running', 'done', 'cancelled' and 'failed'.
+
+    """
+    def __init__(
+        self,
+        key: str=None,
+        recipe: dict=None,
+        kwargs: dict=None,
+        progress=None,
+        cancel=None
+    ):
+        self.key = key
+        self.users = set()
+        self._recipe = recipe
+        self._kwargs = kwargs
+        self._progress = progress
+        self._cancel = cancel
+        self._status = 'queued'
+        self._future = Future()
+        self._scheduler = None
+
+    @property
+    def progress(self):
+        if self._status == 'done':
+            return 1.0
+        try:
+            return self._progress.value
+        except (OSError, EOFError):
+            return 0.0
+
+    @property
+    def status(self):
+        return self._status
+
+    def done(
+        self
+    ) -> bool:
+        return self._future.done()
+
+    def result(
+        self,
+        timeout: float=None
+    ):
+        """ Wait for and return the result of the experiment.
+
+        Raises
+        ------
+        SimulationCancelled
+            If the job was cancelled.
+
+        """
+        try:
+            return self._future.result(timeout)
+        except CancelledError:
+            raise SimulationCancelled("The simulation was cancelled.") from None
+
+    def exception(
+        self,
+        timeout: float=None
+    ) -> Optional[BaseException]:
+        if self._future.cancelled():
+            return SimulationCancelled("The simulation was cancelled.")
+        return self._future.exception(timeout)
+
+    def cancel(
+        self,
+        user: str=None
+    ):
+        """ Withdraw `user`, or all users, from the job. The job is cancelled when no user is waiting. """
+        self._scheduler._cancel(self, user)
+
+class JobScheduler:
+    """ A server-wide scheduler running experiments in a bounded process pool.
+
+    - Fairness: every user has its own queue and the queues are served round-robin, so a user submitting many
+      experiments does not delay the others.
+    - Deduplication: an experiment identical to a queued or running one, by :meth:`QSim.experiment_hash`, joins
+      the existing job, so one computation serves all waiting users.
+    - Workers rebuild the simulator from :meth:`QSim.to_recipe`, so only JSON-like data crosses the processes.
+      Every worker keeps its propagator caches across jobs (see :meth:`QSim.propagator`).
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    """
+    def __init__(
+        self,
+        max_workers: int=None
+    ):
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(self._max_workers)
+        self._manager = None
+        self._lock = threading.RLock()
+        self._queues = OrderedDict()
+        self._jobs = {}
+        self._running = 0
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def jobs(self):
+        """ The queued and running jobs represented by a `dict` {"key": :obj:`ScheduledJob`}. """
+        return dict(self._jobs)
+
+    def submit(
+        self,
+        user: str=None,
+        qsim: QSim=None,
+        **kwargs
+    ) -> ScheduledJob:
+        """ Queue the experiment :meth:`QSim.run_expt` of `qsim` for `user`.
+
+        Parameters
+        ----------
+        user : str
+            The identifier of the user, e.g. a session id.
+        qsim : :obj:`QSim`
+            The simulator. Its recipe is taken at submission, so it can be edited afterwards.
+        **kwargs
+            The arguments of :meth:`QSim.run_expt`. Keyword arguments are required for the experiment hash.
+
+        Returns
+        -------
+        job : :obj:`ScheduledJob`
+            The job of the experiment, possibly shared with other users.
+
+        """
+        settings = {key: value for key, value in kwargs.items() if key not in ("cache", "progress_bar", "store")}
+        key = qsim.experiment_hash(**settings)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                if self._manager is None:
+                    self._manager = multiprocessing.Manager()
+                job = ScheduledJob(
+                    key, qsim.to_recipe(), kwargs, self._manager.Value('d', 0.0), self._manager.Event()
+                )
+                job._scheduler = self
+                self._jobs[key] = job
+                self._queues.setdefault(user, deque()).append(job)
+            job.users.add(user)
+            self._dispatch()
+
+        return job
+
+    def _dispatch(
+        self
+    ):
+        """ Start queued jobs round-robin over the users while workers are free. """
+        with self._lock:
+            while self._running < self._max_workers and self._queues:
+                user, queue = next(iter(self._queues.items()))
+                job = queue.popleft()
+                # Move the user to the end of the round.
+                del self._queues[user]
+                if queue:
+                    self._queues[user] = queue
+
+                job._status = 'running'
+                self._running += 1
+                future = self._executor.submit(_run_recipe, job._recipe, job._kwargs, job._progress, job._cancel)
+                future.add_done_callback(lambda future, job=job: self._finish(job, future))
+
+    def _finish(
+        self,
+        job: ScheduledJob=None,
+        future: Future=None
+    ):
+        with self._lock:
+            self._running -= 1
+            # A cancelled job has already been replaced by a new submission of the same experiment.
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            exception = future.exception()
+            if isinstance(exception, SimulationCancelled):
+                job._status = 'cancelled'
+                job._future.cancel()
+            elif exception is not None:
+                job._status = 'failed'
+                job._future.set_exception(exception)
+            else:
+                job._status = 'done'
+                job._future.set_result(future.result())
+            self._dispatch()
+
+    def _cancel(
+        self,
+        job: ScheduledJob=None,
+        user: str=None
+    ):
+        with self._lock:
+            if user is None:
+                job.users.clear()
+            else:
+                job.users.discard(user)
+            if job.users or job.done():
+                return
+
+            if job._status == 'queued':
+                for _user, queue in list(self._queues.items()):
+                    if job in queue:
+                        queue.remove(job)
+                        if not queue:
+                            del self._queues[_user]
+                self._jobs.pop(job.key, None)
+                job._status = 'cancelled'
+                job._future.cancel()
+            else:
+                # The worker stops at its next progress update. A new submission of the experiment starts afresh.
+                job._cancel.set()
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def shutdown(
+        self
+    ):
+        """ Cancel the queued jobs and stop the workers. """
+        with self._lock:
+            for queue in self._queues.values():
+                for job in queue:
+                    job._status = 'cancelled'
+                    job._future.cancel()
+            self._queues.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+def get_scheduler(
+    max_workers: int=None
+) -> JobScheduler:
+    """ Return the scheduler shared by all sessions of the process, created on first use. """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(max_workers)
+    return _scheduler
@@ -0,0 +1,119 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+import qutip
+
+class Subspace:
+    """ A subspace of the full Hilbert space spanned by a subset of the basis states.
+
+    Parameters
+    ----------
+    indices : :obj:`numpy.ndarray`
+        The sorted indices of the basis states spanning the subspace.
+    dims : list
+        The dimensions of the quantum subsystems of the full Hilbert space.
+
+    Attributes
+    ----------
+    indices : :obj:`numpy.ndarray`
+        The sorted indices of the basis states spanning the subspace.
+    dim : int
+        The dimension of the subspace.
+    full_dim : int
+        The dimension of the full Hilbert space.
+
+    """
+    def __init__(
+        self,
+        indices: np.ndarray=None,
+        dims: list=None
+    ):
+        self._indices = np.asarray(indices, dtype=np.int64)
+        self._dims = list(dims)
+
+    @property
+    def indices(self):
+        return self._indices
+
+    @property
+    def dim(self):
+        return len(self._indices)
+
+    @property
+    def full_dim(self):
+        return int(np.prod(self._dims))
+
+    @classmethod
+    def reachable(
+        cls,
+        operators: list=None,
+        init_state: qutip.Qobj=None
+    ) -> Subspace:
+        """ Find the subspace reachable from `init_state` through the `operators`.
+
+        Parameters
+        ----------
+        operators : list
+            A list of :obj:`qutip.Qobj` operators on the full Hilbert space, e.g. the operators of
+            :meth:`Hamiltonian.compile` and the collapse operators.
+        init_state : :obj:`qutip.Qobj`
+            Initial state vector (ket) or density matrix.
+
+        Returns
+        -------
+        subspace : :obj:`Subspace`
+
+        Notes
+        -----
+        Two basis states are connected when any operator has a nonzero matrix element between them. The
+        connectivity is symmetrized, so the subspace is closed under the time evolution for any (complex)
+        coefficients of the operators.
+
+        """
+        dims = init_state.dims[0]
+        dim = int(np.prod(dims))
+        adjacency = sp.csr_matrix((dim, dim), dtype=bool)
+        for operator in operators:
+            pattern = abs(operator.data) > 0
+            adjacency = adjacency + pattern + pattern.T
+
+        if init_state.isket:
+            seeds = np.flatnonzero(init_state.full().ravel())
+        else:
+            seeds = np.flatnonzero(np.diag(init_state.full()))
+
+        _, labels = connected_components(adjacency, directed=False)
+        indices = np.flatnonzero(np.isin(labels, labels[seeds]))
+
+        return cls(indices, dims)
+
+    def restrict(
+        self,
+        qobj: qutip.Qobj=None
+    ) -> qutip.Qobj:
+        """ Restrict an operator, ket or density matrix on the full Hilbert space to the subspace. """
+        data = qobj.data.tocsr()
+        if qobj.isket:
+            return qutip.Qobj(data[self._indices, :], dims=[[self.dim], [1]])
+        else:
+            return qutip.Qobj(data[self._indices, :][:, self._indices], dims=[[self.dim], [self.dim]])
+
+    def embed(
+        self,
+        qobj: qutip.Qobj=None
+    ) -> qutip.Qobj:
+        """ Embed a ket or density matrix of the subspace into the full Hilbert space. """
+        if qobj.isket:
+            ket = np.zeros((self.full_dim, 1), dtype=complex)
+            ket[self._indices, 0] = qobj.full().ravel()
+            return qutip.Qobj(ket, dims=[self._dims, [1] * len(self._dims)])
+        else:
+            projector = sp.csr_matrix(
+                (np.ones(self.dim), (self._indices, np.arange(self.dim))),
+                shape=(self.full_dim, self.dim)
+            )
+            dm = projector @ qobj.data @ projector.T
+            return qutip.Qobj(dm, dims=[self._dims, self._dims])
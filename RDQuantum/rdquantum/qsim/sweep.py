@@ -0,0 +1,149 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .pulse import Pulse, PulseSequence
+
+# The operators and defaults shared by the points of a sweep, set once per worker process.
+_shared = {}
+
+def grid(
+    params: dict=None,
+    operation_time: list=None,
+    init_state: list=None
+) -> list:
+    """ Build the points of a grid sweep.
+
+    Parameters
+    ----------
+    params : dict, optional
+        The values of the pulse parameters represented by a `dict` {"key": {"param": [values]}}.
+    operation_time : list, optional
+        The values of the operation time.
+    init_state : list, optional
+        The initial states.
+
+    Returns
+    -------
+    points : list
+        The cartesian product of all values as a list of overrides (see :meth:`QSim.sweep`).
+
+    """
+    axes = []
+    if params:
+        for key in params.keys():
+            for param in params[key].keys():
+                axes.append([("params", key, param, value) for value in params[key][param]])
+    if operation_time is not None:
+        axes.append([("operation_time", None, None, value) for value in operation_time])
+    if init_state is not None:
+        axes.append([("init_state", None, None, value) for value in init_state])
+
+    points = []
+    for combination in itertools.product(*axes):
+        point = {}
+        for name, key, param, value in combination:
+            if name == "params":
+                point.setdefault("params", {}).setdefault(key, {})[param] = value
+            else:
+                point[name] = value
+        points.append(point)
+
+    return points
+
+def _init_worker(
+    shared: dict=None
+):
+    _shared.clear()
+    _shared.update(shared)
+
+def _run_point(
+    point: dict=None
+) -> np.ndarray:
+    """ Simulate a single point of a sweep with the shared operators. """
+    from .qsim import QSim
+
+    operation_time = point.get("operation_time", _shared["operation_time"])
+    init_state = point.get("init_state", _shared["init_state"])
+    num_samples = _shared["num_samples"]
+    overrides = point.get("params", {})
+
+    H = []
+    for key, operator_dm in _shared["operators"]:
+        pulse = _shared["pulses"][key]
+        if key in overrides:
+            recipe = pulse.recipe
+            pulse = Pulse(recipe["shape"], recipe["constant"], recipe["phase"], **{**pulse.params, **overrides[key]})
+        if _shared["method"] == 'exact':
+            H.append([operator_dm, pulse.coefficient(operation_time, 'steps')])
+        else:
+            H.append([operator_dm, pulse.generate_tlist(operation_time, num_samples)])
+    tlist = np.linspace(0.0, operation_time, num_samples)
+
+    observables = _shared["observables"]
+    results = QSim._solve(
+        H, init_state, tlist, _shared["noise"], _shared["options"], _shared["method"], observables,
+        _shared["dissipator"]
+    )
+    if observables is not None:
+        return results
+    return np.array([state.full().ravel() if state.isket else state.full() for state in results])
+
+def _run_chunk(
+    points: list=None
+) -> list:
+    return [_run_point(point) for point in points]
+
+def run_sweep(
+    shared: dict=None,
+    points: list=None,
+    max_workers: int=None,
+    chunksize: int=None
+) -> np.ndarray:
+    """ Simulate the points of a sweep in a process pool.
+
+    Parameters
+    ----------
+    shared : dict
+        The compiled operators, pulses and defaults shared by all points, sent once to every worker.
+    points : list
+        The overrides of each point.
+    max_workers : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+    chunksize : int, optional
+        The number of points sent to a worker at once. Defaults to a quarter of the points per worker.
+
+    Returns
+    -------
+    results : :obj:`numpy.ndarray`
+        The results of all points stacked along the first axis, or an empty array without points.
+
+    """
+    if not points:
+        return np.empty(0)
+    for point in points:
+        for key in point.get("params", {}):
+            if isinstance(shared["pulses"][key], PulseSequence):
+                raise ValueError(
+                    "The pulse of `%s` is a :obj:`PulseSequence`, whose params cannot be swept." %(key)
+                )
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_workers = min(max_workers, len(points))
+    chunksize = chunksize or max(1, math.ceil(len(points) / (4 * max_workers)))
+    chunks = [points[i:i + chunksize] for i in range(0, len(points), chunksize)]
+
+    if max_workers <= 1:
+        _init_worker(shared)
+        results = [_run_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(shared,)) as executor:
+            results = list(executor.map(_run_chunk, chunks))
+
+    return np.stack([result for chunk in results for result in chunk])
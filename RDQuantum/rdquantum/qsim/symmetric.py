@@ -0,0 +1,252 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import itertools
+from math import factorial
+
+import numpy as np
+import scipy.sparse as sp
+import qutip
+
+if TYPE_CHECKING:
+    from .qsystem import QSystem
+    from .operator import Operator
+    from .hamiltonian import Hamiltonian
+
+class SymmetricBasis:
+    """ The permutation-symmetric (Dicke) basis of a quantum system of identical species.
+
+    A basis state is labelled by the occupations of the energy levels, so the dimension is
+    :math:`\\binom{N + d - 1}{d - 1}` for :math:`N` quantas with :math:`d` energy levels.
+
+    Parameters
+    ----------
+    qsystem : :obj:`QSystem`
+        The quantum system. All the subsystems must be the same species.
+
+    Attributes
+    ----------
+    qsystem : :obj:`QSystem`
+        The quantum system.
+    occupations : list
+        The occupations of the energy levels of each basis state.
+    dim : int
+        The dimension of the symmetric subspace.
+
+    """
+    def __init__(
+        self,
+        qsystem: QSystem=None
+    ):
+        if len(set(qsystem.signature)) != 1:
+            raise ValueError("The symmetric basis requires a quantum system of identical species.")
+        self._qsystem = qsystem
+        self._energy_levels = qsystem.get_species(0).energy_levels
+        num_levels = len(self._energy_levels)
+        self._occupations = [
+            tuple(np.bincount(levels, minlength=num_levels))
+            for levels in itertools.combinations_with_replacement(range(num_levels), qsystem.num_quantas)
+        ]
+        self._index = {occupation: index for index, occupation in enumerate(self._occupations)}
+
+    @property
+    def qsystem(self):
+        return self._qsystem
+
+    @property
+    def occupations(self):
+        return self._occupations
+
+    @property
+    def dim(self):
+        return len(self._occupations)
+
+    @staticmethod
+    def is_invariant(
+        hamiltonian: Hamiltonian=None
+    ) -> bool:
+        """ Check if the `hamiltonian` is invariant under permutations of the subsystems.
+
+        The `hamiltonian` is permutation invariant when the quantum system consists of identical species, every
+        operator is applied to all the combinations of its number of targets, and the local operator is symmetric
+        under permutations of its targets.
+
+        """
+        qsystem = hamiltonian.qsystem
+        if len(set(qsystem.signature)) != 1:
+            return False
+
+        for key in hamiltonian.keys:
+            operator = hamiltonian.get_operator(key)
+            num_target = len(operator.target[0])
+            targets = sorted(tuple(sorted(_target)) for _target in operator.target)
+            if targets != list(itertools.combinations(range(qsystem.num_quantas), num_target)):
+                return False
+
+            local = SymmetricBasis._local_terms(operator)
+            for permutation in itertools.permutations(range(num_target)):
+                permuted = {}
+                for (kets, bras), coefficient in local.items():
+                    _key = (tuple(kets[i] for i in permutation), tuple(bras[i] for i in permutation))
+                    permuted[_key] = coefficient
+                for _key in set(local) | set(permuted):
+                    if not np.isclose(local.get(_key, 0.0), permuted.get(_key, 0.0)):
+                        return False
+
+        return True
+
+    @staticmethod
+    def _local_terms(
+        operator: Operator=None
+    ) -> dict:
+        """ Return the local operator on the first target as a `dict` {(kets, bras): coefficient}. """
+        first_target = list(operator.target[0])
+        local = {}
+        for coefficient, transition in operator.transitions:
+            if sorted(transition.keys()) != sorted(first_target):
+                continue
+            kets = tuple(transition[index][0] for index in first_target)
+            bras = tuple(transition[index][1] for index in first_target)
+            local[(kets, bras)] = local.get((kets, bras), 0.0) + coefficient
+
+        return local
+
+    def operator(
+        self,
+        operator: Operator=None
+    ) -> qutip.Qobj:
+        """ Represent a permutation-invariant operator in the symmetric basis.
+
+        Parameters
+        ----------
+        operator : :obj:`Operator`
+            An operator applied to all the combinations of its targets with a symmetric local operator.
+
+        Returns
+        -------
+        dm : :obj:`qutip.Qobj`
+            The operator in the symmetric basis.
+
+        Notes
+        -----
+        A sum of a symmetric :math:`k`-body operator over all combinations of :math:`k` subsystems equals
+        :math:`\\frac{1}{k!} \\sum c \\, a^\\dagger_{a_1} \\cdots a^\\dagger_{a_k} a_{b_k} \\cdots a_{b_1}` with
+        bosonic operators on the occupations of the energy levels, which is evaluated directly on the occupations.
+
+        """
+        num_target = len(operator.target[0])
+        local = self._local_terms(operator)
+
+        rows = []
+        cols = []
+        data = []
+        for (kets, bras), coefficient in local.items():
+            kets = [self._energy_levels.index(level) for level in kets]
+            bras = [self._energy_levels.index(level) for level in bras]
+            for col, occupation in enumerate(self._occupations):
+                occupation = list(occupation)
+                amplitude = coefficient / factorial(num_target)
+                for level in bras:
+                    amplitude *= np.sqrt(occupation[level])
+                    occupation[level] -= 1
+                    if occupation[level] < 0:
+                        break
+                else:
+                    for level in kets:
+                        amplitude *= np.sqrt(occupation[level] + 1)
+                        occupation[level] += 1
+                    rows.append(self._index[tuple(occupation)])
+                    cols.append(col)
+                    data.append(amplitude)
+
+        matrix = sp.coo_matrix((data, (rows, cols)), shape=(self.dim, self.dim), dtype=complex).tocsr()
+
+        return qutip.Qobj(matrix, dims=[[self.dim], [self.dim]])
+
+    def compile(
+        self,
+        hamiltonian: Hamiltonian=None,
+        operation_time: float=None,
+        num_samples: int=None,
+        resolution: int|str=None
+    ) -> list:
+        """ Return the `hamiltonian` in the symmetric basis in the format required by QuTip.solver (H).
+
+        See :meth:`Hamiltonian.compile` for `resolution`.
+
+        """
+        if not self.is_invariant(hamiltonian):
+            raise ValueError("The hamiltonian is not invariant under permutations of the subsystems.")
+
+        H = []
+        for key in hamiltonian.keys:
+            operator_dm = self.operator(hamiltonian.get_operator(key))
+            if resolution is None:
+                pulse_tlist = hamiltonian.get_pulse(key).generate_tlist(operation_time, num_samples)
+            else:
+                pulse_tlist = hamiltonian.get_pulse(key).coefficient(operation_time, resolution)
+            H.append([operator_dm, pulse_tlist])
+
+        return H
+
+    def generate_state(
+        self,
+        state: str=None
+    ) -> qutip.Qobj:
+        """ Generate a (ket) product state in the symmetric basis.
+
+        Parameters
+        ----------
+        state : str
+            State represented by symbols of energy level. All the subsystems must be in the same energy level.
+
+        Returns
+        -------
+        ket : :obj:`qutip.Qobj`
+            The requested ket state in the symmetric basis.
+
+        """
+        if len(state) != self._qsystem.num_quantas or len(set(state)) != 1:
+            raise ValueError(
+                "The state `%s` is not a product state in the symmetric basis. All %s subsystems must be in the same "
+                "energy level." %(state, self._qsystem.num_quantas)
+            )
+        occupation = [0] * len(self._energy_levels)
+        occupation[self._energy_levels.index(state[0])] = self._qsystem.num_quantas
+
+        return qutip.basis(self.dim, self._index[tuple(occupation)])
+
+    def _embedding(
+        self
+    ) -> sp.csr_matrix:
+        """ Return the isometry from the symmetric basis into the full Hilbert space. """
+        num_levels = len(self._energy_levels)
+        num_quantas = self._qsystem.num_quantas
+        full_dim = num_levels**num_quantas
+        digits = (np.arange(full_dim)[:, None] // num_levels**np.arange(num_quantas)[::-1]) % num_levels
+        occupations = np.stack([np.count_nonzero(digits == level, axis=1) for level in range(num_levels)], axis=1)
+
+        cols = np.array([self._index[tuple(occupation)] for occupation in occupations])
+        multiplicities = np.bincount(cols, minlength=self.dim)
+        data = 1.0 / np.sqrt(multiplicities[cols])
+
+        return sp.csr_matrix((data, (np.arange(full_dim), cols)), shape=(full_dim, self.dim))
+
+    def project(
+        self,
+        ket: qutip.Qobj=None
+    ) -> qutip.Qobj:
+        """ Project a ket of the full Hilbert space onto the symmetric basis. """
+        return qutip.Qobj(self._embedding().T @ ket.full(), dims=[[self.dim], [1]])
+
+    def embed(
+        self,
+        ket: qutip.Qobj=None
+    ) -> qutip.Qobj:
+        """ Embed a ket of the symmetric basis into the full Hilbert space.
+
+        Only feasible for small quantum systems since the full Hilbert space is constructed.
+
+        """
+        dims = [len(self._energy_levels)] * self._qsystem.num_quantas
+        return qutip.Qobj(self._embedding() @ ket.full(), dims=[dims, [1] * len(dims)])
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+import numpy as np
+import qutip
+
+class TrajectoryStore:
+    """ A preallocated array of the kets of a state evolution of shape (num_samples, dim), written chunk by chunk.
+
+    On disk the array is a memory-mapped `.npy` file, so the trajectory never has to fit in memory and a saved
+    trajectory is loaded back by :meth:`load` without a copy. The samples are written into a temporary file in the
+    same directory, which :meth:`save` renames to `path` atomically, so a file at `path` is always complete and an
+    existing trajectory that another process has mapped is replaced, never truncated. Slicing, e.g.
+    `store[100:200]` or `store[:, index]`, returns views of the written samples, so only the selected part is read.
+    A store on disk is pickled by its path and reopened read-only, e.g. when it is returned by a worker process.
+
+    Parameters
+    ----------
+    num_samples : int
+        The number of samples to preallocate.
+    dim : int
+        The dimension of the kets.
+    path : str, optional
+        The `.npy` file backing the store. Defaults to an array in memory.
+
+    Attributes
+    ----------
+    path : str
+        The file backing the store, or `None` in memory.
+    num_samples : int
+        The number of preallocated samples.
+    dim : int
+        The dimension of the kets.
+    array : :obj:`numpy.ndarray`
+        The written samples of shape (len(store), dim), a view of the store.
+
+    """
+    def __init__(
+        self,
+        num_samples: int=None,
+        dim: int=None,
+        path: str=None
+    ):
+        self._temporary = None
+        if path is None:
+            self._data = np.empty((num_samples, dim), dtype=complex)
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            descriptor, self._temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            os.close(descriptor)
+            self._data = np.lib.format.open_memmap(
+                self._temporary, mode='w+', dtype=complex, shape=(num_samples, dim)
+            )
+        self._path = path
+        self._length = 0
+
+    @classmethod
+    def load(
+        cls,
+        path: str=None,
+        mode: str='r'
+    ) -> TrajectoryStore:
+        """ Open a saved trajectory memory-mapped. With `mode` 'r+' it can be overwritten in place. """
+        store = cls.__new__(cls)
+        store._temporary = None
+        store._data = np.load(path, mmap_mode=mode)
+        if store._data.ndim != 2:
+            raise ValueError("The file `%s` is not a trajectory of kets." %(path))
+        store._path = path
+        store._length = len(store._data)
+        return store
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def num_samples(self):
+        return self._data.shape[0]
+
+    @property
+    def dim(self):
+        return self._data.shape[1]
+
+    @property
+    def array(self):
+        return self._data[:self._length]
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        return self.array[key]
+
+    def write(
+        self,
+        start: int=None,
+        states: list=None
+    ):
+        """ Write the kets (:obj:`qutip.Qobj`) or an array of shape (num_states, dim) from the sample `start`. """
+        stop = start + len(states)
+        if stop > self.num_samples:
+            raise ValueError("The store holds %d samples, but %d are written." %(self.num_samples, stop))
+        if isinstance(states, np.ndarray):
+            self._data[start:stop] = states
+        else:
+            for i, state in enumerate(states):
+                self._data[start + i] = state.full().ravel()
+        self._length = max(self._length, stop)
+
+    def append(
+        self,
+        states: list=None
+    ):
+        """ Write the kets after the last written sample. """
+        self.write(self._length, states)
+
+    def flush(
+        self
+    ):
+        """ Write the changes of a store on disk to the file. """
+        if isinstance(self._data, np.memmap):
+            self._data.flush()
+
+    def save(
+        self
+    ):
+        """ Flush the samples and move the written file to `path`, replacing an existing trajectory atomically. """
+        self.flush()
+        if self._temporary is not None:
+            os.replace(self._temporary, self._path)
+            self._temporary = None
+
+    def discard(
+        self
+    ):
+        """ Remove the file of a store that was not saved, e.g. after a failed or cancelled simulation. """
+        if self._temporary is not None:
+            self._data = None
+            if os.path.exists(self._temporary):
+                os.remove(self._temporary)
+            self._temporary = None
+
+    def to_qobj(
+        self,
+        index: int=None,
+        dims: list=None
+    ) -> qutip.Qobj:
+        """ Return the ket of the sample `index` with the tensor structure `dims`, e.g. [[3, 3], [1, 1]]. """
+        return qutip.Qobj(np.array(self._data[index])[:, None], dims=dims)
+
+    def __getstate__(self):
+        if self._path is None:
+            return {"path": None, "data": self.array, "length": self._length}
+        if self._temporary is not None:
+            raise ValueError("The store must be saved before it is pickled.")
+        self.flush()
+        return {"path": self._path, "length": self._length}
+
+    def __setstate__(self, state):
+        self._path = state["path"]
+        self._length = state["length"]
+        self._temporary = None
+        if self._path is None:
+            self._data = state["data"]
+        else:
+            self._data = np.load(self._path, mmap_mode='r')
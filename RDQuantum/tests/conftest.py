@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+
+def build_qsim(
+    num_atoms: int=2,
+    shape: str="square",
+    kwargs: dict=None
+) -> rdq.QSim:
+    """ A chain of g/e/r atoms with a Rydberg drive `O`, a Rydberg interaction `V` and a detuning `D`. """
+    Rb = rdq.Quanta("Rb", ["g", "e", "r"])
+    qsim = rdq.QSim(rdq.QSystem([Rb] * num_atoms))
+    qsim.add_operator(
+        "O", [[i] for i in range(num_atoms)],
+        {"shape": shape, "constant": 1.0, "phase": 1.0, "kwargs": kwargs or {"amplitude": 1.0}},
+        {"constant": 2.0, "subdm": [("r", "g"), ("g", "r")], "subop": ["+"]}
+    )
+    qsim.add_operator(
+        "V", [list(pair) for pair in itertools.combinations(range(num_atoms), 2)],
+        {"shape": "square", "constant": 1.0, "phase": 1.0, "kwargs": {"amplitude": 1.0}},
+        {"constant": 5.0, "subdm": [("rr", "rr")], "subop": []}
+    )
+    qsim.add_operator(
+        "D", [[i] for i in range(num_atoms)],
+        {"shape": "square", "constant": 1.0, "phase": 1.0, "kwargs": {"amplitude": 0.3}},
+        {"constant": 1.0, "subdm": [("r", "r")], "subop": []}
+    )
+    return qsim
+
+def reference(
+    qsim: rdq.QSim,
+    init_state: qutip.Qobj,
+    operation_time: float,
+    num_samples: int
+) -> np.ndarray:
+    """ The states of :func:`qutip.sesolve` with exact pulses and tight tolerances, of shape (num_samples, dim). """
+    H = qsim.hamiltonian.compile(operation_time, num_samples, 'analytic')
+    tlist = np.linspace(0.0, operation_time, num_samples)
+    results = qutip.sesolve(H, init_state, tlist, options=qutip.Options(atol=1e-12, rtol=1e-10))
+    return rdq.analysis.stack_states(results.states)
+
+@pytest.fixture
+def make_qsim():
+    return build_qsim
+
+@pytest.fixture
+def sesolve_reference():
+    return reference
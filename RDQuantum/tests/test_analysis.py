@@ -0,0 +1,29 @@
+import numpy as np
+import qutip
+
+import rdquantum as rdq
+
+def random_states(num_states=5, dim=9, seed=0):
+    rng = np.random.default_rng(seed)
+    return [qutip.rand_ket(dim, seed=int(rng.integers(1 << 30))) for _ in range(num_states)]
+
+def test_stack_states():
+    states = random_states()
+    stacked = rdq.analysis.stack_states(states)
+    assert stacked.flags.c_contiguous and stacked.dtype == complex
+    assert np.array_equal(stacked, np.array([state.full().ravel() for state in states]))
+    assert np.array_equal(rdq.analysis.stack_states(stacked), stacked)
+
+def test_overlaps():
+    states = random_states()
+    targets = random_states(2, seed=1)
+
+    amplitude, phase, population = rdq.analysis.overlaps(states, targets)
+    expected = np.array([[target.overlap(state) for target in targets] for state in states])
+    assert np.allclose(amplitude * np.exp(1j * phase), expected)
+    assert np.allclose(population, np.abs(expected)**2)
+
+def test_populations():
+    states = random_states()
+    expected = np.array([[abs(state.full()[i, 0])**2 for i in range(9)] for state in states])
+    assert np.allclose(rdq.analysis.populations(states), expected)
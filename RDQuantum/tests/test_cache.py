@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import qutip
+
+import rdquantum as rdq
+from rdquantum.qsim.cache import experiment_hash
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 30
+
+def test_round_trip(tmp_path):
+    cache = rdq.ResultCache(str(tmp_path))
+    result = np.arange(12, dtype=complex).reshape(3, 4)
+    assert cache.get("key") is None
+
+    cache.put("key", result)
+    cached = cache.get("key")
+    assert isinstance(cached, np.memmap) and np.array_equal(cached, result)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [entry.name for entry in tmp_path.iterdir()] == ["key.npy"]
+
+def test_hash(make_qsim):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    key = qsim.experiment_hash(init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    assert make_qsim().experiment_hash(init_state, OPERATION_TIME, NUM_SAMPLES) == key
+    assert experiment_hash({"b": 1, "a": [1.0, 2j]}) == experiment_hash({"a": [1.0, 2j], "b": 1})
+    assert qsim.experiment_hash(qsim.qsystem.generate_state("rg"), OPERATION_TIME, NUM_SAMPLES) != key
+    assert qsim.experiment_hash(init_state, OPERATION_TIME, NUM_SAMPLES, qutip.Options(atol=1e-12)) != key
+    assert qsim.experiment_hash(init_state, OPERATION_TIME, NUM_SAMPLES, method='exact') != key
+    qsim.hamiltonian.pulses["O"].params["amplitude"] = 0.5
+    assert qsim.experiment_hash(init_state, OPERATION_TIME, NUM_SAMPLES) != key
+
+def test_run_expt_with_cache(make_qsim, tmp_path):
+    qsim = make_qsim()
+    cache = rdq.ResultCache(str(tmp_path))
+    init_state = qsim.qsystem.generate_state("gg")
+    targets = [qsim.qsystem.generate_state("rg")]
+
+    for _targets in (None, targets):
+        expected = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, targets=_targets)
+        missed = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, targets=_targets, cache=cache)
+        hit = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, targets=_targets, cache=cache)
+        if _targets is None:
+            assert all(state.dims == init_state.dims for state in hit)
+            expected, missed, hit = (rdq.analysis.stack_states(states) for states in (expected, missed, hit))
+        assert np.array_equal(missed, expected) and np.array_equal(hit, expected)
+    assert (cache.hits, cache.misses) == (2, 2)
+
+def test_density_matrices(make_qsim, tmp_path):
+    qsim = make_qsim()
+    qsim.add_noise("decay", [[0], [1]], 0.5, {"subdm": [("g", "r")], "subop": []})
+    cache = rdq.ResultCache(str(tmp_path))
+    init_state = qsim.qsystem.generate_state("gg")
+
+    missed = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, cache=cache)
+    hit = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, cache=cache)
+    assert cache.hits == 1
+    assert all(state.dims == _state.dims and (state - _state).norm() == 0.0 for state, _state in zip(hit, missed))
+
+def test_evict(tmp_path):
+    result = np.zeros(1000)
+    cache = rdq.ResultCache(str(tmp_path), max_bytes=3 * 8200)
+    for i in range(5):
+        cache.put("key%d" % i, result)
+        # The modification times order the results, so keep them apart.
+        os.utime(cache.path("key%d" % i), (i, i))
+    cache.evict()
+
+    assert cache.nbytes <= cache.max_bytes
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == ["key2.npy", "key3.npy", "key4.npy"]
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+from rdquantum.qsim import floquet
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+OPTIONS = qutip.Options(atol=1e-12, rtol=1e-10)
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+def test_common_period():
+    assert np.isclose(floquet.common_period([2.0, 3.0]), 6.0)
+    assert np.isclose(floquet.common_period([0.0, 0.5, 0.75]), 1.5)
+    assert floquet.common_period([0.0]) == 0.0
+    assert floquet.common_period([1.0, None]) is None
+    assert floquet.common_period([1.0, np.sqrt(2.0)]) is None
+
+def test_constant_pulses(make_qsim, sesolve_reference):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, OPTIONS, method='floquet')
+    assert deviation(states, expected) < 1e-6
+
+@pytest.mark.parametrize("operation_time", [OPERATION_TIME, 10 * OPERATION_TIME])
+def test_periodic_pulses(make_qsim, sesolve_reference, operation_time):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, operation_time, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, operation_time, NUM_SAMPLES, OPTIONS, method='floquet')
+    assert deviation(states, expected) < 1e-6
+
+def test_aperiodic_pulses(make_qsim):
+    qsim = make_qsim(shape="gaussian", kwargs={"amplitude": 1.0, "sigma": 0.5})
+    init_state = qsim.qsystem.generate_state("gg")
+
+    with pytest.raises(ValueError, match="common period"):
+        qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='floquet')
@@ -0,0 +1,39 @@
+import numpy as np
+import qutip
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 61
+
+def test_fold_groups_constant_pulses(make_qsim):
+    qsim = make_qsim()
+    H = qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES, fold=True)
+    # Every pulse is `square`, so everything folds into the static hamiltonian.
+    assert len(H) == 1 and isinstance(H[0], qutip.Qobj)
+    unfolded = qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES)
+    assert (H[0] - sum(operator * coeff[0] for operator, coeff in unfolded)).norm() < 1e-12
+
+def test_fold_keeps_short_sequence_time_dependent(make_qsim):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = rdq.PulseSequence([
+        {"duration": 1.0, "shape": "square", "kwargs": {"amplitude": 1.0}}
+    ])
+    H = qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES, fold=True)
+    assert len(H) == 2
+
+    init_state = qsim.qsystem.generate_state("gg")
+    folded = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, resolution='analytic')
+    segments = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='segments')
+    assert np.abs(rdq.analysis.stack_states(folded) - rdq.analysis.stack_states(segments)).max() < 1e-5
+
+def test_fold_sequence_covering_the_operation(make_qsim):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = rdq.PulseSequence([
+        {"duration": 2.0, "shape": "square", "kwargs": {"amplitude": 1.0}},
+        {"duration": 2.0, "shape": "square", "kwargs": {"amplitude": 1.0}},
+    ])
+    assert qsim.hamiltonian.pulses["O"].is_constant_over(OPERATION_TIME)
+    assert not qsim.hamiltonian.pulses["O"].is_constant_over(5.0)
+    H = qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES, fold=True)
+    assert len(H) == 1 and isinstance(H[0], qutip.Qobj)
@@ -0,0 +1,34 @@
+import numpy as np
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 30
+
+def test_submit_matches_run(make_qsim):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    job = qsim.submit(init_state=init_state, operation_time=OPERATION_TIME, num_samples=NUM_SAMPLES)
+    states = job.result(timeout=60)
+
+    expected = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES)
+    assert job.status == 'done' and job.progress == 1.0
+    assert np.abs(rdq.analysis.stack_states(states) - rdq.analysis.stack_states(expected)).max() < 1e-10
+
+def test_submit_shares_propagators(make_qsim):
+    qsim = make_qsim()
+    propagators = qsim.propagator(OPERATION_TIME, NUM_SAMPLES)
+
+    job = qsim.submit(
+        init_state=qsim.qsystem.generate_state("rg"), operation_time=OPERATION_TIME, num_samples=NUM_SAMPLES,
+        method='propagator'
+    )
+    job.result(timeout=60)
+    # The job reused the propagators computed by the session instead of computing them again.
+    assert job.qsim.propagator(OPERATION_TIME, NUM_SAMPLES) is propagators
+
+    # Editing the hamiltonian of the session does not touch the snapshot of the job.
+    qsim.hamiltonian.pulses["D"].params["amplitude"] = 0.5
+    assert qsim.hamiltonian.fingerprint(OPERATION_TIME, NUM_SAMPLES) != job.qsim.hamiltonian.fingerprint(
+        OPERATION_TIME, NUM_SAMPLES
+    )
@@ -0,0 +1,74 @@
+import numpy as np
+import scipy.linalg
+import scipy.sparse as sp
+import qutip
+
+import rdquantum as rdq
+from rdquantum.qsim import krylov
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+def random_hermitian(dim, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+    return 0.5 * (A + A.conj().T)
+
+def test_arnoldi_matches_expm():
+    A = random_hermitian(30)
+    psi = np.zeros(30, dtype=complex)
+    psi[0] = 1.0
+
+    # A small maximal dimension does not converge for a long step, so `evolve_krylov` splits it.
+    for hermitian in (True, False):
+        result, error, converged = krylov.arnoldi_expm(sp.csr_matrix(A), psi, 0.1, 1e-12, 30, hermitian)
+        assert converged and error < 1e-12
+        assert np.allclose(result, scipy.linalg.expm(-0.1j * A) @ psi, atol=1e-10)
+    _, _, converged = krylov.arnoldi_expm(sp.csr_matrix(A), psi, 5.0, 1e-12, 4)
+    assert not converged
+
+def test_split_steps():
+    A = random_hermitian(30)
+    psi = np.zeros(30, dtype=complex)
+    psi[0] = 1.0
+    tlist = np.array([0.0, 5.0])
+
+    states = krylov.evolve_krylov([[qutip.Qobj(A), np.ones(2)]], psi, tlist, tol=1e-12, max_dim=4)
+    assert np.allclose(states[-1], scipy.linalg.expm(-5.0j * A) @ psi, atol=1e-8)
+
+def test_krylov_constant_pulses(make_qsim, sesolve_reference):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='krylov')
+    assert deviation(states, expected) < 1e-7
+
+def test_krylov_tolerance():
+    A = random_hermitian(200)
+    psi = np.zeros(200, dtype=complex)
+    psi[0] = 1.0
+    tlist = np.linspace(0.0, 1.0, 5)
+    expected = scipy.linalg.expm(-1j * A) @ psi
+
+    errors = [
+        np.abs(krylov.evolve_krylov([[qutip.Qobj(A), np.ones(5)]], psi, tlist, tol=tol)[-1] - expected).max()
+        for tol in (1e-2, 1e-12)
+    ]
+    assert errors[1] < 1e-9 < errors[0]
+
+def test_run_expt_tolerance(make_qsim, monkeypatch):
+    qsim = make_qsim()
+    evolve_krylov = krylov.evolve_krylov
+    tolerances = []
+    def spy(*args, **kwargs):
+        tolerances.append(kwargs.get("tol"))
+        return evolve_krylov(*args, **kwargs)
+    monkeypatch.setattr(krylov, "evolve_krylov", spy)
+
+    init_state = qsim.qsystem.generate_state("gg")
+    qsim.run_expt(init_state, OPERATION_TIME, 4, qutip.Options(atol=1e-6), method='krylov')
+    assert tolerances == [1e-6]
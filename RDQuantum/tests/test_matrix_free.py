@@ -0,0 +1,47 @@
+import numpy as np
+import qutip
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+def test_matvec_matches_compiled_hamiltonian(make_qsim):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    H = rdq.MatrixFreeHamiltonian(qsim.hamiltonian, OPERATION_TIME, NUM_SAMPLES)
+    psi = np.random.default_rng(0).normal(size=H.dim) + 0j
+    t = OPERATION_TIME * 20 / (NUM_SAMPLES - 1)
+    expected = sum(
+        operator.full() @ psi * coeff[20] for operator, coeff in qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES)
+    )
+    assert np.allclose(H.matvec(t, psi), expected)
+
+def test_constant_pulses(make_qsim, sesolve_reference):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='matrix_free')
+    assert deviation(states, expected) < 1e-6
+
+def test_periodic_pulses(make_qsim, sesolve_reference):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    # The pulses are interpolated by splines of the samples, whose error dominates the tolerance of the solver.
+    options = qutip.Options(atol=1e-12, rtol=1e-10)
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, options, method='matrix_free')
+    assert deviation(states, expected) < 1e-5
+
+def test_empty_hamiltonian(make_qsim):
+    qsystem = make_qsim().qsystem
+    H = rdq.MatrixFreeHamiltonian(rdq.Hamiltonian(qsystem), OPERATION_TIME, NUM_SAMPLES)
+    init_state = qsystem.generate_state("rg").full().ravel()
+    assert H.dims == [3, 3]
+
+    states = H.evolve(init_state, np.linspace(0.0, OPERATION_TIME, 4))
+    assert np.allclose(states, init_state[None, :])
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+from rdquantum.qsim import montecarlo
+from rdquantum.qsim.observables import Observables
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 31
+
+def add_decay(qsim, rate=0.5):
+    qsim.add_noise("decay", [[0], [1]], rate, {"subdm": [("g", "r")], "subop": []})
+
+def targets(qsim):
+    return [qsim.qsystem.generate_state(label) for label in ("gg", "rg", "gr")]
+
+def test_trajectories_match_mesolve(make_qsim):
+    qsim = make_qsim()
+    add_decay(qsim)
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, targets=targets(qsim))
+
+    errors = []
+    for count, mean, error in qsim.iter_trajectories(
+        init_state, OPERATION_TIME, NUM_SAMPLES, targets(qsim), ntraj=200, seed=1, max_workers=2
+    ):
+        errors.append(error)
+    assert count == 200
+    assert np.all(np.abs(mean - expected) <= 5 * errors[-1] + 1e-3)
+
+def test_trajectories_are_seeded(make_qsim):
+    qsim = make_qsim()
+    add_decay(qsim)
+    init_state = qsim.qsystem.generate_state("gg")
+    options = qutip.Options(ntraj=40, seeds=7)
+    first, second = [
+        qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, options, method='trajectories', targets=targets(qsim))
+        for _ in range(2)
+    ]
+    assert np.allclose(first, second)
+
+def test_trajectories_require_noise(make_qsim):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    with pytest.raises(ValueError, match="require noise"):
+        qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='trajectories', targets=targets(qsim))
+    with pytest.raises(ValueError, match="require noise"):
+        next(qsim.iter_trajectories(init_state, OPERATION_TIME, NUM_SAMPLES, targets(qsim)))
+
+def test_trajectories_without_collapse_operators(make_qsim):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    tlist = np.linspace(0.0, OPERATION_TIME, NUM_SAMPLES)
+    # The closed system gives the overlaps, whose squares are the populations.
+    expected = np.abs(qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, targets=targets(qsim)))**2
+
+    *_, (count, mean, error) = montecarlo.iter_trajectories(
+        qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES), [], init_state.full(), tlist,
+        Observables(targets(qsim)), ntraj=2, max_workers=1
+    )
+    assert count == 2
+    assert np.abs(mean - expected).max() < 1e-5
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import qutip
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 31
+OPTIONS = qutip.Options(atol=1e-10, rtol=1e-8)
+
+def add_decay(qsim, rate=0.5):
+    qsim.add_noise("decay", [[0], [1]], rate, {"subdm": [("g", "r")], "subop": []})
+
+def mesolve_reference(qsim, init_state):
+    H = qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES, 'analytic')
+    tlist = np.linspace(0.0, OPERATION_TIME, NUM_SAMPLES)
+    results = qutip.mesolve(H, init_state, tlist, c_ops=qsim.noise.compile(), options=OPTIONS)
+    return np.array([state.full() for state in results.states])
+
+@pytest.mark.parametrize("subspace", [False, True])
+def test_noise_matches_mesolve(make_qsim, subspace):
+    qsim = make_qsim()
+    add_decay(qsim)
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = mesolve_reference(qsim, init_state)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, OPTIONS, subspace=subspace)
+    assert all(state.isoper for state in states)
+    assert np.abs(np.array([state.full() for state in states]) - expected).max() < 1e-6
+
+def test_dissipator_follows_the_channels(make_qsim):
+    qsim = make_qsim()
+    add_decay(qsim)
+    dissipator = qsim.noise.dissipator()
+    assert qsim.noise.dissipator() is dissipator
+
+    qsim.add_noise("dephasing", [[0]], 0.2, {"subdm": [("r", "r")], "subop": []})
+    expected = sum(qutip.lindblad_dissipator(c_op) for c_op in qsim.noise.compile())
+    assert (qsim.noise.dissipator() - expected).norm() < 1e-12
+
+    qsim.noise.remove("dephasing")
+    assert (qsim.noise.dissipator() - dissipator).norm() < 1e-12
+
+def test_negative_rate(make_qsim):
+    qsim = make_qsim()
+    with pytest.raises(ValueError):
+        add_decay(qsim, -1.0)
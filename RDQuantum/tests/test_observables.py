@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+
+@pytest.mark.parametrize("method", ['ode', 'exact'])
+def test_targets_match_states(make_qsim, method):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    targets = [qsim.qsystem.generate_state("rg"), qsim.qsystem.generate_state("gg")]
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method=method)
+    values = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method=method, targets=targets)
+    overlaps = rdq.analysis.stack_states(states) @ np.hstack([target.full() for target in targets]).conj()
+    assert np.abs(values - overlaps).max() < 1e-10
+
+def test_operator_targets(make_qsim):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    H = qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES)
+    targets = [H[0][0], qsim.qsystem.generate_state("rg").proj()]
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES)
+    values = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, targets=targets)
+    expected = np.array([[qutip.expect(target, state) for target in targets] for state in states])
+    assert np.abs(values - expected).max() < 1e-10
+
+def test_density_matrices(make_qsim):
+    qsim = make_qsim()
+    ket = qsim.qsystem.generate_state("rg")
+    targets = [qsim.qsystem.generate_state("rg"), qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES)[0][0]]
+    observables = rdq.Observables(targets)
+    rho = 0.5 * ket.proj() + 0.5 * qsim.qsystem.generate_state("gg").proj()
+
+    expected = [qutip.expect(targets[0].proj(), rho), qutip.expect(targets[1], rho)]
+    assert np.allclose(observables(0.0, rho), expected)
+    assert np.allclose(observables(0.0, ket), [1.0, qutip.expect(targets[1], ket)])
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import qutip
+
+from rdquantum.qsim.operator import OperatorCache, operator_cache
+
+def test_rebuilt_operator_hits_the_cache(make_qsim):
+    make_qsim().hamiltonian.compile(1.0, 10)
+    hits = operator_cache.hits
+    qsim = make_qsim()
+    qsim.hamiltonian.compile(1.0, 10)
+    assert operator_cache.hits > hits
+
+def test_cache_is_thread_safe():
+    dms = [qutip.rand_herm(8, density=0.5, seed=seed) for seed in range(16)]
+    nbytes = max(dm.data.data.nbytes + dm.data.indices.nbytes + dm.data.indptr.nbytes for dm in dms)
+    cache = OperatorCache(max_bytes=4 * nbytes)
+
+    def hammer(offset):
+        for i in range(2000):
+            key = (offset + i) % len(dms)
+            if cache.get(key) is None:
+                cache.put(key, dms[key])
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(hammer, range(8)))
+
+    assert cache.nbytes <= cache.max_bytes
+    assert cache.nbytes == sum(
+        dm.data.data.nbytes + dm.data.indices.nbytes + dm.data.indptr.nbytes for dm, _ in cache._entries.values()
+    )
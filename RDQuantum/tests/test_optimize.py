@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import rdquantum as rdq
+from rdquantum.qsim import optimize
+
+OPERATION_TIME = 3.0
+NUM_SLICES = 12
+
+def finite_differences(function, x, step=1e-6):
+    gradient = np.empty(x.size)
+    for i in range(x.size):
+        dx = np.zeros(x.size)
+        dx.flat[i] = step
+        gradient[i] = (function(x + dx.reshape(x.shape)) - function(x - dx.reshape(x.shape))) / (2 * step)
+    return gradient.reshape(x.shape)
+
+def transfer(qsim):
+    # The drive is symmetric, so the ground state is transferred to the symmetric single excitation.
+    w_state = (qsim.qsystem.generate_state("rg") + qsim.qsystem.generate_state("gr")).unit()
+    return [qsim.qsystem.generate_state("gg")], [w_state]
+
+def test_grape_gradient():
+    rng = np.random.default_rng(0)
+    dim, num_slices = 6, 8
+    def hermitian():
+        A = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+        return 0.5 * (A + A.conj().T)
+    drift = np.array([hermitian() for _ in range(num_slices)])
+    controls = np.array([hermitian(), hermitian()])
+    amplitudes = rng.normal(size=(2, num_slices))
+    init_states = np.linalg.qr(rng.normal(size=(dim, 2)) + 0j)[0]
+    target_states = np.linalg.qr(rng.normal(size=(dim, 2)) + 0j)[0]
+
+    def fidelity(_amplitudes):
+        return optimize.grape(drift, controls, _amplitudes, 0.3, init_states, target_states)[0]
+
+    _, gradient = optimize.grape(drift, controls, amplitudes, 0.3, init_states, target_states)
+    assert np.allclose(gradient, finite_differences(fidelity, amplitudes), atol=1e-7)
+
+def test_grape_gradient_degenerate(make_qsim):
+    # The operators of the simulator have degenerate spectra, e.g. the untouched `e` levels.
+    qsim = make_qsim()
+    optimizer = rdq.PulseOptimizer(qsim, OPERATION_TIME, NUM_SLICES, ["O", "D"])
+    init_states, target_states = transfer(qsim)
+
+    _, gradient = optimizer.fidelity(optimizer.x, init_states, target_states)
+    expected = finite_differences(lambda x: optimizer.fidelity(x, init_states, target_states)[0], optimizer.x)
+    assert np.allclose(gradient, expected, atol=1e-7)
+
+def test_parameters_gradient(make_qsim):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    optimizer = rdq.PulseOptimizer(qsim, OPERATION_TIME, 200, parameters={"O": ["amplitude", "a", "b"]})
+    init_states, target_states = transfer(qsim)
+
+    _, gradient = optimizer.fidelity(optimizer.x, init_states, target_states)
+    expected = finite_differences(lambda x: optimizer.fidelity(x, init_states, target_states)[0], optimizer.x)
+    assert np.allclose(gradient, expected, atol=1e-6)
+
+def test_optimize(make_qsim):
+    qsim = make_qsim()
+    optimizer = rdq.PulseOptimizer(qsim, OPERATION_TIME, NUM_SLICES, ["O"])
+    init_states, target_states = transfer(qsim)
+    initial, _ = optimizer.fidelity(optimizer.x, init_states, target_states)
+
+    result = optimizer.optimize(init_states, target_states, bounds=(-2.0, 2.0))
+    assert result.fidelity > 0.999 > initial
+
+    # The fidelity of the optimized pulses agrees with the exact simulation.
+    optimizer.apply()
+    states = qsim.run_expt(init_states[0], OPERATION_TIME, NUM_SLICES + 1, method='exact')
+    assert abs(target_states[0].overlap(states[-1]))**2 == pytest.approx(result.fidelity, abs=1e-9)
+
+def test_unknown_control(make_qsim):
+    with pytest.raises(ValueError):
+        rdq.PulseOptimizer(make_qsim(), OPERATION_TIME, NUM_SLICES, ["X"])
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+from rdquantum.qsim import propagator
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 61
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+def off_grid_sequence():
+    # The boundaries at 1.03 and 2.53 fall between the samples every 0.05.
+    return rdq.PulseSequence([
+        {"duration": 1.03, "shape": "square", "kwargs": {"amplitude": 1.0}},
+        {"duration": 1.5, "shape": "square", "kwargs": {"amplitude": 0.4}},
+    ])
+
+def test_exact_constant_pulses(make_qsim, sesolve_reference):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='exact')
+    assert deviation(states, expected) < 1e-7
+
+def test_exact_rejects_smooth_pulses(make_qsim):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = rdq.PulseSequence([
+        {"duration": 1.0, "shape": "square", "kwargs": {"amplitude": 1.0}},
+        {"duration": 2.0, "shape": "gaussian", "kwargs": {"amplitude": 1.0, "sigma": 0.5}},
+    ])
+    init_state = qsim.qsystem.generate_state("gg")
+
+    with pytest.raises(ValueError):
+        qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='exact')
+
+def test_sequence_steps():
+    times, values = off_grid_sequence().steps(OPERATION_TIME)
+    assert np.allclose(times, [0.0, 1.03, 2.53])
+    assert np.allclose(values, [1.0, 0.4, 0.0])
+
+def test_exact_sequence_boundary_off_the_grid(make_qsim, sesolve_reference):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = off_grid_sequence()
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='exact')
+    assert deviation(states, expected) < 1e-6
+
+def test_evolve_batch_of_states(make_qsim):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = off_grid_sequence()
+    tlist = np.linspace(0.0, OPERATION_TIME, NUM_SAMPLES)
+    H = qsim.hamiltonian.compile(OPERATION_TIME, NUM_SAMPLES, 'steps')
+    kets = np.hstack([qsim.qsystem.generate_state(label).full() for label in ("gg", "rg")])
+
+    batch = propagator.evolve_piecewise_constant(H, kets, tlist)
+    for i in range(kets.shape[1]):
+        single = propagator.evolve_piecewise_constant(H, kets[:, i], tlist)
+        assert np.allclose(batch[:, :, i], single)
+
+@pytest.mark.parametrize("sequence", [False, True])
+def test_propagator_method(make_qsim, sesolve_reference, sequence):
+    qsim = make_qsim()
+    if sequence:
+        qsim.hamiltonian.pulses["O"] = off_grid_sequence()
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='propagator')
+    assert deviation(states, expected) < 1e-6
+
+def test_propagator_is_cached(make_qsim):
+    qsim = make_qsim()
+    propagators = qsim.propagator(OPERATION_TIME, NUM_SAMPLES)
+    assert qsim.propagator(OPERATION_TIME, NUM_SAMPLES) is propagators
+
+    qsim.hamiltonian.pulses["O"] = off_grid_sequence()
+    assert qsim.propagator(OPERATION_TIME, NUM_SAMPLES) is not propagators
+
+def test_propagator_of_smooth_pulses(make_qsim, sesolve_reference):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    options = qutip.Options(atol=1e-12, rtol=1e-10)
+    propagators = qsim.propagator(OPERATION_TIME, NUM_SAMPLES, options)
+    assert np.abs(propagators @ init_state.full().ravel() - expected).max() < 1e-4
+
+def test_evolve_matches_run_expt(make_qsim):
+    qsim = make_qsim()
+    init_states = [qsim.qsystem.generate_state(label) for label in ("gg", "rg", "rr")]
+
+    evolutions = qsim.evolve(init_states, OPERATION_TIME, NUM_SAMPLES)
+    for init_state, states in zip(init_states, evolutions):
+        expected = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='exact')
+        assert deviation(states, rdq.analysis.stack_states(expected)) < 1e-10
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+def test_analytic_resolution(make_qsim, sesolve_reference):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, 10)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, 10, resolution='analytic')
+    assert deviation(states, expected) < 1e-5
+
+@pytest.mark.parametrize("resolution, tolerance", [(20, 1e-2), (200, 1e-5)])
+def test_spline_resolution(make_qsim, sesolve_reference, resolution, tolerance):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, 10)
+
+    # The spline is independent of the 10 output samples.
+    states = qsim.run_expt(init_state, OPERATION_TIME, 10, resolution=resolution)
+    assert deviation(states, expected) < tolerance
+
+def test_samples_are_shared():
+    samples = rdq.Pulse("cos", amplitude=1.0, a=3.0, b=0.2).sample(OPERATION_TIME, NUM_SAMPLES)
+    assert rdq.Pulse("cos", amplitude=1.0, a=3.0, b=0.2).sample(OPERATION_TIME, NUM_SAMPLES) is samples
+    assert rdq.Pulse("cos", amplitude=1.0, a=3.0, b=0.3).sample(OPERATION_TIME, NUM_SAMPLES) is not samples
+    with pytest.raises(ValueError):
+        samples[0] = 0.0
+
+def test_envelope():
+    pulse = rdq.Pulse("gaussian", amplitude=1.0, sigma=0.5)
+    envelope = pulse.envelope(OPERATION_TIME)
+    tlist = np.linspace(0.0, OPERATION_TIME, NUM_SAMPLES)
+    assert np.allclose(envelope(tlist), pulse.sample(OPERATION_TIME, NUM_SAMPLES))
+    assert np.isscalar(envelope(1.0)) and np.isclose(envelope(1.0), pulse.evaluate(np.ones(1), OPERATION_TIME)[0])
+
+def test_samples_are_cached_across_threads():
+    pulses = [rdq.Pulse("cos", amplitude=1.0, a=a, b=0.0) for a in np.linspace(0.1, 1.0, 300)]
+
+    def sample(offset):
+        return [pulses[(offset + i) % len(pulses)].sample(OPERATION_TIME, 50) for i in range(1000)]
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(sample, range(8)))
+    for offset, samples in enumerate(results):
+        for i in (0, 999):
+            expected = pulses[(offset + i) % len(pulses)].evaluate(np.linspace(0.0, OPERATION_TIME, 50))
+            assert np.allclose(samples[i], expected)
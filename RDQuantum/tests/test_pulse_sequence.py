@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 61
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+def test_sequence_is_not_constant():
+    sequence = rdq.PulseSequence([{"duration": 1.0, "shape": "square", "kwargs": {"amplitude": 1.0}}])
+    assert not sequence.is_constant
+    assert sequence.is_piecewise_constant
+    assert np.allclose(sequence.evaluate(np.array([0.5, 2.0]), 3.0), [1.0, 0.0])
+
+def test_segments_cover_the_tail(make_qsim):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = rdq.PulseSequence([
+        {"duration": 1.0, "shape": "square", "kwargs": {"amplitude": 1.0}}
+    ])
+    windows = qsim.hamiltonian.segments(3.0)
+    assert [(start, stop) for start, stop, _, _ in windows] == [(0.0, 1.0), (1.0, 3.0)]
+    pulse, _, _ = windows[1][3][qsim.hamiltonian.keys.index("O")]
+    assert pulse.evaluate(np.zeros(1), 2.0)[0] == 0.0
+
+@pytest.mark.parametrize("segments", [
+    [{"duration": 1.0, "shape": "square", "kwargs": {"amplitude": 1.0}},
+     {"duration": 2.0, "shape": "gaussian", "kwargs": {"amplitude": 1.0, "sigma": 0.5}}],
+    # The boundaries at 1.03 and 2.53 fall between the samples every 0.05.
+    [{"duration": 1.03, "shape": "square", "kwargs": {"amplitude": 1.0}},
+     {"duration": 1.5, "shape": "square", "kwargs": {"amplitude": 0.4}}],
+])
+def test_segments_match_sesolve(make_qsim, sesolve_reference, segments):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = rdq.PulseSequence(segments)
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='segments')
+    assert deviation(states, expected) < 1e-5
+
+def test_single_pulse_segments(make_qsim, sesolve_reference):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='segments')
+    assert deviation(states, expected) < 1e-5
+
+def test_repeated_segments_are_cached(make_qsim, sesolve_reference):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = rdq.PulseSequence([
+        {"duration": 0.5, "shape": "gaussian", "kwargs": {"amplitude": 1.0, "sigma": 0.1}},
+        {"duration": 0.5, "shape": "square", "kwargs": {"amplitude": 0.2}},
+    ] * 3)
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='segments')
+    assert deviation(states, expected) < 1e-5
+    # Six windows, but only two distinct segments aligned with the samples.
+    assert len(qsim._segment_propagators._entries) == 2
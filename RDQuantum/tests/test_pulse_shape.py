@@ -0,0 +1,77 @@
+import inspect
+
+import numpy as np
+import pytest
+
+import rdquantum as rdq
+from rdquantum.qsim.pulse.pulse_shape import COMPLEX_SHAPES, PULSE_SHAPES, get_shape
+
+TOTAL_T = 3.0
+TLIST = np.linspace(0.0, TOTAL_T, 31)
+
+# Real parameters of every registered shape besides the amplitude.
+PARAMS = {
+    "square": {},
+    "cos": {"a": 2.0, "b": 0.3},
+    "sin": {"a": 2.0, "b": 0.3},
+    "super_gaussian": {"tau": 0.8},
+    "gaussian": {"sigma": 0.5},
+    "blackman": {},
+    "drag": {"sigma": 0.5, "beta": 0.2},
+}
+
+def sample(name, amplitude, out=None):
+    shape = get_shape(name)
+    args = (TLIST, TOTAL_T) if "total_t" in inspect.signature(shape).parameters else (TLIST,)
+    return shape(*args, amplitude=amplitude, out=out, **PARAMS[name])
+
+def test_all_shapes_covered():
+    assert set(PARAMS) == set(PULSE_SHAPES)
+
+@pytest.mark.parametrize("name", sorted(PARAMS))
+def test_complex_amplitude(name):
+    samples = sample(name, 1.0 + 1.0j)
+    assert np.iscomplexobj(samples)
+    assert np.allclose(samples, (1.0 + 1.0j) * sample(name, 1.0))
+
+@pytest.mark.parametrize("name", sorted(PARAMS))
+def test_complex_buffer(name):
+    out = np.empty(TLIST.shape, dtype=complex)
+    samples = sample(name, 0.5 - 2.0j, out)
+    assert samples is out
+    assert np.allclose(out, (0.5 - 2.0j) * sample(name, 1.0))
+
+@pytest.mark.parametrize("name", sorted(set(PARAMS) - {"drag"}))
+def test_real_amplitude_stays_real(name):
+    assert not np.iscomplexobj(sample(name, 1.0))
+
+def test_complex_drive_evolves(sesolve_reference):
+    # A complex drive c |r><g| + c* |g><r| as two one-sided operators with conjugate amplitudes.
+    amplitude = 1.0 + 1.0j
+    Rb = rdq.Quanta("Rb", ["g", "e", "r"])
+    qsim = rdq.QSim(rdq.QSystem([Rb] * 2))
+    for key, level, _amplitude in (("O+", ("r", "g"), amplitude), ("O-", ("g", "r"), amplitude.conjugate())):
+        qsim.add_operator(
+            key, [[0], [1]],
+            {"shape": "square", "constant": 1.0, "phase": 1.0, "kwargs": {"amplitude": _amplitude}},
+            {"constant": 1.0, "subdm": [level], "subop": []}
+        )
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, TOTAL_T, len(TLIST))
+    assert np.allclose(np.linalg.norm(expected, axis=1), 1.0)
+
+    for method in ('ode', 'exact', 'matrix_free'):
+        states = qsim.run_expt(init_state, TOTAL_T, len(TLIST), method=method)
+        assert np.abs(rdq.analysis.stack_states(states) - expected).max() < 1e-5
+
+def test_complex_shapes_are_flagged():
+    assert COMPLEX_SHAPES == {"drag"}
+
+def test_complex_pulse_on_hermitian_operator_is_rejected(make_qsim):
+    qsim = make_qsim(shape="drag", kwargs={"amplitude": 1.0, "sigma": 0.5, "beta": 0.2})
+    init_state = qsim.qsystem.generate_state("gg")
+    with pytest.raises(ValueError, match="not Hermitian"):
+        qsim.hamiltonian.compile(TOTAL_T, len(TLIST))
+    for method in ('ode', 'matrix_free', 'segments'):
+        with pytest.raises(ValueError, match="not Hermitian"):
+            qsim.run_expt(init_state, TOTAL_T, len(TLIST), method=method)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+DRIVE = {"amplitude": 0.2, "a": 20.0, "b": 0.0}
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+def test_drive_energies(make_qsim):
+    qsim = make_qsim(shape="cos", kwargs=DRIVE)
+    energies = rdq.RotatingFrame.drive_energies(qsim.hamiltonian)
+    assert energies == [{"g": 0.0, "e": 0.0, "r": 20.0}] * 2
+
+@pytest.mark.parametrize("method", ['ode', 'exact', 'krylov'])
+def test_rotating_wave_approximation(make_qsim, sesolve_reference, method):
+    qsim = make_qsim(shape="cos", kwargs=DRIVE)
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method=method, rwa=True)
+    assert qsim.rotating_frame.dropped > 0
+    assert qsim.rotating_frame.is_piecewise_constant
+    assert deviation(states, expected) < 2 * qsim.rotating_frame.error
+
+def test_detuned_frame(make_qsim, sesolve_reference):
+    qsim = make_qsim(shape="cos", kwargs=DRIVE)
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    # A frame detuned from the drive keeps a slowly rotating component, so the hamiltonian is not piecewise constant.
+    frame = qsim.hamiltonian.rotating_frame(OPERATION_TIME, NUM_SAMPLES, frame={"r": 19.0})
+    assert not frame.is_piecewise_constant and frame.H_steps is None
+    tlist = np.linspace(0.0, OPERATION_TIME, NUM_SAMPLES)
+    results = qutip.sesolve(frame.H, init_state, tlist, options=qutip.Options(atol=1e-12, rtol=1e-10))
+    assert deviation(frame.to_lab(results.states, tlist), expected) < 2 * frame.error
+
+def test_exact_rejects_smooth_envelopes(make_qsim):
+    qsim = make_qsim(shape="gaussian", kwargs={"amplitude": 1.0, "sigma": 0.5})
+    init_state = qsim.qsystem.generate_state("gg")
+
+    with pytest.raises(ValueError, match="resonant"):
+        qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, method='exact', rwa=True)
@@ -0,0 +1,106 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import rdquantum as rdq
+from rdquantum.qsim import scheduler as _scheduler
+from rdquantum.qsim.jobs import SimulationCancelled
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 30
+
+@pytest.fixture
+def scheduler():
+    scheduler = rdq.JobScheduler(max_workers=1)
+    yield scheduler
+    scheduler.shutdown()
+
+def experiment(qsim, operation_time=OPERATION_TIME, num_samples=NUM_SAMPLES):
+    return {
+        "init_state": qsim.qsystem.generate_state("gg"),
+        "operation_time": operation_time,
+        "num_samples": num_samples,
+    }
+
+def long_experiment(qsim):
+    # A few seconds of the matrix-free solver, which reports progress after every sample.
+    return dict(experiment(qsim, 50.0, 500), method='matrix_free')
+
+def wait_until_running(job, timeout=30.0):
+    start = time.monotonic()
+    while job.progress == 0.0:
+        assert time.monotonic() - start < timeout
+        time.sleep(0.01)
+
+def test_deduplication(make_qsim, scheduler):
+    qsim = make_qsim()
+    job = scheduler.submit("alice", qsim, **experiment(qsim))
+    assert scheduler.submit("bob", make_qsim(), **experiment(qsim)) is job
+    assert job.users == {"alice", "bob"}
+
+    states = job.result(timeout=60)
+    expected = qsim.run_expt(**experiment(qsim))
+    assert np.abs(rdq.analysis.stack_states(states) - rdq.analysis.stack_states(expected)).max() < 1e-10
+    assert job.status == 'done'
+    assert scheduler.jobs == {}
+
+def test_cancel_keeps_shared_job(make_qsim, scheduler):
+    qsim = make_qsim()
+    job = scheduler.submit("alice", qsim, **experiment(qsim))
+    scheduler.submit("bob", qsim, **experiment(qsim))
+    job.cancel("alice")
+
+    assert job.users == {"bob"}
+    assert len(job.result(timeout=60)) == NUM_SAMPLES
+
+def test_cancel_queued_job(make_qsim, scheduler):
+    qsim = make_qsim()
+    running = scheduler.submit("alice", qsim, **long_experiment(qsim))
+    queued = scheduler.submit("bob", qsim, **experiment(qsim))
+    assert queued.status == 'queued'
+
+    queued.cancel("bob")
+    assert queued.status == 'cancelled'
+    assert queued.key not in scheduler.jobs
+    with pytest.raises(SimulationCancelled):
+        queued.result(timeout=0)
+    running.cancel()
+
+def test_cancel_running_job_then_resubmit(make_qsim, scheduler):
+    qsim = make_qsim()
+    job = scheduler.submit("alice", qsim, **long_experiment(qsim))
+    wait_until_running(job)
+
+    job.cancel("alice")
+    assert job.key not in scheduler.jobs
+    resubmitted = scheduler.submit("alice", qsim, **long_experiment(qsim))
+    assert resubmitted is not job
+    assert resubmitted.key == job.key
+
+    with pytest.raises(SimulationCancelled):
+        job.result(timeout=60)
+    assert job.status == 'cancelled'
+    assert scheduler.jobs == {job.key: resubmitted}
+
+    # The fresh job runs to completion once the worker is free.
+    assert len(resubmitted.result(timeout=120)) == 500
+    assert resubmitted.status == 'done'
+
+def test_worker_keeps_propagators(make_qsim):
+    qsim = make_qsim()
+    progress = SimpleNamespace(value=0.0)
+    cancel = threading.Event()
+    kwargs = dict(experiment(qsim), method='propagator')
+    _scheduler._run_recipe(qsim.to_recipe(), kwargs, progress, cancel)
+
+    # A job changing only the initial state finds the propagators of the previous job of the worker.
+    key = qsim.hamiltonian.fingerprint(OPERATION_TIME, NUM_SAMPLES)
+    propagators = _scheduler._propagators.get(key)
+    assert propagators is not None
+    kwargs["init_state"] = qsim.qsystem.generate_state("rg")
+    states = _scheduler._run_recipe(qsim.to_recipe(), kwargs, progress, cancel)
+    assert _scheduler._propagators.get(key) is propagators
+    assert np.allclose(states[-1].full().ravel(), propagators[-1] @ kwargs["init_state"].full().ravel())
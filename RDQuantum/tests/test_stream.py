@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+
+def deviation(states, expected):
+    return np.abs(rdq.analysis.stack_states(states) - expected).max()
+
+@pytest.mark.parametrize("chunk_size", [1, 7, None, NUM_SAMPLES])
+def test_stream_matches_run(make_qsim, sesolve_reference, chunk_size):
+    qsim = make_qsim(shape="cos", kwargs={"amplitude": 1.0, "a": 3.0, "b": 0.2})
+    init_state = qsim.qsystem.generate_state("gg")
+    expected = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, resolution=NUM_SAMPLES)
+
+    chunks = list(qsim.stream_expt(init_state, OPERATION_TIME, NUM_SAMPLES, chunk_size=chunk_size))
+    times = np.concatenate([times for times, _ in chunks])
+    states = [state for _, _states in chunks for state in _states]
+    assert len(chunks) == -(-NUM_SAMPLES // (chunk_size or NUM_SAMPLES // 10))
+    assert np.allclose(times, np.linspace(0.0, OPERATION_TIME, NUM_SAMPLES))
+    assert deviation(states, rdq.analysis.stack_states(expected)) < 1e-8
+    assert deviation(states, sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)) < 1e-4
+
+def test_stream_targets(make_qsim):
+    qsim = make_qsim()
+    qsim.add_noise("decay", [[0], [1]], 0.5, {"subdm": [("g", "r")], "subop": []})
+    init_state = qsim.qsystem.generate_state("gg")
+    targets = [qsim.qsystem.generate_state("rg"), qsim.qsystem.generate_state("gg")]
+    options = qutip.Options(atol=1e-12, rtol=1e-10)
+    expected = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, options, targets=targets)
+
+    values = np.concatenate([
+        _values for _, _values in qsim.stream_expt(init_state, OPERATION_TIME, NUM_SAMPLES, options, targets)
+    ])
+    assert np.abs(values - expected).max() < 1e-8
+
+def test_stream_is_lazy(make_qsim):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+
+    stream = qsim.stream_expt(init_state, OPERATION_TIME, NUM_SAMPLES, chunk_size=7)
+    times, states = next(stream)
+    assert len(times) == len(states) == 7
+    stream.close()
+    with pytest.raises(ValueError):
+        next(qsim.stream_expt(init_state, OPERATION_TIME, NUM_SAMPLES, chunk_size=0))
@@ -0,0 +1,31 @@
+import numpy as np
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 40
+
+def test_reachable_subspace(make_qsim):
+    qsim = make_qsim(num_atoms=3)
+    subspace = qsim.reachable_subspace(qsim.qsystem.generate_state("ggg"))
+    # The drive only couples g and r, so the 2**3 states without e are reachable out of 3**3.
+    assert subspace.dim == 8 and subspace.full_dim == 27
+
+def test_subspace_matches_full_space(make_qsim, sesolve_reference):
+    qsim = make_qsim(num_atoms=3)
+    init_state = qsim.qsystem.generate_state("ggg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    for method in ('ode', 'exact', 'krylov'):
+        states = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, subspace=True, method=method)
+        assert states[0].dims == init_state.dims
+        assert np.abs(rdq.analysis.stack_states(states) - expected).max() < 1e-5
+
+def test_subspace_targets(make_qsim):
+    qsim = make_qsim(num_atoms=3)
+    init_state = qsim.qsystem.generate_state("ggg")
+    targets = [qsim.qsystem.generate_state("rgg"), qsim.qsystem.generate_state("ggg")]
+
+    values = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, subspace=True, targets=targets)
+    expected = qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, targets=targets)
+    assert np.abs(values - expected).max() < 1e-5
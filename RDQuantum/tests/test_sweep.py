@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import rdquantum as rdq
+from rdquantum.qsim import sweep
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 30
+
+def test_grid():
+    points = sweep.grid({"O": {"amplitude": [0.5, 1.0]}}, operation_time=[1.0, 2.0, 3.0])
+    assert len(points) == 6
+    assert points[0] == {"params": {"O": {"amplitude": 0.5}}, "operation_time": 1.0}
+    assert points[-1] == {"params": {"O": {"amplitude": 1.0}}, "operation_time": 3.0}
+
+def test_empty_sweep(make_qsim):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    assert qsim.sweep([], init_state, OPERATION_TIME, NUM_SAMPLES).size == 0
+
+@pytest.mark.parametrize("method, max_workers", [('ode', 1), ('exact', 1), ('exact', 2)])
+def test_sweep_matches_run_expt(make_qsim, method, max_workers):
+    qsim = make_qsim()
+    init_states = [qsim.qsystem.generate_state("gg"), qsim.qsystem.generate_state("rg")]
+    points = sweep.grid({"O": {"amplitude": [0.5, 1.0]}}, init_state=init_states)
+
+    results = qsim.sweep(points, init_states[0], OPERATION_TIME, NUM_SAMPLES, method=method, max_workers=max_workers)
+    assert results.shape == (len(points), NUM_SAMPLES, 9)
+    for point, result in zip(points, results):
+        qsim.hamiltonian.pulses["O"].params.update(point["params"]["O"])
+        states = qsim.run_expt(point["init_state"], OPERATION_TIME, NUM_SAMPLES, method=method)
+        assert np.abs(result - rdq.analysis.stack_states(states)).max() < 1e-6
+
+def test_sequence_params_cannot_be_swept(make_qsim):
+    qsim = make_qsim()
+    qsim.hamiltonian.pulses["O"] = rdq.PulseSequence([
+        {"duration": 1.0, "shape": "square", "kwargs": {"amplitude": 1.0}},
+    ])
+    init_state = qsim.qsystem.generate_state("gg")
+
+    with pytest.raises(ValueError):
+        qsim.sweep([{"params": {"O": {"amplitude": 0.5}}}], init_state, OPERATION_TIME, NUM_SAMPLES)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 40
+
+def test_symmetric_basis_dimension(make_qsim):
+    basis = rdq.SymmetricBasis(make_qsim(num_atoms=3).qsystem)
+    # The occupations of 3 levels by 3 identical atoms.
+    assert basis.dim == 10
+
+def test_symmetric_basis_matches_full_space(make_qsim, sesolve_reference):
+    qsim = make_qsim(num_atoms=3)
+    basis = rdq.SymmetricBasis(qsim.qsystem)
+    init_state = qsim.qsystem.generate_state("ggg")
+    expected = sesolve_reference(qsim, init_state, OPERATION_TIME, NUM_SAMPLES)
+
+    for method in ('ode', 'exact'):
+        states = qsim.run_expt("ggg", OPERATION_TIME, NUM_SAMPLES, symmetric=True, method=method)
+        assert states[0].shape[0] == basis.dim
+        embedded = [basis.embed(state) for state in states]
+        assert np.abs(rdq.analysis.stack_states(embedded) - expected).max() < 1e-5
+
+def test_symmetric_basis_rejects_asymmetric_hamiltonian(make_qsim):
+    qsim = make_qsim(num_atoms=3)
+    qsim.add_operator(
+        "X", [[0]],
+        {"shape": "square", "constant": 1.0, "phase": 1.0, "kwargs": {"amplitude": 1.0}},
+        {"constant": 1.0, "subdm": [("e", "g"), ("g", "e")], "subop": ["+"]}
+    )
+    with pytest.raises(ValueError, match="not invariant"):
+        qsim.run_expt("ggg", OPERATION_TIME, NUM_SAMPLES, symmetric=True)
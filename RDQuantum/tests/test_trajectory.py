@@ -0,0 +1,70 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+import qutip
+
+import rdquantum as rdq
+
+OPERATION_TIME = 3.0
+NUM_SAMPLES = 60
+
+def test_trajectory_store(make_qsim, tmp_path):
+    qsim = make_qsim()
+    init_state = qsim.qsystem.generate_state("gg")
+    path = str(tmp_path / "trajectory.npy")
+
+    qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, store=path)
+    expected = rdq.analysis.stack_states(qsim.run_expt(init_state, OPERATION_TIME, NUM_SAMPLES, resolution=NUM_SAMPLES))
+    loaded = rdq.TrajectoryStore.load(path)
+    assert len(loaded) == NUM_SAMPLES
+    assert np.abs(loaded.array - expected).max() < 1e-8
+    assert np.shares_memory(rdq.analysis.stack_states(loaded), loaded.array)
+    assert [entry.name for entry in tmp_path.iterdir()] == ["trajectory.npy"]
+
+def test_write_and_append():
+    store = rdq.TrajectoryStore(5, 3)
+    kets = [qutip.basis(3, i) for i in range(3)]
+    store.append(kets[:2])
+    store.append(np.ones((2, 3)))
+    assert len(store) == 4 and store.array.shape == (4, 3)
+    assert np.array_equal(store[:, 0], [1.0, 0.0, 1.0, 1.0])
+    assert store.to_qobj(1, [[3], [1]]) == kets[1]
+    with pytest.raises(ValueError):
+        store.append(kets)
+
+def test_replace_mapped_trajectory(tmp_path):
+    path = str(tmp_path / "trajectory.npy")
+    first = rdq.TrajectoryStore(2, 3, path)
+    first.append(np.ones((2, 3)))
+    first.save()
+    mapped = rdq.TrajectoryStore.load(path)
+
+    second = rdq.TrajectoryStore(2, 3, path)
+    second.append(np.zeros((2, 3)))
+    # The file at `path` is complete until the new trajectory is saved.
+    assert np.array_equal(rdq.TrajectoryStore.load(path).array, np.ones((2, 3)))
+    second.save()
+    assert np.array_equal(rdq.TrajectoryStore.load(path).array, np.zeros((2, 3)))
+    assert np.array_equal(mapped.array, np.ones((2, 3)))
+
+def test_discard(tmp_path):
+    store = rdq.TrajectoryStore(2, 3, str(tmp_path / "trajectory.npy"))
+    store.append(np.ones((1, 3)))
+    store.discard()
+    assert os.listdir(tmp_path) == []
+
+def test_pickle(tmp_path):
+    path = str(tmp_path / "trajectory.npy")
+    store = rdq.TrajectoryStore(3, 2, path)
+    store.append(np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        pickle.dumps(store)
+    store.save()
+
+    for _store in (store, rdq.TrajectoryStore(3, 2)):
+        _store.write(0, np.ones((2, 2)))
+        unpickled = pickle.loads(pickle.dumps(_store))
+        assert len(unpickled) == 2 and np.array_equal(unpickled.array, np.ones((2, 2)))
+    assert isinstance(pickle.loads(pickle.dumps(store)).array, np.memmap)
@@ -1,4 +1,5 @@
 import re
+import uuid
 from sympy import sympify
 from sympy.parsing.latex import parse_latex
 import itertools
@@ -8,9 +9,20 @@ import matplotlib.pyplot as plt
 import streamlit as st
 
 import rdquantum as rdq
+from rdquantum.qsim.pulse import pulse_shape
 
 from . import set_pulse
 
+@st.cache_resource
+def result_cache() -> rdq.ResultCache:
+    """ The on-disk result cache shared by all sessions of the server. """
+    return rdq.ResultCache()
+
+@st.cache_resource
+def scheduler() -> rdq.JobScheduler:
+    """ The job scheduler shared by all sessions of the server. """
+    return rdq.get_scheduler()
+
 class Expt:
     """ A quantum experiment.
 
@@ -25,6 +37,8 @@ class Expt:
         self.hamiltonian_latex = {}
         self.qsim = None
         self.state_evo = None
+        self.overlaps = None
+        self.expt_settings = None
 
     def set_qspecies(
         self
@@ -166,9 +180,12 @@ class Expt:
                 for key in self.hamiltonian.keys():
                     col1, col2 = st.columns((1, 3))
                     with col1:
+                        # A complex shape would make the Hermitian operators of the UI non-Hermitian.
                         _pulse_shape = st.selectbox(
                             label=str('Shape of $\ %s$' %(key)),
-                            options=('square', 'cos', 'sin')
+                            options=tuple(
+                                name for name in pulse_shape.PULSE_SHAPES if name not in pulse_shape.COMPLEX_SHAPES
+                            )
                         )
                     with col2:
                         _pulse_args = set_pulse.pulse_params(key, _pulse_shape)
@@ -241,15 +258,34 @@ class Expt:
                 value = 100
             )
         
-        if st.button("set"):
-            self.state_evo = self.qsim.run_expt(
-                init_state = self.qsystem.generate_state(init_state),
-                operation_time = operation_time,
-                num_samples = num_samples
+        col1, col2 = st.columns(2)
+        with col1:
+            method = st.selectbox(
+                label = 'solver',
+                options = ('ode', 'propagator', 'exact', 'krylov', 'matrix_free', 'floquet'),
+                help = '`propagator` caches U(t) in every worker, so changing only the initial state is fast.'
             )
+        with col2:
+            subspace = st.checkbox(
+                label = 'evolve only in the subspace reachable from the initial state'
+            )
+            rwa = st.checkbox(
+                label = 'rotating wave approximation',
+                help = 'Solve in the frame of the drive frequencies without counter-rotating terms '
+                       '(ode, exact, krylov).'
+            )
+
+        if st.button("set"):
+            # The simulation runs when the target states are known, so only the overlaps are kept.
+            self.expt_settings = {
+                "init_state": self.qsystem.generate_state(init_state),
+                "operation_time": operation_time,
+                "num_samples": num_samples,
+                "subspace": subspace,
+                "method": method,
+                "rwa": rwa
+            }
             st.write(":green[You are all set!👍👍👍]")
-            # Debug
-            # st.write(state_evo)
 
         with st.container(border=True):
             st.write(':rainbow[State Evolution] 🌈')
@@ -263,34 +299,199 @@ class Expt:
                 if _target_state[0] == "ket":
                     target_states.append(self.qsystem.generate_state(_target_state[1]))
 
-            if st.button('run'):
-                amp = []
-                phase = []
-                for i in range(len(self.state_evo)):
-                    state = self.state_evo[i]
-                    amp.append(np.abs([s.dag().overlap(state) for s in target_states]))
-                    phase.append(np.angle([s.dag().overlap(state) for s in target_states])/np.pi)
-                times = np.linspace(0.0, operation_time, num_samples)
+            # The simulations run on the server-wide scheduler, which shares identical experiments between sessions
+            # and serves the sessions round-robin, so the page stays responsive while they are in flight.
+            if "user_id" not in st.session_state:
+                st.session_state.user_id = uuid.uuid4().hex
+            # Streaming solves the plain lab-frame dynamics, so it is only offered for those settings.
+            streamable = self.expt_settings is not None and (
+                self.expt_settings["method"] == 'ode'
+                and not self.expt_settings["subspace"] and not self.expt_settings["rwa"]
+            )
+            stream = st.checkbox(
+                label = 'show the dynamics while simulating',
+                disabled = not streamable,
+                help = 'Plot the overlaps chunk by chunk as the ode solver advances in this session. Press stop to '
+                    'abort early. Requires the ode solver without subspace or rotating wave approximation.'
+            )
+            run = st.button('run')
+            if run and stream and streamable:
+                self._cancel_job()
+                self._stream_overlaps(target_states, _target_states)
+            elif run:
+                self._cancel_job()
+                settings = dict(self.expt_settings)
+                if settings["rwa"]:
+                    settings["rwa_error"] = self.qsim.hamiltonian.rotating_frame(
+                        settings["operation_time"], settings["num_samples"]
+                    ).error
+                st.session_state.popevo_job = {
+                    "kind": "overlaps",
+                    "job": scheduler().submit(
+                        st.session_state.user_id, self.qsim, targets=target_states, cache=result_cache(),
+                        **self.expt_settings
+                    ),
+                    "labels": _target_states,
+                    "settings": settings
+                }
+            if st.button('populations of all basis states'):
+                self._cancel_job()
+                settings = self.expt_settings
+                store = None
+                if (
+                    settings["method"] == 'ode' and not settings["subspace"] and not settings["rwa"]
+                    and not self.qsim.noise.keys
+                ):
+                    # The kets are written into a memory-mapped trajectory in the result cache, which caps its size,
+                    # and the plot reads it without a copy. A finished trajectory of the experiment is reused.
+                    key = "trajectory-" + self.qsim.experiment_hash(**settings)
+                    output = {"store": result_cache().path(key)}
+                    if result_cache().get(key) is not None:
+                        try:
+                            store = rdq.TrajectoryStore.load(output["store"])
+                        except FileNotFoundError:
+                            pass
+                else:
+                    output = {"cache": result_cache()}
+                if store is not None:
+                    times = np.linspace(0.0, settings["operation_time"], settings["num_samples"])
+                    self.state_evo = (times, store)
+                else:
+                    st.session_state.popevo_job = {
+                        "kind": "populations",
+                        "job": scheduler().submit(st.session_state.user_id, self.qsim, **output, **settings),
+                        "labels": None,
+                        "settings": dict(self.expt_settings)
+                    }
+            self._poll_job()
 
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write('Amplitude')
-                    fig, ax = plt.subplots()
-                    for index in range(len(target_states)):
-                        ax.plot(times, [x[index] for x in amp])
-                    ax.set_xlabel('Time' r'$(\mu s)$')
-                    ax.set_ylabel('Amplitude')
-                    ax.legend(_target_states)
-                    st.pyplot(fig)
-                    st.write(amp)
+            if self.overlaps is not None:
+                self._plot_overlaps()
+            if self.state_evo is not None:
+                self._plot_populations()
 
-                with col2:
-                    st.write('Phase')
-                    fig, ax = plt.subplots()
-                    for index in range(len(target_states)):
-                        ax.plot(times, [x[index] for x in phase])
-                    ax.set_xlabel('Time' r'$(\mu s)$')
-                    ax.set_ylabel('Arg/' r'$\pi$')
-                    ax.legend(_target_states)
-                    st.pyplot(fig)
-                    st.write(phase)
+    def _stream_overlaps(
+        self,
+        target_states: list=None,
+        labels: list=None
+    ):
+        """ Simulate in this session and redraw the overlaps after every chunk of samples.
+
+        Pressing stop reruns the script, which closes the generator and aborts the simulation.
+
+        """
+        settings = self.expt_settings
+        if settings["method"] != 'ode' or settings["subspace"] or settings["rwa"]:
+            raise ValueError("Streaming requires the ode solver without subspace or rotating wave approximation.")
+        st.button('stop')
+        placeholder = st.empty()
+        times = []
+        overlaps = []
+        for _times, _overlaps in self.qsim.stream_expt(
+            settings["init_state"], settings["operation_time"], settings["num_samples"], targets=target_states
+        ):
+            times.append(_times)
+            overlaps.append(_overlaps)
+            self.overlaps = (np.concatenate(times), np.concatenate(overlaps), labels, None)
+            with placeholder.container():
+                self._plot_overlaps()
+            plt.close('all')
+        placeholder.empty()
+
+    def _cancel_job(
+        self
+    ):
+        """ Withdraw the session from its running job, which is cancelled when no other session waits for it. """
+        if "popevo_job" in st.session_state:
+            st.session_state.popevo_job["job"].cancel(st.session_state.user_id)
+            del st.session_state.popevo_job
+
+    @st.fragment(run_every=0.5)
+    def _poll_job(
+        self
+    ):
+        """ Show the progress of the running job and keep its result once it is finished. """
+        if "popevo_job" not in st.session_state:
+            return
+        _job = st.session_state.popevo_job
+        job = _job["job"]
+        if not job.done():
+            if job.status == 'queued':
+                st.progress(0.0, text='Queued...')
+            else:
+                st.progress(job.progress, text='Simulating... %d%%' %(100 * job.progress))
+            if st.button('cancel'):
+                self._cancel_job()
+                st.warning('The simulation was cancelled.')
+            return
+
+        del st.session_state.popevo_job
+        if job.status == 'done':
+            times = np.linspace(0.0, _job["settings"]["operation_time"], _job["settings"]["num_samples"])
+            if _job["kind"] == "overlaps":
+                rwa_error = _job["settings"].get("rwa_error")
+                self.overlaps = (times, job.result(), _job["labels"], rwa_error)
+            else:
+                self.state_evo = (times, job.result())
+                # A new trajectory may take the result cache over its size cap.
+                result_cache().evict()
+        elif job.status == 'cancelled':
+            st.warning('The simulation was cancelled.')
+            return
+        else:
+            st.error('The simulation failed: %s' %(job.exception()))
+            return
+        st.rerun()
+
+    def _plot_overlaps(
+        self
+    ):
+        times, overlaps, labels, rwa_error = self.overlaps
+        if rwa_error is not None:
+            st.caption('RWA error estimate: %.3g' %(rwa_error))
+        amp = np.abs(overlaps)
+        phase = np.angle(overlaps)/np.pi
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write('Amplitude')
+            fig, ax = plt.subplots()
+            for index in range(amp.shape[1]):
+                ax.plot(times, amp[:, index])
+            ax.set_xlabel('Time' r'$(\mu s)$')
+            ax.set_ylabel('Amplitude')
+            ax.legend(labels)
+            st.pyplot(fig)
+            st.write(amp)
+
+        with col2:
+            st.write('Phase')
+            fig, ax = plt.subplots()
+            for index in range(phase.shape[1]):
+                ax.plot(times, phase[:, index])
+            ax.set_xlabel('Time' r'$(\mu s)$')
+            ax.set_ylabel('Arg/' r'$\pi$')
+            ax.legend(labels)
+            st.pyplot(fig)
+            st.write(phase)
+
+    def _plot_populations(
+        self
+    ):
+        times, state_evo = self.state_evo
+        population = rdq.analysis.populations(state_evo)
+        levels = [self.qsystem.get_species(i).energy_levels for i in range(self.qsystem.num_quantas)]
+        labels = ['∣%s⟩' %(''.join(basis)) for basis in itertools.product(*levels)]
+
+        st.write('Population')
+        fig, ax = plt.subplots()
+        image = ax.imshow(
+            population.T,
+            aspect = 'auto',
+            origin = 'lower',
+            extent = (times[0], times[-1], -0.5, len(labels) - 0.5)
+        )
+        ax.set_yticks(range(len(labels)), labels)
+        ax.set_xlabel('Time' r'$(\mu s)$')
+        fig.colorbar(image, ax=ax)
+        st.pyplot(fig)
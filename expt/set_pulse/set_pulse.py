@@ -1,5 +1,3 @@
-import inspect
-
 import streamlit as st
 
 from rdquantum.qsim.pulse import pulse_shape
@@ -8,10 +6,7 @@ def pulse_params(
     key: str,
     shape: str
 ):
-    _pulse = getattr(pulse_shape, shape)
-    _param_dict = inspect.getfullargspec(_pulse).annotations
-    del _param_dict["tlist"]
-    del _param_dict["return"]
+    _param_dict = pulse_shape.shape_params(shape)
 
     row = st.columns(len(_param_dict.keys()))
     for i in range(len(_param_dict.keys())):